@@ -1,19 +1,24 @@
-from flask import Flask
-from flask_jwt_extended import JWTManager
-from database import db_session, init_db
 from dotenv import load_dotenv
-import os
-from extensions import csrf
 
-# LOAD ENV
+# LOAD ENV (trước khi import database: DATABASE_URL, DB_* đọc lúc tạo engine)
 load_dotenv()
 
+from flask import Flask, abort, send_file
+from jwt_cache import CachedJWTManager
+from database import db_session, init_db
+from services.limiter_store import per_process_warning
+import os
+import click
+from extensions import csrf
+
 # IMPORT EXTENSIONS
 from extensions import (
     login_manager,
     csrf,
     limiter,
-    talisman
+    talisman,
+    query_counter,
+    compression
 )
 
 # IMPORT API ROUTERS
@@ -60,9 +65,14 @@ app.config.update(
 login_manager.init_app(app)
 csrf.init_app(app)
 limiter.init_app(app)
+# memory:// + nhiều worker: mỗi worker đếm riêng -> cảnh báo ngay khi khởi động
+if (limiter_warning := per_process_warning()):
+    app.logger.warning("⚠️ %s", limiter_warning)
+query_counter.init_app(app)  # đếm SQL / phát hiện N+1 theo request
+compression.init_app(app)    # gzip / brotli theo Accept-Encoding
 
 # INIT JWT
-jwt = JWTManager(app)
+jwt = CachedJWTManager(app)  # cache token đã kiểm tra (jwt_cache.py)
 
 # SECURITY HEADERS
 talisman.init_app(
@@ -106,14 +116,109 @@ app.register_blueprint(student_view_bp)
 app.register_blueprint(company_view_bp)
 app.register_blueprint(admin_view_bp)
 
+# STATIC ASSETS: CSS layout có fingerprint trong tên file -> cache 1 năm (immutable)
+@app.route("/assets/app.<fingerprint>.css")
+def layout_stylesheet(fingerprint):
+    from utils import STYLESHEET_FINGERPRINT, STYLESHEET_PATH
+    if fingerprint != STYLESHEET_FINGERPRINT:
+        abort(404)
+    resp = send_file(STYLESHEET_PATH, mimetype="text/css", max_age=31536000)
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return resp
+
 # DB SESSION CLEANUP
 @app.teardown_appcontext
 def shutdown_session(exception=None):
     db_session.remove()
 
+# CLI: đóng các job đã đủ người (chạy định kỳ, ngoài luồng đọc danh sách job)
+@app.cli.command("close-full-jobs")
+def close_full_jobs_command():
+    from services import recruitment_service
+    closed = recruitment_service.close_full_jobs()
+    print(f"✅ Đã đóng {closed} job đủ người")
+
+# CLI: dựng lại Job.appliedCount từ bảng applications
+@app.cli.command("reconcile-applied-count")
+def reconcile_applied_count_command():
+    from services import recruitment_service
+    updated = recruitment_service.recount_applied()
+    print(f"✅ Đã đồng bộ appliedCount cho {updated} job")
+
+# CLI: kiểm tra các query chính đều dùng index (EXPLAIN QUERY PLAN, SQLite)
+@app.cli.command("audit-indexes")
+def audit_indexes_command():
+    import index_audit
+    init_db()  # tạo bảng / index còn thiếu trước khi kiểm tra
+    failed = 0
+    for name, plan, scans in index_audit.run_audit():
+        if scans:
+            failed += 1
+            print(f"❌ {name}: quét toàn bảng {', '.join(scans)}")
+            for detail in plan:
+                print(f"     {detail}")
+        else:
+            print(f"✅ {name}")
+    if failed:
+        raise SystemExit(f"❌ {failed} query đang quét toàn bảng")
+
+# CLI: chấm lại mọi bài đã nộp của 1 bài test (sau khi đổi đáp án)
+@app.cli.command("regrade-test")
+@click.argument("test_id", type=int)
+@click.option("--chunk-size", type=int, default=None, help="Số TestResult mỗi lô")
+def regrade_test_command(test_id, chunk_size):
+    from services import ServiceError, grading_service
+    try:
+        regraded = grading_service.regrade_test(test_id, chunk_size or grading_service.REGRADE_CHUNK)
+    except ServiceError as e:
+        raise SystemExit(f"❌ {e.detail}")
+    print(f"✅ Đã chấm lại {regraded} bài của test {test_id}")
+
+# CLI: chuyển câu trả lời JSON cũ (TestResult.answers) sang bảng test_answers
+@app.cli.command("migrate-test-answers")
+def migrate_test_answers_command():
+    from services import grading_service
+    init_db()
+    migrated = grading_service.migrate_legacy_answers()
+    print(f"✅ Đã chuyển câu trả lời của {migrated} bài test")
+
+# CLI: worker tính lại match_scores theo hàng đợi match_dirty (chạy nền)
+@app.cli.command("match-worker")
+def match_worker_command():
+    from services.match_worker import MatchWorker
+    init_db()
+    print("🔁 Match worker đang chạy (Ctrl+C để dừng)")
+    MatchWorker().run()
+
+# CLI: tính lại toàn bộ match_scores (lần đầu / sau khi sửa dữ liệu trực tiếp trong DB)
+@app.cli.command("recompute-matches")
+def recompute_matches_command():
+    from services.match_worker import MatchWorker
+    init_db()
+    total = MatchWorker().recompute_all()
+    print(f"✅ Đã tính lại {total} điểm ghép năng lực")
+
+# CLI: server giao thức Redis tối giản giữ bộ đếm giới hạn đăng nhập cho mọi worker
+# (LIMITER_STORAGE_URI=redis://127.0.0.1:<port>/0) khi không có Redis thật
+@app.cli.command("limiter-server")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=6390, type=int)
+def limiter_server_command(host, port):
+    from services.limiter_server import LimiterServer
+    server = LimiterServer(host, port)
+    print(f"🚦 Limiter server đang chạy tại redis://{host}:{port}/0 (Ctrl+C để dừng)")
+    server.serve_forever()
+
 # RUN SERVER
 if __name__ == "__main__":
     init_db()
+    from services.skill_service import load_skill_cache
+    load_skill_cache()  # cache tên skill -> id (nếu bỏ qua sẽ nạp ở lần dùng đầu)
+    # dev server: chạy worker ghép năng lực trong thread nền
+    # (bỏ qua tiến trình cha của reloader để không chạy 2 worker)
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        from services.match_worker import MatchWorker
+        MatchWorker().start()
     print("🚀 Server đang chạy tại: http://127.0.0.1:8001")
     app.run(debug=True, port=8001)
 
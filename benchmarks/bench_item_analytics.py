@@ -0,0 +1,96 @@
+"""
+Benchmark: thống kê theo câu hỏi (services/analytics_service.get_item_analytics).
+
+Tạo 1 bài test có `--questions` câu trắc nghiệm và `--submissions` bài nộp (SQLite tạm),
+đo lần tính đầu (cache rỗng) và các lần đọc lại khi không có bài nộp mới.
+
+Chạy:  python benchmarks/bench_item_analytics.py [--submissions 50000] [--questions 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert
+
+import database
+
+
+def setup_database(n_submissions, n_questions):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_")
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+    database.db_session.configure(bind=engine)
+
+    from models.base import Base
+    from models import Job, SkillTest, TestResult, TestAnswer
+    from models.job_models import Question
+
+    Base.metadata.create_all(bind=engine)
+    db = database.db_session
+
+    job = Job(title="Bench", status="open")
+    db.add(job)
+    db.flush()
+    test = SkillTest(jobId=job.id, testName="Bench", totalScore=100)
+    db.add(test)
+    db.flush()
+    questions = [Question(testId=test.id, content=f"Câu {i}", options="A|B|C|D", correctAnswer="B")
+                 for i in range(n_questions)]
+    db.add_all(questions)
+    db.flush()
+
+    # bài nộp giả lập: thí sinh có "năng lực" cao trả lời đúng nhiều hơn
+    rng = random.Random(42)
+    results, answers = [], []
+    for result_id in range(1, n_submissions + 1):
+        ability = rng.random()
+        correct = 0
+        for q in questions:
+            is_correct = rng.random() < 0.2 + 0.7 * ability
+            answer = "B" if is_correct else rng.choice("ACD")
+            correct += is_correct
+            answers.append({"resultId": result_id, "questionId": q.id,
+                            "answer": answer,
+                            "correct": is_correct, "points": 100 / n_questions if is_correct else 0.0,
+                            "choice": answer})
+        results.append({"id": result_id, "testId": test.id, "studentId": result_id,
+                        "score": round(correct * 100 / n_questions)})
+    db.execute(insert(TestResult), results)
+    db.execute(insert(TestAnswer), answers)
+    db.commit()
+    return test.id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--submissions", type=int, default=50_000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    test_id = setup_database(args.submissions, args.questions)
+    print(f"dữ liệu: {args.submissions} bài x {args.questions} câu, {time.perf_counter() - start:.1f} s")
+
+    from services import analytics_service
+
+    start = time.perf_counter()
+    analytics_service.get_item_analytics(test_id)
+    print(f"lần đầu (tính): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    samples = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        analytics_service.get_item_analytics(test_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"cache: median {statistics.median(samples):.2f} ms, max {max(samples):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
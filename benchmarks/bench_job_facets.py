@@ -0,0 +1,116 @@
+"""
+Benchmark: lọc job theo facet (services/facet_service.get_job_facets).
+
+Tạo `--jobs` job (SQLite tạm) thuộc `--companies` công ty, mỗi job 1-5 skill, đo lần nạp
+index đầu, rồi thời gian 1 request (đếm mọi facet + nạp 1 trang job) với vài bộ lọc,
+và thời gian áp dụng thay đổi của 1 job.
+
+Chạy:  python benchmarks/bench_job_facets.py [--jobs 200000] [--companies 2000]
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert
+
+import database
+
+LOCATIONS = ["Hà Nội", "Hồ Chí Minh", "Đà Nẵng", "Hải Phòng", "Cần Thơ", "Huế", "Nha Trang", "Remote"]
+INDUSTRIES = ["IT", "Tài chính", "Giáo dục", "Bán lẻ", "Sản xuất", "Y tế", "Logistics"]
+SIZES = ["1-10", "10-50", "50-100", "100-500", "500-1000", "1000+"]
+
+
+def setup_database(n_jobs, n_companies, n_skills=200):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_")
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+    database.db_session.configure(bind=engine)
+
+    from models.base import Base
+    from models import Company, Job, Skill, JobSkill, SkillTest
+    from models.user_models import CompanyProfile
+
+    Base.metadata.create_all(bind=engine)
+    db = database.db_session
+    rng = random.Random(42)
+    # dữ liệu cũ: lần đồng bộ theo updatedAt không phải nạp lại cả bảng
+    updated_at = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+
+    db.execute(insert(Skill), [{"id": i, "name": f"Skill {i}", "normalizedName": f"skill {i}"}
+                               for i in range(1, n_skills + 1)])
+    db.execute(insert(Company), [{"id": i, "companyName": f"Công ty {i}"} for i in range(1, n_companies + 1)])
+    db.execute(insert(CompanyProfile), [{
+        "companyId": i, "industry": rng.choice(INDUSTRIES), "size": rng.choice(SIZES)
+    } for i in range(1, n_companies + 1)])
+
+    jobs, skills, tests = [], [], []
+    for job_id in range(1, n_jobs + 1):
+        jobs.append({"id": job_id, "companyId": rng.randint(1, n_companies), "title": f"Job {job_id}",
+                     "location": rng.choice(LOCATIONS), "status": "CLOSED" if rng.random() < 0.2 else "open",
+                     "createdAt": updated_at, "updatedAt": updated_at})
+        # skill phổ biến xuất hiện nhiều hơn
+        for skill_id in {min(int(rng.paretovariate(1.2)), n_skills) for _ in range(rng.randint(1, 5))}:
+            skills.append({"jobId": job_id, "skillId": skill_id, "requiredLevel": 3})
+        if rng.random() < 0.4:
+            tests.append({"jobId": job_id, "testName": "Test", "totalScore": 100})
+    db.execute(insert(Job), jobs)
+    db.execute(insert(JobSkill), skills)
+    db.execute(insert(SkillTest), tests)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200_000)
+    parser.add_argument("--companies", type=int, default=2_000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    setup_database(args.jobs, args.companies)
+    print(f"dữ liệu: {args.jobs} job, {args.companies} công ty, {time.perf_counter() - start:.1f} s")
+
+    from models import Job
+    from services import facet_service
+
+    start = time.perf_counter()
+    open_jobs = facet_service.load_facet_index()
+    print(f"nạp index: {open_jobs} job đang mở, {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for name, selected in [
+        ("không lọc", {}),
+        ("1 địa điểm", {"location": {"Hà Nội"}}),
+        ("2 địa điểm + ngành", {"location": {"Hà Nội", "Đà Nẵng"}, "industry": {"IT"}}),
+        ("skill + có test", {"skills": {1, 2}, "hasTest": {True}}),
+        ("mọi facet", {"location": {"Hà Nội"}, "industry": {"IT"}, "size": {"50-100"},
+                       "skills": {1}, "hasTest": {True}}),
+    ]:
+        samples = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            facet_service.get_job_facets(selected, limit=20)
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"{name:<20} median {statistics.median(samples):6.2f} ms, max {max(samples):6.2f} ms")
+
+    # sửa 1 job rồi đọc lại: chỉ job đó được nạp lại
+    db = database.db_session
+    samples = []
+    for i in range(args.rounds):
+        job = db.get(Job, i + 1)
+        job.location = "Remote" if job.location != "Remote" else "Huế"
+        db.commit()
+        start = time.perf_counter()
+        facet_service.get_job_facets(limit=20)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{'sau khi sửa 1 job':<20} median {statistics.median(samples):6.2f} ms, max {max(samples):6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: tìm kiếm job full-text (services/job_search_service.search_jobs).
+
+Tạo `--jobs` job giả lập trong SQLite tạm (index FTS5 được trigger cập nhật khi insert),
+từ vựng phân bố Zipf, rồi đo thời gian 1 lần tìm cho các dạng câu tìm kiếm: nhiều từ,
+prefix, kèm lọc địa điểm, từ hiếm / rất phổ biến.
+
+Chạy:  python benchmarks/bench_job_search.py [--jobs 1000000] [--vocabulary 50000] [--rounds 200]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert
+
+import database
+
+TECH_WORDS = ("python java golang rust kotlin swift react angular vue django flask spring node "
+              "backend frontend fullstack mobile devops data tester senior junior intern lead "
+              "engineer developer analyst architect cloud security embedded game ai ml").split()
+LOCATIONS = ["Hà Nội", "Hồ Chí Minh", "Đà Nẵng", "Cần Thơ", "Hải Phòng", "Remote"]
+
+
+def setup_database(n_jobs, vocabulary):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_")
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+    database.db_session.configure(bind=engine)
+
+    from models.base import Base
+    from models import Job
+
+    Base.metadata.create_all(bind=engine)
+    db = database.db_session
+    rng = random.Random(42)
+    # từ vựng phân bố Zipf như văn bản thật: vài từ rất phổ biến, đa số hiếm
+    words = TECH_WORDS + [f"w{i}" for i in range(vocabulary)]
+    rng.shuffle(words)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    batch = 50_000
+    for start in range(0, n_jobs, batch):
+        db.execute(insert(Job), [{
+            "title": " ".join(rng.choices(TECH_WORDS, k=2) + rng.choices(words, cum_weights=cum_weights, k=2)),
+            "description": " ".join(rng.choices(words, cum_weights=cum_weights, k=30)),
+            "location": rng.choice(LOCATIONS),
+            "status": "open" if rng.random() < 0.8 else "CLOSED",
+        } for _ in range(start, min(start + batch, n_jobs))])
+        db.commit()
+
+
+def measure(fn, rounds):
+    fn()  # warm-up
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    setup_database(args.jobs, args.vocabulary)
+    print(f"dữ liệu: {args.jobs} job, {time.perf_counter() - start:.1f} s")
+
+    from services.job_search_service import search_jobs
+
+    cases = [
+        ("2 từ", lambda: search_jobs("python w1234", limit=20)),
+        ("prefix (đang gõ)", lambda: search_jobs("senior pyth", limit=20)),
+        ("prefix + địa điểm", lambda: search_jobs("rust emb", location="ha noi", limit=20)),
+        ("từ hiếm, mọi trạng thái", lambda: search_jobs("w45678", status=None, limit=20)),
+        ("từ rất phổ biến", lambda: search_jobs("developer", limit=20)),
+    ]
+    for name, fn in cases:
+        samples = measure(fn, args.rounds)
+        print(f"{name}: median {statistics.median(samples):.2f} ms, "
+              f"p99 {sorted(samples)[int(len(samples) * 0.99) - 1]:.2f} ms, {len(fn())} kết quả")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: chi phí xác thực JWT mỗi request (jwt_cache.py).
+
+Trang HTML: token trong cookie được đọc 3 lần (view, wrap_layout, show_notifications).
+API: flask_jwt_extended kiểm tra token trong header (verify_jwt_in_request).
+So sánh decode HS256 mỗi lần đọc / chỉ nhớ trong request / nhớ trong request + LRU
+giữa các request. Chỉ đo phần xác thực (trong test_request_context), không đo view.
+
+Chạy:  python benchmarks/bench_jwt_cache.py [--requests 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("FLASK_SECRET_KEY", "bench-flask-secret")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-bench-jwt-secret")
+
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+import jwt_cache
+import utils
+from app import app
+from jwt_cache import VerifiedTokenCache
+
+
+class NoCache:
+    def claims(self, key, decode):
+        return decode()
+
+    def clear(self):
+        pass
+
+
+def page_auth():
+    for _ in range(3):
+        utils.get_current_user_from_jwt()
+
+
+def api_auth():
+    verify_jwt_in_request()
+
+
+def measure(n, environ, auth):
+    start = time.perf_counter()
+    for _ in range(n):
+        with app.test_request_context("/", **environ):
+            auth()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        token = create_access_token(identity="1", additional_claims={"role": "student"})
+    page = {"headers": {"Cookie": f"ui_access_token={token}"}}
+    api = {"headers": {"Authorization": f"Bearer {token}"}}
+
+    baseline = measure(args.requests, {}, lambda: None)
+    print(f"{args.requests} request, test_request_context rỗng: {baseline:.1f} µs/request (đã trừ bên dưới)")
+    for name, cache in [("decode mỗi lần", NoCache()),
+                        ("memo trong request", VerifiedTokenCache(maxsize=0)),
+                        ("memo + LRU", VerifiedTokenCache())]:
+        jwt_cache.token_cache = cache
+        page_us = measure(args.requests, page, page_auth) - baseline
+        api_us = measure(args.requests, api, api_auth) - baseline
+        print(f"{name:<20} trang HTML {page_us:6.1f} µs/request | API {api_us:6.1f} µs/request")
+
+
+if __name__ == "__main__":
+    main()
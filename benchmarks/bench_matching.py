@@ -0,0 +1,64 @@
+"""
+Benchmark: engine ghép năng lực (services/matching_service).
+
+Đo riêng phần tính toán trên ma trận (không DB) mà worker chạy khi 1 student đổi
+kỹ năng: chấm điểm toàn bộ job cho student đó rồi lấy top-K.
+
+Chạy:  python benchmarks/bench_matching.py [--jobs 100000] [--skills 500] [--per-job 6]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.matching_service import JobSkillMatrix, top_k
+
+
+def build_matrix(n_jobs, n_skills, per_job, rng):
+    job_ids = np.repeat(np.arange(1, n_jobs + 1), per_job)
+    skill_ids = rng.integers(1, n_skills + 1, size=n_jobs * per_job)
+    levels = rng.integers(1, 6, size=n_jobs * per_job)
+    # bỏ (job, skill) trùng như khóa chính của job_skills
+    rows = np.unique(np.stack([job_ids, skill_ids, levels], axis=1), axis=0)
+    _, first = np.unique(rows[:, :2], axis=0, return_index=True)
+    return JobSkillMatrix.from_rows(rows[first].tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--skills", type=int, default=500)
+    parser.add_argument("--per-job", type=int, default=6)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    start = time.perf_counter()
+    matrix = build_matrix(args.jobs, args.skills, args.per_job, rng)
+    print(f"dựng ma trận: {len(matrix.row_ids)} job, {len(matrix.col_row)} phần tử, "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    samples = []
+    for _ in range(args.rounds):
+        skills = {int(s): int(rng.integers(1, 6))
+                  for s in rng.choice(np.arange(1, args.skills + 1), size=12, replace=False)}
+
+        start = time.perf_counter()
+        ids, scores, _, _ = matrix.score(skills)
+        top_k(scores, ids, args.top)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    print(f"score + top-{args.top}: median {statistics.median(samples):.2f} ms, "
+          f"p95 {samples[int(len(samples) * 0.95) - 1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
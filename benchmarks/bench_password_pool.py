@@ -0,0 +1,91 @@
+"""
+Benchmark: đợt đăng nhập dồn dập ảnh hưởng request nhẹ thế nào (services/password_service).
+
+`--logins` thread cùng kiểm tra mật khẩu bcrypt (như N request /api/login/ song song),
+trong lúc 1 thread khác đo độ trễ của 1 "request nhẹ" (việc Python ~1 ms) lặp lại.
+So sánh băm ngay trên thread của request (PASSWORD_HASH_WORKERS=0) với process pool có
+hàng đợi `--queue`: đăng nhập vượt sức chứa nhận 503 ngay thay vì cùng chờ cả đợt.
+Lợi ích về độ trễ request nhẹ phụ thuộc số CPU (pool chiếm tối đa `--workers` core).
+
+Chạy:  python benchmarks/bench_password_pool.py [--logins 16] [--rounds 12] [--workers 2] [--queue 4]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services import password_service
+from services.base import ServiceError
+from services.password_service import HashPool
+
+
+def cheap_request():
+    start = time.perf_counter()
+    sum(i * i for i in range(20_000))
+    return (time.perf_counter() - start) * 1000
+
+
+def run(pool, hashed, password, n_logins):
+    password_service.pool = pool
+    done = threading.Event()
+    latencies = []
+
+    def probe():
+        while not done.is_set():
+            latencies.append(cheap_request())
+            time.sleep(0.005)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    login_times, rejected = [], []
+
+    def login():
+        start = time.perf_counter()
+        try:
+            password_service.verify_password(hashed, password)
+            login_times.append(time.perf_counter() - start)
+        except ServiceError:
+            rejected.append(time.perf_counter() - start)
+
+    logins = [threading.Thread(target=login) for _ in range(n_logins)]
+    for t in logins:
+        t.start()
+    for t in logins:
+        t.join()
+    done.set()
+    prober.join()
+    return login_times, rejected, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=4)
+    args = parser.parse_args()
+
+    password = "Secret@123"
+    hashed = password_service.hash_password(password, rounds=args.rounds)
+    print(f"{args.logins} lần đăng nhập song song, bcrypt cost {args.rounds}")
+    baseline = statistics.median(cheap_request() for _ in range(50))
+    print(f"request nhẹ khi rảnh: {baseline:.1f} ms")
+
+    for name, pool in [("trên thread request", HashPool(workers=0)),
+                       (f"pool {args.workers} process", HashPool(workers=args.workers, queue=args.queue))]:
+        pool.run(password_service._check, hashed.encode(), password.encode())  # khởi động pool
+        login_times, rejected, latencies = run(pool, hashed, password, args.logins)
+        latencies.sort()
+        print(f"{name:<22} đăng nhập xong {len(login_times):>2} (chậm nhất {max(login_times):5.2f} s), "
+              f"503 {len(rejected):>2} (sau {max(rejected, default=0) * 1000:4.1f} ms) | request nhẹ: "
+              f"median {statistics.median(latencies):5.1f} ms, p95 {latencies[int(len(latencies) * 0.95)]:5.1f} ms")
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
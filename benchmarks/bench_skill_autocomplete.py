@@ -0,0 +1,50 @@
+"""
+Benchmark: autocomplete skill (services/skill_service.SkillTrie).
+
+Đo riêng phần tra cứu trên trie (không DB) với danh mục skill lớn giả lập.
+
+Chạy:  python benchmarks/bench_skill_autocomplete.py [--skills 50000] [--rounds 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.skill_service import SkillTrie
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--skills", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    terms = {"".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 14))) for _ in range(args.skills)}
+
+    start = time.perf_counter()
+    trie = SkillTrie()
+    for skill_id, term in enumerate(sorted(terms), 1):
+        trie.insert(term, skill_id)
+    print(f"dựng trie: {len(terms)} term, {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    samples = []
+    for _ in range(args.rounds):
+        prefix = rng.choice(tuple(terms))[:rng.randint(1, 4)]
+        start = time.perf_counter()
+        trie.lookup(prefix)
+        samples.append((time.perf_counter() - start) * 1e6)
+
+    samples.sort()
+    print(f"lookup: median {statistics.median(samples):.1f} µs, "
+          f"p99 {samples[int(len(samples) * 0.99) - 1]:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: thời gian render /student/home.
+
+So sánh:
+  - in-process : 1 request /student/home, view gọi services trực tiếp.
+  - loopback   : 1 request /student/home + các hop /api mà view cũ từng gọi
+                 (students/user, jobs, applications, notifications).
+Request gửi qua app.test_client() (WSGI trong process, không cần server / thư viện
+HTTP), nên "loopback" ở đây chưa tính chi phí TCP: chênh lệch đo được là mức tối thiểu.
+
+Chạy:  python benchmarks/bench_student_home.py [--jobs 200] [--rounds 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("FLASK_SECRET_KEY", "bench-flask-secret")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-bench-jwt-secret")
+
+import database
+
+
+def setup_database(n_jobs):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_")
+    engine = database.create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}")
+    database.db_session.configure(bind=engine)
+
+    from models.base import Base
+    from models import Job, Notification
+    from services import user_service, company_service, student_service
+
+    Base.metadata.create_all(bind=engine)
+    db = database.db_session
+
+    user_service.create_user("bench.student@example.com", "Bench#123", "student")
+    user_service.create_user("bench.company@example.com", "Bench#123", "company")
+    student = student_service.get_student_by_user(1)
+    company = company_service.get_company_by_user(2)
+
+    db.add_all([
+        Job(companyId=company.id, title=f"Job {i}", description="Mô tả công việc " * 5,
+            location="HCM", status="open", maxApplicants=0)
+        for i in range(n_jobs)
+    ])
+    db.add_all([
+        Notification(userId=student.userId, content=f"Thông báo {i}") for i in range(20)
+    ])
+    db.commit()
+    db.remove()
+
+
+def measure(fn, rounds):
+    fn()  # warm-up
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_database(args.jobs)
+
+    import app as app_module
+    from services import user_service
+
+    flask_app = app_module.app
+    app_module.limiter.enabled = False
+    app_module.talisman.force_https = False
+
+    with flask_app.app_context():
+        token = user_service.authenticate("bench.student@example.com", "Bench#123", "bench")["access_token"]
+    database.db_session.remove()
+
+    client = flask_app.test_client()
+    client.set_cookie("ui_access_token", token)
+    api_headers = {"Authorization": f"Bearer {token}"}
+
+    def in_process():
+        assert client.get("/student/home").status_code == 200
+
+    def loopback():
+        # Các hop mà phiên bản view cũ gửi tới /api trong cùng process
+        client.get("/api/students/user/1", headers=api_headers)
+        client.get("/api/jobs/", headers=api_headers)
+        client.get("/api/students/1/applications", headers=api_headers)
+        client.get("/api/notifications/1", headers=api_headers)
+        in_process()
+
+    results = {
+        "loopback (cũ)": measure(loopback, args.rounds),
+        "in-process": measure(in_process, args.rounds),
+    }
+
+    print(f"/student/home — {args.jobs} jobs, {args.rounds} rounds")
+    for name, samples in results.items():
+        print(f"  {name:<15} median {statistics.median(samples):7.2f} ms   "
+              f"p95 {sorted(samples)[int(len(samples) * 0.95) - 1]:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
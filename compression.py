@@ -0,0 +1,75 @@
+"""
+Nén response (gzip, brotli nếu có cài gói `Brotli`) theo Accept-Encoding.
+
+Cấu hình (app.config):
+  COMPRESS_MIN_SIZE   bỏ qua body nhỏ hơn ngưỡng này (byte, mặc định 500)
+  COMPRESS_LEVEL      mức nén gzip (mặc định 6)
+  COMPRESS_MIMETYPES  các mimetype được nén
+"""
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli là tùy chọn -> chỉ dùng gzip
+    brotli = None
+
+
+DEFAULT_MIMETYPES = (
+    "text/html", "text/css", "text/plain",
+    "application/json", "application/javascript",
+)
+
+
+class Compression:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+        app.config.setdefault("COMPRESS_LEVEL", 6)
+        app.config.setdefault("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES)
+        app.after_request(self._compress)
+
+    def _choose_encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted["br"]:
+            return "br"
+        if accepted["gzip"]:
+            return "gzip"
+        return None
+
+    def _compress(self, response):
+        config = current_app.config
+        response.vary.add("Accept-Encoding")
+
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in config["COMPRESS_MIMETYPES"]
+        ):
+            return response
+
+        encoding = self._choose_encoding()
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        if encoding == "br":
+            data = brotli.compress(data)
+        else:
+            data = gzip.compress(data, compresslevel=config["COMPRESS_LEVEL"], mtime=0)
+
+        response.set_data(data)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # body đã khác bản gốc -> ETag chỉ còn giá trị "weak"
+            response.set_etag(etag, weak=True)
+        return response
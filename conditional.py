@@ -0,0 +1,46 @@
+"""
+Conditional GET: ETag "weak" tính từ version của dữ liệu (vd. max updatedAt của
+Job), không phải từ body. Client gửi lại If-None-Match trùng -> trả 304 ngay,
+không chạy view (không query danh sách, không render HTML / JSON).
+
+    @bp.route("/jobs/")
+    @conditional(recruitment_service.jobs_version)
+    def list_jobs(): ...
+
+version_fn() trả về giá trị bất kỳ có repr ổn định (tuple số / datetime...),
+hoặc None để bỏ qua cache cho request đó (vd. chưa đăng nhập).
+"""
+import hashlib
+from functools import wraps
+
+from flask import make_response, request
+
+
+def make_etag(version):
+    """ETag gắn với URL (kể cả query string: cursor, limit, msg...) + version dữ liệu."""
+    raw = f"{request.full_path}|{version!r}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def conditional(version_fn):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_fn()
+            if version is None:
+                return view(*args, **kwargs)
+
+            etag = make_etag(version)
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            # luôn hỏi lại server, nhưng được dùng bản cũ nếu nhận 304
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
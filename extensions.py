@@ -1,10 +1,20 @@
+import os
+
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
+from services.limiter_store import SharedStorage  # noqa: F401  (đăng ký storage "limiter://")
+from query_counter import QueryCounter
+from compression import Compression
 
 login_manager = LoginManager()
 csrf = CSRFProtect()
-limiter = Limiter(get_remote_address)
+# bộ đếm dùng chung giữa các worker (LIMITER_STORAGE_URI), sliding window O(1)
+limiter = Limiter(get_remote_address, storage_uri="limiter://", strategy="sliding-window-counter")
+# số lần gửi form / API đăng nhập mỗi IP (cú pháp của Flask-Limiter)
+LOGIN_RATE_LIMIT = os.getenv("LOGIN_RATE_LIMIT", "20 per minute")
 talisman = Talisman()
+query_counter = QueryCounter()
+compression = Compression()
@@ -0,0 +1,199 @@
+"""
+Kiểm tra index: chạy EXPLAIN QUERY PLAN (SQLite) cho danh mục các query thật
+của routers / services / view và báo lỗi nếu query nào phải quét toàn bảng.
+
+Chạy:  flask --app app audit-indexes
+"""
+from datetime import datetime
+
+from sqlalchemy import exists, func, text
+
+from database import db_session
+from models.base import Base
+from models import (
+    User, Student, Company, UserRole,
+    Job, Skill, StudentSkill, JobSkill, SkillTest,
+    Application, Interview, TestResult, TestAnswer, Report, Notification
+)
+from models.user_models import CompanyProfile
+from models.job_models import Question, MatchScore, MatchDirty, SkillAlias
+
+
+# (tên, hàm dựng query, các bảng được phép SCAN vì query vốn liệt kê cả bảng)
+QUERY_CATALOGUE = [
+    # --- user / auth ---
+    ("login: user theo email",
+     lambda: db_session.query(User).filter(User.email == "a@example.com"), ()),
+    ("admin: đếm user theo role",
+     lambda: db_session.query(func.count(User.id)).filter(User.role == UserRole.STUDENT), ()),
+    ("notifications của user, mới nhất trước",
+     lambda: db_session.query(Notification)
+        .filter(Notification.userId == 1)
+        .order_by(Notification.createdAt.desc()), ()),
+
+    # --- student ---
+    ("student theo user",
+     lambda: db_session.query(Student).filter(Student.userId == 1), ()),
+    ("skills của student",
+     lambda: db_session.query(StudentSkill).filter(StudentSkill.studentId == 1), ()),
+    ("skill theo tên",
+     lambda: db_session.query(Skill).filter(Skill.name == "Python"), ()),
+    ("skill theo tên chuẩn hóa",
+     lambda: db_session.query(Skill).filter(Skill.normalizedName.in_(["python", "sql"])), ()),
+    ("alias của skill",
+     lambda: db_session.query(SkillAlias).filter(SkillAlias.skillId == 1), ()),
+    ("applications của student, mới nhất trước",
+     lambda: db_session.query(Application)
+        .filter(Application.studentId == 1)
+        .order_by(Application.appliedAt.desc()), ()),
+    ("application theo (student, job)",
+     lambda: db_session.query(Application)
+        .filter(Application.studentId == 1, Application.jobId == 1), ()),
+    ("report theo (company, student)",
+     lambda: db_session.query(Report)
+        .filter(Report.companyId == 1, Report.studentId == 1), ()),
+
+    # --- jobs ---
+    ("job đang mở, mới nhất trước",
+     lambda: db_session.query(Job)
+        .filter(Job.status == "open")
+        .order_by(Job.createdAt.desc()), ()),
+    ("job chưa apply của student",
+     lambda: db_session.query(Job.id)
+        .filter(Job.status != "CLOSED")
+        .filter(~exists().where(Application.jobId == Job.id, Application.studentId == 1)),
+     ("jobs",)),
+    ("bài test đầu tiên của mỗi job",
+     lambda: db_session.query(SkillTest.jobId, func.min(SkillTest.id)).group_by(SkillTest.jobId), ()),
+    ("đếm lại appliedCount",
+     lambda: db_session.query(
+        Job.id,
+        db_session.query(func.count(Application.id))
+            .filter(Application.jobId == Job.id)
+            .scalar_subquery()
+     ), ("jobs",)),
+
+    ("điểm ghép năng lực của student, cao nhất trước",
+     lambda: db_session.query(MatchScore)
+        .filter(MatchScore.studentId == 1)
+        .order_by(MatchScore.score.desc()), ()),
+    ("điểm ghép năng lực theo job, cao nhất trước",
+     lambda: db_session.query(MatchScore)
+        .filter(MatchScore.jobId == 1)
+        .order_by(MatchScore.score.desc()), ()),
+    ("hàng đợi match_dirty theo thứ tự ghi",
+     lambda: db_session.query(MatchDirty).order_by(MatchDirty.id), ("match_dirty",)),
+
+    # --- company ---
+    ("company theo user",
+     lambda: db_session.query(Company).filter(Company.userId == 1), ()),
+    ("profile của company",
+     lambda: db_session.query(CompanyProfile).filter(CompanyProfile.companyId == 1), ()),
+    ("job của company, mới nhất trước",
+     lambda: db_session.query(Job)
+        .filter(Job.companyId == 1)
+        .order_by(Job.createdAt.desc()), ()),
+    ("applications theo job",
+     lambda: db_session.query(Application).filter(Application.jobId == 1), ()),
+    ("applications của company, mới nhất trước",
+     lambda: db_session.query(Application)
+        .join(Job, Application.jobId == Job.id)
+        .join(Student, Application.studentId == Student.id)
+        .filter(Job.companyId == 1)
+        .order_by(Application.appliedAt.desc()), ()),
+    ("interview mới nhất của application",
+     lambda: db_session.query(Interview)
+        .filter(Interview.applicationId == 1)
+        .order_by(Interview.id.desc()), ()),
+
+    # --- tests ---
+    ("bài test của job",
+     lambda: db_session.query(SkillTest).filter(SkillTest.jobId == 1), ()),
+    ("câu hỏi của bài test",
+     lambda: db_session.query(Question).filter(Question.testId == 1), ()),
+    ("kết quả test theo (student, test)",
+     lambda: db_session.query(TestResult)
+        .filter(TestResult.studentId == 1, TestResult.testId == 1), ()),
+    ("kết quả test theo test",
+     lambda: db_session.query(TestResult).filter(TestResult.testId == 1), ()),
+    ("chấm lại: kết quả test theo lô (keyset id)",
+     lambda: db_session.query(TestResult.id)
+        .filter(TestResult.testId == 1, TestResult.id > 0)
+        .order_by(TestResult.id), ()),
+    ("câu trả lời của các bài nộp (chấm lại theo lô)",
+     lambda: db_session.query(TestAnswer).filter(TestAnswer.resultId.in_([1, 2, 3])), ()),
+    ("chi tiết bài làm: câu hỏi + câu trả lời",
+     lambda: db_session.query(Question.id, TestAnswer.answer)
+        .outerjoin(TestAnswer, (TestAnswer.questionId == Question.id) & (TestAnswer.resultId == 1))
+        .filter(Question.testId == 1), ()),
+    ("thống kê câu hỏi: trả lời / đúng / lựa chọn",
+     lambda: db_session.query(TestAnswer.questionId, TestAnswer.correct, TestAnswer.choice, func.count())
+        .filter(TestAnswer.questionId.in_([1, 2, 3]))
+        .group_by(TestAnswer.questionId, TestAnswer.correct, TestAnswer.choice), ()),
+    ("thống kê câu hỏi: số câu đúng theo nhóm điểm",
+     lambda: db_session.query(TestAnswer.questionId, func.count())
+        .join(TestResult, TestResult.id == TestAnswer.resultId)
+        .filter(TestResult.testId == 1, TestAnswer.correct.is_(True))
+        .group_by(TestAnswer.questionId), ()),
+
+    ("tìm job: nạp job theo id + bài test đầu tiên",
+     lambda: db_session.query(
+        Job.id, Job.title,
+        db_session.query(func.min(SkillTest.id)).filter(SkillTest.jobId == Job.id).scalar_subquery()
+     ).filter(Job.id.in_([1, 2, 3])), ()),
+
+    ("facet: job đổi từ lần đồng bộ trước",
+     lambda: db_session.query(
+        Job.id, Job.status, Job.location, CompanyProfile.industry, CompanyProfile.size,
+        exists().where(SkillTest.jobId == Job.id)
+     ).outerjoin(CompanyProfile, CompanyProfile.companyId == Job.companyId)
+      .filter(Job.updatedAt >= datetime(2024, 1, 1)), ()),
+
+    ("facet: skill của job đổi từ lần đồng bộ trước",
+     lambda: db_session.query(JobSkill.jobId, JobSkill.skillId)
+        .join(Job, Job.id == JobSkill.jobId).filter(Job.updatedAt >= datetime(2024, 1, 1)), ()),
+
+    ("facet: job của các công ty vừa sửa hồ sơ",
+     lambda: db_session.query(Job.id, Job.status).filter(Job.companyId.in_([1, 2])), ()),
+
+    # --- admin ---
+    ("reports của company, mới nhất trước",
+     lambda: db_session.query(Report)
+        .filter(Report.companyId == 1)
+        .order_by(Report.createdAt.desc()), ()),
+]
+
+
+def explain(query):
+    """Các dòng 'detail' của EXPLAIN QUERY PLAN cho 1 query ORM."""
+    bind = db_session.get_bind()
+    compiled = query.statement.compile(
+        dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    rows = db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan):
+    """Các bảng thật bị SCAN không qua index (bỏ qua subquery / CTE)."""
+    scanned = []
+    for detail in plan:
+        parts = detail.split()
+        if parts[:1] != ["SCAN"] or "USING" in parts:
+            continue
+        # SQLite < 3.36 in "SCAN TABLE <tên>"
+        table = parts[2] if parts[1:2] == ["TABLE"] and len(parts) > 2 else parts[1]
+        if table in Base.metadata.tables:
+            scanned.append(table)
+    return scanned
+
+
+def run_audit():
+    """Trả về list (tên query, plan, các bảng bị quét ngoài danh sách cho phép)."""
+    results = []
+    for name, build, allowed in QUERY_CATALOGUE:
+        plan = explain(build())
+        bad = [t for t in full_scans(plan) if t not in allowed]
+        results.append((name, plan, bad))
+    db_session.remove()
+    return results
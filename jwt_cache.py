@@ -0,0 +1,99 @@
+"""
+Cache JWT đã kiểm tra chữ ký: mỗi request kiểm tra 1 token tối đa 1 lần.
+
+1 trang HTML đọc token trong cookie nhiều lần (view, wrap_layout, show_notifications),
+mỗi lần là 1 lượt decode HS256 (base64 + HMAC + JSON). Ở đây:
+  - trong 1 request: kết quả (kể cả token sai) nhớ trong flask.g;
+  - giữa các request: LRU token -> claims (TTLCache, tối đa JWT_CACHE_SIZE token),
+    mỗi token chỉ sống đến `exp` của nó và không quá JWT_CACHE_TTL giây.
+Token sai / hết hạn không vào LRU (không để token rác đẩy token thật ra khỏi cache).
+
+flask_jwt_extended (route /api) dùng cùng cache qua CachedJWTManager.
+
+Cấu hình (env): JWT_CACHE_SIZE (mặc định 4096; 0 = tắt), JWT_CACHE_TTL (giây, 300).
+"""
+import inspect
+import os
+import time
+
+from flask import g, has_request_context
+from flask_jwt_extended import JWTManager
+
+from services.cache import TTLCache
+
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "4096"))
+JWT_CACHE_TTL = float(os.getenv("JWT_CACHE_TTL", "300"))
+
+
+class VerifiedTokenCache:
+    _INVALID = object()
+
+    def __init__(self, maxsize=JWT_CACHE_SIZE, ttl=JWT_CACHE_TTL):
+        self._cache = TTLCache(maxsize, ttl) if maxsize > 0 else None
+
+    def claims(self, key, decode):
+        """
+        Claims của token `key` (chuỗi / tuple có token), gọi decode() nếu chưa kiểm tra.
+        Lỗi của decode được ném lại y nguyên (cả khi lấy từ memo trong request).
+        """
+        memo = g.setdefault("_verified_jwt", {}) if has_request_context() else {}
+        result = memo.get(key, self._INVALID)
+        if result is self._INVALID:
+            result = self._cache.get(key, self._INVALID) if self._cache is not None else self._INVALID
+        if result is self._INVALID:
+            try:
+                result = decode()
+            except Exception as e:
+                result = e
+            else:
+                self._remember(key, result)
+            memo[key] = result
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _remember(self, key, claims):
+        exp = claims.get("exp") if isinstance(claims, dict) else None
+        if self._cache is None or exp is None:
+            return
+        ttl = min(self.ttl, exp - time.time())
+        if ttl > 0:
+            self._cache.set(key, claims, ttl=ttl)
+
+    @property
+    def ttl(self):
+        return self._cache.ttl
+
+    def clear(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache) if self._cache is not None else 0
+
+
+token_cache = VerifiedTokenCache()
+
+
+# chữ ký hàm riêng (không công khai) của flask_jwt_extended mà CachedJWTManager ghi đè;
+# bản cài đặt khác chữ ký -> lỗi khi khởi động thay vì bỏ qua cache / kiểm tra chữ ký
+_DECODE_PARAMS = ["self", "encoded_token", "csrf_value", "allow_expired"]
+
+
+class CachedJWTManager(JWTManager):
+    """JWTManager dùng token_cache khi kiểm tra access token trong header."""
+
+    def __init__(self, app=None, **kwargs):
+        params = list(inspect.signature(JWTManager._decode_jwt_from_config).parameters)
+        if params != _DECODE_PARAMS:
+            raise RuntimeError(
+                f"flask_jwt_extended: JWTManager._decode_jwt_from_config{tuple(params)} đã đổi, "
+                "cần cập nhật jwt_cache.CachedJWTManager"
+            )
+        super().__init__(app, **kwargs)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        decode = super()._decode_jwt_from_config
+        if csrf_value is not None or allow_expired:
+            return decode(encoded_token, csrf_value, allow_expired)
+        return token_cache.claims(("api", encoded_token), lambda: decode(encoded_token))
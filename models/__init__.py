@@ -1,5 +1,5 @@
 # models/__init__.py
 from .base import Base
 from .user_models import User, Student, Company, StudentProfile, UserRole
-from .job_models import Job, Skill, StudentSkill, JobSkill, SkillTest
-from .app_models import Application, Interview, InterviewFeedback, Evaluation, Offer, TestResult, Report, ApplicationStatus, Notification
\ No newline at end of file
+from .job_models import Job, Skill, SkillAlias, StudentSkill, JobSkill, SkillTest, MatchScore, MatchDirty
+from .app_models import Application, Interview, InterviewFeedback, Evaluation, Offer, TestResult, TestAnswer, Report, ApplicationStatus, Notification
\ No newline at end of file
@@ -1,6 +1,6 @@
 # models/app_models.py
 import enum
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, Index, Float
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
@@ -8,6 +8,9 @@ from .base import Base
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_userId_createdAt", "userId", "createdAt"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     userId = Column(Integer, ForeignKey("users.id")) 
@@ -28,6 +31,12 @@ class ApplicationStatus(enum.Enum):
 
 class Application(Base):
     __tablename__ = 'applications'
+    # Mỗi student chỉ có 1 application cho mỗi job (chặn apply trùng khi chạy song song)
+    __table_args__ = (
+        Index("uq_applications_student_job", "studentId", "jobId", unique=True),
+        Index("ix_applications_studentId_appliedAt", "studentId", "appliedAt"),
+        Index("ix_applications_jobId_appliedAt", "jobId", "appliedAt"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     studentId = Column(Integer, ForeignKey('students.id'))
     jobId = Column(Integer, ForeignKey('jobs.id'))
@@ -48,7 +57,7 @@ class Application(Base):
 class Interview(Base):
     __tablename__ = 'interviews'
     id = Column(Integer, primary_key=True, index=True)
-    applicationId = Column(Integer, ForeignKey('applications.id'))
+    applicationId = Column(Integer, ForeignKey('applications.id'), index=True)
     interviewDate = Column(DateTime)
     interviewType = Column(String) # Online/Offline/Technical...
     status = Column(String) # Scheduled, Completed, Cancelled
@@ -63,7 +72,7 @@ class Interview(Base):
 class InterviewFeedback(Base):
     __tablename__ = 'interview_feedbacks'
     id = Column(Integer, primary_key=True, index=True)
-    interviewId = Column(Integer, ForeignKey('interviews.id'))
+    interviewId = Column(Integer, ForeignKey('interviews.id'), index=True)
     
     feedback = Column(Text) 
     rating = Column(Integer)
@@ -73,7 +82,7 @@ class InterviewFeedback(Base):
 class Evaluation(Base):
     __tablename__ = 'evaluations'
     id = Column(Integer, primary_key=True, index=True)
-    applicationId = Column(Integer, ForeignKey('applications.id'))
+    applicationId = Column(Integer, ForeignKey('applications.id'), index=True)
     skillScore = Column(Integer)
     
     peerReview = Column(Text) 
@@ -84,7 +93,7 @@ class Evaluation(Base):
 class Offer(Base):
     __tablename__ = 'offers'
     id = Column(Integer, primary_key=True, index=True)
-    applicationId = Column(Integer, ForeignKey('applications.id'))
+    applicationId = Column(Integer, ForeignKey('applications.id'), index=True)
     
     offerDetail = Column(Text) 
     status = Column(String) # Pending, Accepted, Declined
@@ -93,26 +102,52 @@ class Offer(Base):
 
 class TestResult(Base):
     __tablename__ = 'test_results'
+    __table_args__ = (
+        Index("ix_test_results_studentId_testId", "studentId", "testId"),
+        Index("ix_test_results_testId", "testId"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     # Lưu ý: bảng skill_tests được định nghĩa bên job_models.py
     testId = Column(Integer, ForeignKey('skill_tests.id')) 
     studentId = Column(Integer, ForeignKey('students.id'))
     score = Column(Integer, default=0)
-    answers = Column(Text, nullable=True)  # Lưu trữ câu trả lời dưới dạng JSON chuỗi
+    # Dữ liệu cũ: câu trả lời dạng JSON chuỗi {"answer_<questionId>": ...}. Bài nộp mới lưu
+    # vào test_answers; chuyển dữ liệu cũ bằng `flask migrate-test-answers`.
+    answers = Column(Text, nullable=True)
     submittedAt = Column(DateTime, default=datetime.utcnow)
 
     # Quan hệ: String referenece giúp tránh circular import
     test = relationship("SkillTest", back_populates="test_results")
     student = relationship("Student", back_populates="test_results")
+    test_answers = relationship("TestAnswer", back_populates="result", cascade="all, delete-orphan")
+
+# Từng câu trả lời của 1 bài nộp (services/grading_service.record_submission)
+class TestAnswer(Base):
+    __tablename__ = 'test_answers'
+    __table_args__ = (
+        # thống kê theo câu hỏi (tỉ lệ đúng, phân bố lựa chọn): chỉ cần quét index
+        Index("ix_test_answers_questionId_correct_choice", "questionId", "correct", "choice"),
+    )
+    resultId = Column(Integer, ForeignKey('test_results.id'), primary_key=True)
+    questionId = Column(Integer, ForeignKey('questions.id'), primary_key=True)
+    answer = Column(Text)
+    correct = Column(Boolean, nullable=True)   # None = câu tự luận, không chấm tự động
+    points = Column(Float, nullable=True)      # điểm của câu theo thang SkillTest.totalScore
+    choice = Column(String, nullable=True)     # nhãn đã chọn ("A" / "A,C") của câu trắc nghiệm
+    result = relationship("TestResult", back_populates="test_answers")
 
 class Report(Base):
     __tablename__ = 'reports'
+    __table_args__ = (
+        Index("ix_reports_companyId_createdAt", "companyId", "createdAt"),
+        Index("ix_reports_studentId_companyId", "studentId", "companyId"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     companyId = Column(Integer, ForeignKey('companies.id'))
     studentId = Column(Integer, ForeignKey('students.id'))
     reportType = Column(String)
     content = Column(Text)
-    createdAt = Column(DateTime, default=datetime.utcnow)
+    createdAt = Column(DateTime, default=datetime.utcnow, index=True)
 
     company = relationship("Company", back_populates="reports")
     student = relationship("Student")
\ No newline at end of file
@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Index, Float, event, exc, inspect, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import Base
 
 class Job(Base):
     __tablename__ = 'jobs'
+    __table_args__ = (
+        # job đang mở mới nhất / job của công ty mới nhất
+        Index("ix_jobs_status_createdAt", "status", "createdAt"),
+        Index("ix_jobs_companyId_createdAt", "companyId", "createdAt"),
+        # job thay đổi gần đây (đồng bộ index facet: services/facet_service.py)
+        Index("ix_jobs_updatedAt", "updatedAt"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     companyId = Column(Integer, ForeignKey('companies.id'))
     title = Column(String)   
@@ -19,20 +26,33 @@ class Job(Base):
     skill_tests = relationship("SkillTest", back_populates="job")
     applications = relationship("Application", back_populates="job")
     maxApplicants = Column(Integer)  # ⭐ SỐ LƯỢNG TUYỂN TỐI ĐA
+    # Số application hiện có — cập nhật cùng transaction khi thêm/xóa Application
+    # (xem services/recruitment_service.add_application); dựng lại bằng `flask reconcile-applied-count`
+    appliedCount = Column(Integer, nullable=False, default=0, server_default="0")
 
 class Skill(Base):
     __tablename__ = 'skills'
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True)
+    # Tên đã chuẩn hóa (services/skill_service.normalize_skill_name): "Python" / "python" là 1 skill
+    normalizedName = Column(String, unique=True, index=True)
     category = Column(String)
     student_skills = relationship("StudentSkill", back_populates="skill")
     job_skills = relationship("JobSkill", back_populates="skill")
+    aliases = relationship("SkillAlias", back_populates="skill")
+
+# Tên gọi khác của skill ("py", "python3" -> Python), alias lưu dạng đã chuẩn hóa
+class SkillAlias(Base):
+    __tablename__ = 'skill_aliases'
+    alias = Column(String, primary_key=True)
+    skillId = Column(Integer, ForeignKey('skills.id'), nullable=False, index=True)
+    skill = relationship("Skill", back_populates="aliases")
 
 # Bảng trung gian Student - Skill
 class StudentSkill(Base):
     __tablename__ = 'student_skills'
     studentId = Column(Integer, ForeignKey('students.id'), primary_key=True)
-    skillId = Column(Integer, ForeignKey('skills.id'), primary_key=True)
+    skillId = Column(Integer, ForeignKey('skills.id'), primary_key=True, index=True)
     level = Column(Integer) # Ví dụ: 1-5 hoặc 1-10
     student = relationship("Student", back_populates="skills")
     skill = relationship("Skill", back_populates="student_skills")
@@ -41,15 +61,39 @@ class StudentSkill(Base):
 class JobSkill(Base):
     __tablename__ = 'job_skills'
     jobId = Column(Integer, ForeignKey('jobs.id'), primary_key=True)
-    skillId = Column(Integer, ForeignKey('skills.id'), primary_key=True)
+    skillId = Column(Integer, ForeignKey('skills.id'), primary_key=True, index=True)
     requiredLevel = Column(Integer)
     job = relationship("Job", back_populates="job_skills")
     skill = relationship("Skill", back_populates="job_skills")
 
+# Điểm phù hợp student - job đã tính sẵn (chỉ lưu cặp có ít nhất 1 skill chung).
+# Cập nhật từng phần bởi services/match_worker.py theo hàng đợi match_dirty.
+class MatchScore(Base):
+    __tablename__ = 'match_scores'
+    __table_args__ = (
+        # job phù hợp nhất của student / student phù hợp nhất của job
+        Index("ix_match_scores_studentId_score", "studentId", "score"),
+        Index("ix_match_scores_jobId_score", "jobId", "score"),
+    )
+    studentId = Column(Integer, ForeignKey('students.id'), primary_key=True)
+    jobId = Column(Integer, ForeignKey('jobs.id'), primary_key=True)
+    score = Column(Float, nullable=False)     # 0..1
+    coverage = Column(Float, nullable=False)  # tỉ lệ skill yêu cầu student có
+    levelGap = Column(Float, nullable=False)  # Σ max(requiredLevel - level, 0)
+    updatedAt = Column(DateTime, default=datetime.utcnow)
+
+# Hàng đợi thay đổi: student / job cần tính lại điểm phù hợp
+class MatchDirty(Base):
+    __tablename__ = 'match_dirty'
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)       # "student" | "job"
+    entityId = Column(Integer, nullable=False)
+    createdAt = Column(DateTime, default=datetime.utcnow)
+
 class SkillTest(Base):
     __tablename__ = 'skill_tests'
     id = Column(Integer, primary_key=True, index=True)
-    jobId = Column(Integer, ForeignKey('jobs.id'))
+    jobId = Column(Integer, ForeignKey('jobs.id'), index=True)
     testName = Column(String)
     duration = Column(Integer) # Minutes
     totalScore = Column(Integer)
@@ -63,8 +107,86 @@ class SkillTest(Base):
 class Question(Base):
     __tablename__ = 'questions'
     id = Column(Integer, primary_key=True, index=True)
-    testId = Column(Integer, ForeignKey('skill_tests.id'))  
+    testId = Column(Integer, ForeignKey('skill_tests.id'), index=True)
     content = Column(Text) # Nội dung câu hỏi
     options = Column(Text) # Lưu các lựa chọn (Ví dụ dạng JSON string hoặc text phân cách)
     correctAnswer = Column(String) # Đáp án đúng (Ví dụ: "A", "B" hoặc nội dung)
-    test = relationship("SkillTest", back_populates="questions")
\ No newline at end of file
+    # exact / normalized / choice (services/grading_service); None = tự chọn theo options
+    gradingMode = Column(String, nullable=True)
+    test = relationship("SkillTest", back_populates="questions")
+
+
+# FULL-TEXT SEARCH (services/job_search_service.py) trên title, description, location.
+# SQLite: bảng FTS5 contentless `jobs_fts` (chỉ lưu index, không chép dữ liệu) giữ đồng
+# bộ bằng trigger — mọi INSERT / UPDATE / DELETE trên jobs, kể cả câu UPDATE hàng loạt
+# không qua ORM. Bỏ dấu tiếng Việt khi index ("ha noi" khớp "Hà Nội"; riêng "đ" không
+# phải dấu nên được đổi sang "d" trước khi index), index sẵn prefix 2-3 ký tự; xếp hạng
+# BM25, title nặng nhất.
+# PostgreSQL: cột tsvector GENERATED (title A, location B, description C) + index GIN.
+def _fold(column):
+    return f"replace(replace(coalesce({column}, ''), 'đ', 'd'), 'Đ', 'D')"
+
+
+_FTS_COLUMNS = "title, description, location"
+_FTS_NEW = ", ".join(_fold(f"new.{c}") for c in ("title", "description", "location"))
+_FTS_OLD = ", ".join(_fold(f"old.{c}") for c in ("title", "description", "location"))
+JOB_FTS_SQLITE = [
+    f"""CREATE VIRTUAL TABLE jobs_fts USING fts5(
+        {_FTS_COLUMNS}, content='',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    "INSERT INTO jobs_fts(jobs_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 3.0)')",
+    f"""CREATE TRIGGER jobs_fts_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END""",
+    f"""CREATE TRIGGER jobs_fts_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, {_FTS_OLD});
+    END""",
+    f"""CREATE TRIGGER jobs_fts_au AFTER UPDATE OF {_FTS_COLUMNS} ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, {_FTS_OLD});
+        INSERT INTO jobs_fts(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END""",
+    f"""INSERT INTO jobs_fts(rowid, {_FTS_COLUMNS})
+        SELECT id, {", ".join(_fold(c) for c in ("title", "description", "location"))} FROM jobs""",
+]
+JOB_FTS_POSTGRES = [
+    """ALTER TABLE jobs ADD COLUMN "searchVector" tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED""",
+    'CREATE INDEX ix_jobs_searchVector ON jobs USING GIN ("searchVector")',
+]
+
+
+def has_job_search_index(connection):
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        return connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'"
+        )).first() is not None
+    if dialect == "postgresql":
+        return any(c["name"] == "searchVector" for c in inspect(connection).get_columns("jobs"))
+    return False
+
+
+def create_job_search_index(connection):
+    """
+    Tạo index full-text cho jobs nếu chưa có (kèm index dữ liệu đang có).
+    Trả về True nếu vừa tạo; DB khác SQLite / PostgreSQL -> không tạo (tìm bằng LIKE).
+    """
+    statements = {"sqlite": JOB_FTS_SQLITE, "postgresql": JOB_FTS_POSTGRES}.get(connection.dialect.name)
+    if not statements or has_job_search_index(connection):
+        return False
+    try:
+        for statement in statements:
+            connection.execute(text(statement))
+    except exc.OperationalError as e:
+        # vd. SQLite build không có FTS5
+        print(f"⚠️ Không tạo được index tìm kiếm job: {e}")
+        return False
+    return True
+
+
+@event.listens_for(Job.__table__, "after_create")
+def _create_job_search_index(target, connection, **kw):
+    create_job_search_index(connection)
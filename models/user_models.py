@@ -23,9 +23,10 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
-    role = Column(Enum(UserRole), default=UserRole.STUDENT)
+    role = Column(Enum(UserRole), default=UserRole.STUDENT, index=True)
     status = Column(String, default="active")
     createdAt = Column(DateTime, default=datetime.utcnow)
+    updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     student = relationship("Student", back_populates="user", uselist=False)
     company = relationship("Company", back_populates="user", uselist=False)
@@ -0,0 +1,124 @@
+"""
+Đếm SQL theo từng request + phát hiện N+1.
+
+Gắn vào event before/after_cursor_execute của SQLAlchemy, gom theo request:
+số câu lệnh, tổng thời gian DB và số lần lặp của từng "fingerprint" (câu SQL đã
+bỏ tham số). Cấu hình (app.config):
+
+  SQL_COUNTER_HEADERS    thêm header X-SQL-* vào response (mặc định = app.debug)
+  SQL_COUNTER_THRESHOLD  log cảnh báo khi số câu SQL của 1 request vượt ngưỡng (30)
+  SQL_REPEAT_THRESHOLD   coi là N+1 khi 1 fingerprint lặp từ ngần này lần (10)
+  SQL_COUNTER_RAISE      raise QueryBudgetExceeded thay vì chỉ log (dùng trong test)
+"""
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\((\s*\?\s*,)+\s*\?\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Request vượt ngưỡng số câu SQL hoặc có câu SQL lặp kiểu N+1."""
+
+
+def fingerprint(statement):
+    """Chuẩn hóa câu SQL để gom các câu chỉ khác tham số."""
+    sql = _STRING.sub("?", statement)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACES.sub(" ", sql).strip()
+    return _IN_LIST.sub("(?)", sql)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def repeated(self, threshold):
+        """Các fingerprint lặp >= threshold lần, nhiều nhất trước."""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+
+def current_stats():
+    """QueryStats của request hiện tại (None nếu ngoài request)."""
+    if not has_request_context():
+        return None
+    return g.get("_query_stats")
+
+
+class QueryCounter:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SQL_COUNTER_HEADERS", None)
+        app.config.setdefault("SQL_COUNTER_THRESHOLD", 30)
+        app.config.setdefault("SQL_REPEAT_THRESHOLD", 10)
+        app.config.setdefault("SQL_COUNTER_RAISE", False)
+
+        # Nghe trên mọi Engine: engine của database.py và engine mà
+        # db_session được bind lại (test / benchmark) đều được đếm.
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+        app.before_request(_start_request)
+        app.after_request(self._finish_request)
+
+    def _finish_request(self, response):
+        stats = current_stats()
+        if stats is None:
+            return response
+
+        config = current_app.config
+        repeated = stats.repeated(config["SQL_REPEAT_THRESHOLD"])
+        too_many = stats.count > config["SQL_COUNTER_THRESHOLD"]
+
+        show_headers = config["SQL_COUNTER_HEADERS"]
+        if show_headers is None:
+            show_headers = current_app.debug
+        if show_headers:
+            response.headers["X-SQL-Count"] = str(stats.count)
+            response.headers["X-SQL-Time-ms"] = f"{stats.duration * 1000:.1f}"
+            response.headers["X-SQL-Max-Repeat"] = str(max(stats.fingerprints.values(), default=0))
+
+        if too_many or repeated:
+            message = (
+                f"{request.method} {request.path}: {stats.count} câu SQL, "
+                f"{stats.duration * 1000:.1f} ms"
+            )
+            for fp, n in repeated[:3]:
+                message += f"\n  x{n}: {fp[:200]}"
+            if config["SQL_COUNTER_RAISE"]:
+                raise QueryBudgetExceeded(message)
+            current_app.logger.warning("⚠️ SQL nhiều bất thường — %s", message)
+
+        return response
+
+
+def _start_request():
+    g._query_stats = QueryStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_stats() is not None:
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats()
+    starts = conn.info.get("_query_start")
+    if stats is None or not starts:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - starts.pop()
+    stats.fingerprints[fingerprint(statement)] += 1
@@ -2,13 +2,20 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 
 from database import db_session
-from models.user_models import User, UserRole
-from models.job_models import Job
+from models.user_models import UserRole
 from models.app_models import Application, Report
+from services import ServiceError, admin_service
+from routers.pagination import page_args, paginated_response
+from conditional import conditional
 
 admin_bp = Blueprint("admin_router", __name__)
 
 
+@admin_bp.errorhandler(ServiceError)
+def handle_service_error(e):
+    return jsonify({"detail": e.detail}), e.status_code
+
+
 # CHECK ROLE ADMIN (JWT)
 def require_admin():
     claims = get_jwt()
@@ -17,6 +24,13 @@ def require_admin():
     return None
 
 
+def users_version():
+    # chỉ admin mới được nhận ETag / 304
+    if require_admin() is not None:
+        return None
+    return admin_service.users_version()
+
+
 # ADMIN DASHBOARD
 @admin_bp.route("/admin/home", methods=["GET"])
 @jwt_required()  # yêu cầu JWT hợp lệ
@@ -25,45 +39,19 @@ def admin_home():
     if auth:
         return auth
 
-    students = db_session.query(User).filter(
-        User.role == UserRole.STUDENT
-    ).count()
-
-    companies = db_session.query(User).filter(
-        User.role == UserRole.COMPANY
-    ).count()
-
-    return jsonify({
-        "users": {
-            "total": students + companies,  # không tính admin
-            "students": students,
-            "companies": companies
-        },
-        "jobs": {
-            "total": db_session.query(Job).count(),
-            "open": db_session.query(Job).filter(Job.status != "CLOSED").count(),
-            "closed": db_session.query(Job).filter(Job.status == "CLOSED").count()
-        },
-        "applications": db_session.query(Application).count()
-    })
+    return jsonify(admin_service.get_dashboard_stats())
 
 
 # GET ALL USERS
 @admin_bp.route("/admin/users", methods=["GET"])
 @jwt_required()
+@conditional(users_version)
 def admin_get_users():
     auth = require_admin()
     if auth:
         return auth
 
-    users = db_session.query(User).all()
-    return jsonify([{
-        "id": u.id,
-        "email": u.email,
-        "role": u.role.value,
-        "status": u.status,
-        "createdAt": u.createdAt.isoformat() if u.createdAt else None
-    } for u in users])
+    return paginated_response(admin_service.list_users(*page_args()))
 
 
 # LOCK USER
@@ -74,17 +62,7 @@ def lock_user(user_id):
     if auth:
         return auth
 
-    user = db_session.query(User).get(user_id)
-    if not user:
-        return jsonify({"detail": "User not found"}), 404
-
-    # không cho admin tự khóa chính mình
-    if user.id == get_jwt_identity():
-        return jsonify({"detail": "Cannot lock yourself"}), 400
-
-    user.status = "locked"
-    db_session.commit()
-    return jsonify({"message": "User locked"})
+    return jsonify(admin_service.set_user_status(user_id, "locked", get_jwt_identity()))
 
 
 # UNLOCK USER
@@ -95,13 +73,7 @@ def unlock_user(user_id):
     if auth:
         return auth
 
-    user = db_session.query(User).get(user_id)
-    if not user:
-        return jsonify({"detail": "User not found"}), 404
-
-    user.status = "active"
-    db_session.commit()
-    return jsonify({"message": "User unlocked"})
+    return jsonify(admin_service.set_user_status(user_id, "active"))
 
 
 # GET ALL JOBS
@@ -112,14 +84,7 @@ def admin_get_jobs():
     if auth:
         return auth
 
-    jobs = db_session.query(Job).all()
-    return jsonify([{
-        "id": j.id,
-        "title": j.title,
-        "companyId": j.companyId,
-        "status": j.status,
-        "maxApplicants": j.maxApplicants
-    } for j in jobs])
+    return paginated_response(admin_service.list_jobs(*page_args()))
 
 
 # CLOSE JOB
@@ -130,13 +95,7 @@ def admin_close_job(job_id):
     if auth:
         return auth
 
-    job = db_session.query(Job).get(job_id)
-    if not job:
-        return jsonify({"detail": "Job not found"}), 404
-
-    job.status = "CLOSED"
-    db_session.commit()
-    return jsonify({"message": "Job closed"})
+    return jsonify(admin_service.close_job(job_id))
 
 
 # VIEW JOB APPLICATIONS
@@ -166,20 +125,7 @@ def admin_get_reports():
     if auth:
         return auth
 
-    reports = db_session.query(Report) \
-        .order_by(Report.createdAt.desc()) \
-        .all()
-
-    return jsonify([
-        {
-            "id": r.id,
-            "companyId": r.companyId,
-            "companyName": r.company.companyName if r.company else None,
-            "reportType": r.reportType,
-            "content": r.content,
-            "createdAt": r.createdAt.isoformat() if r.createdAt else None
-        } for r in reports
-    ])
+    return paginated_response(admin_service.list_reports(*page_args()))
     
     
 @admin_bp.route("/admin/companies/<int:company_id>/reports", methods=["GET"])
@@ -201,4 +147,25 @@ def admin_get_reports_by_company(company_id):
             "content": r.content,
             "createdAt": r.createdAt.isoformat()
         } for r in reports
-    ])
\ No newline at end of file
+    ])
+
+
+# TESTS
+@admin_bp.route("/admin/tests", methods=["GET"])
+@jwt_required()
+def admin_get_tests():
+    auth = require_admin()
+    if auth:
+        return auth
+
+    return jsonify(admin_service.list_tests())
+
+
+@admin_bp.route("/admin/tests/<int:test_id>", methods=["DELETE"])
+@jwt_required()
+def admin_delete_test(test_id):
+    auth = require_admin()
+    if auth:
+        return auth
+
+    return jsonify(admin_service.delete_test(test_id))
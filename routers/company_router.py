@@ -1,39 +1,26 @@
-import json
 from datetime import datetime
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 
-from sqlalchemy import func
-
 # Database & Models
 from database import db_session
-from models.job_models import Job, SkillTest, Question, JobSkill, Skill
+from models.job_models import Job, SkillTest, Question
 from models.user_models import Company, Student, CompanyProfile, UserRole
 from models.app_models import Application, ApplicationStatus, Evaluation, TestResult, Interview, Notification, InterviewFeedback
+from services import ServiceError, company_service, facet_service, grading_service, job_search_service, recruitment_service
+from services.company_service import safe_int, serialize_status
+from routers.pagination import page_args, paginated_response
+from conditional import conditional
 
 company_bp = Blueprint("company_router", __name__)
 
 
-# HELPER FUNCTIONS
+@company_bp.errorhandler(ServiceError)
+def handle_service_error(e):
+    return jsonify({"detail": e.detail}), e.status_code
 
-def safe_int(value, default=0):
-    """Chuyển đổi an toàn sang int."""
-    try:
-        if value is None or str(value).strip() == "":
-            return default
-        return int(value)
-    except (ValueError, TypeError):
-        return default
-
-def serialize_status(status_obj):
-    """Lấy value từ Enum nếu có, hoặc trả về chính nó."""
-    return status_obj.value if hasattr(status_obj, 'value') else status_obj
-
-def get_student_cv_url(student):
-    """Lấy CV URL an toàn từ student object."""
-    if hasattr(student, 'profile') and student.profile:
-        return student.profile.cvUrl
-    return None
+
+# HELPER FUNCTIONS
 
 def require_company():
     claims = get_jwt()
@@ -176,16 +163,13 @@ def get_jobs_by_company(company_id):
     response = []
     
     for job in jobs:
-        # Tối ưu: Nếu hệ thống lớn, nên dùng group_by count query ở ngoài vòng lặp
-        applied_count = db_session.query(func.count(Application.id)).filter(Application.jobId == job.id).scalar()
-        
         response.append({
             "id": job.id,
             "title": job.title,
             "description": job.description,
             "location": job.location,
             "status": job.status,
-            "appliedCount": applied_count,
+            "appliedCount": job.appliedCount,
             "maxApplicants": job.maxApplicants
         })
     return jsonify(response)
@@ -196,47 +180,35 @@ def get_jobs_by_company(company_id):
 def get_job_detail(job_id):
     auth = require_company()
     if auth: return auth
-    
-    job = db_session.query(Job).filter(Job.id == job_id).first()
-    company = get_current_company()
 
-    if not job:
-        return jsonify({"detail": "Job not found"}), 404
-
-    if job.companyId != company.id:
-        return jsonify({"detail": "Forbidden"}), 403
-
-    return jsonify({
-        "id": job.id,
-        "companyId": job.companyId,
-        "title": job.title,
-        "description": job.description,
-        "location": job.location,
-        "status": job.status,
-        "maxApplicants": job.maxApplicants
-    })
+    return jsonify(company_service.get_job_detail(get_current_company(), job_id))
 
 @company_bp.route("/jobs/", methods=["GET"])
+@conditional(recruitment_service.jobs_version)
 def get_all_open_jobs():
     """API cho Student: Lấy job đang mở."""
-    jobs = db_session.query(Job).filter(Job.status == "open").order_by(Job.createdAt.desc()).all()
-    response = []
-    for job in jobs:
-        # Check test existence safely
-        test = job.skill_tests[0] if job.skill_tests else None
-        
-        response.append({
-            "id": job.id,
-            "title": job.title,
-            "description": job.description,
-            "location": job.location,
-            "status": job.status,
-            "companyId": job.companyId,
-            "maxApplicants": job.maxApplicants,
-            "hasTest": bool(test),
-            "testId": test.id if test else None
-        })
-    return jsonify(response)
+    return paginated_response(recruitment_service.list_open_jobs(*page_args()))
+
+@company_bp.route("/jobs/search", methods=["GET"])
+def search_jobs():
+    """API tìm job full-text: ?q=&location=&status= (mặc định open, "all" = mọi trạng thái)&limit=."""
+    status = request.args.get("status", "open")
+    return jsonify(job_search_service.search_jobs(
+        request.args.get("q", ""),
+        status=None if status == "all" else status,
+        location=request.args.get("location"),
+        limit=request.args.get("limit")
+    ))
+
+@company_bp.route("/jobs/facets", methods=["GET"])
+def job_facets():
+    """
+    API lọc job theo facet: ?location=&industry=&size=&skill=<id>&hasTest=true (lặp tham số
+    để chọn nhiều giá trị)&cursor=&limit= -> {"total", "facets", "items", "nextCursor"}.
+    """
+    return jsonify(facet_service.get_job_facets(
+        facet_service.parse_facet_filters(request.args), *page_args()
+    ))
 
 @company_bp.route("/jobs/", methods=["POST"])
 @jwt_required()
@@ -271,6 +243,10 @@ def create_job():
         db_session.add(new_job)
         db_session.flush()  # Có ID ngay để dùng cho bài test
 
+        # Kỹ năng yêu cầu (dùng cho engine ghép năng lực)
+        if isinstance(data.get("skills"), list):
+            company_service.set_job_skills(new_job, data["skills"])
+
         # 2. Tạo Test (nếu có)
         test_data = data.get("test")
         if test_data:
@@ -290,7 +266,8 @@ def create_job():
                     testId=new_test.id,
                     content=q["content"],
                     options=str(q["options"]),
-                    correctAnswer=q["correctAnswer"]
+                    correctAnswer=q["correctAnswer"],
+                    gradingMode=q.get("gradingMode")
                 ))
 
         db_session.commit()
@@ -306,76 +283,13 @@ def create_job():
 def update_job(job_id):
     auth = require_company()
     if auth: return auth
-    
-    job = db_session.query(Job).filter(Job.id == job_id).first()
-    company = get_current_company()
-
-    if job is None:
-        return jsonify({"detail": "Job not found"}), 404
-    if company is None or getattr(job, "companyId", None) != getattr(company, "id", None):
-        return jsonify({"detail": "Forbidden"}), 403
 
     data = request.get_json(silent=True)
     if not data:
         data = request.form
 
+    return jsonify(company_service.update_job(get_current_company(), job_id, data))
 
-    if not data:
-        return jsonify({"detail": "No data provided"}), 400
-    
-    try:
-        # 1. Update Basic Info
-        if "title" in data: setattr(job, "title", str(data["title"]))
-        if "description" in data: setattr(job, "description", str(data["description"]))
-        if "location" in data: setattr(job, "location", str(data["location"]))
-        if "status" in data: setattr(job, "status", str(data["status"]))
-        if "maxApplicants" in data: setattr(job, "maxApplicants", safe_int(data["maxApplicants"]))
-
-        # 2. Update Test Logic
-        test_data = data.get("test") or (data if "testName" in data else None)
-        
-        if test_data:
-            # Chuẩn hóa input test về dict
-            if not isinstance(test_data, dict):
-                 test_data = {"testName": str(test_data)}
-
-            skill_test = db_session.query(SkillTest).filter(SkillTest.jobId == job.id).first()
-            
-            t_name = str(test_data.get("testName", ""))
-            t_duration = safe_int(test_data.get("duration"), 30)
-            t_score = safe_int(test_data.get("totalScore"), 100)
-
-            if t_name:
-                if not skill_test:
-                    skill_test = SkillTest(jobId=job.id, testName=t_name, duration=t_duration, totalScore=t_score)
-                    db_session.add(skill_test)
-                    db_session.flush()
-                else:
-                    setattr(skill_test, "testName", t_name)
-                    setattr(skill_test, "duration", t_duration)
-                    setattr(skill_test, "totalScore", t_score)
-                
-                # Update Questions (Delete old -> Insert new)
-                questions_data = test_data.get("questions")
-                if isinstance(questions_data, list):
-                    db_session.query(Question).filter(Question.testId == skill_test.id).delete()
-                    for q in questions_data:
-                        db_session.add(Question(
-                            testId=skill_test.id,
-                            content=str(q.get("content", "")),
-                            options=str(q.get("options", "")),
-                            correctAnswer=str(q.get("correctAnswer", ""))
-                        ))
-
-        db_session.commit()
-        return jsonify({"message": "Cập nhật thành công", "id": job.id})
-
-    except Exception as e:
-        db_session.rollback()
-        print(f"Update job error: {e}")
-        return jsonify({"detail": f"Lỗi cập nhật: {str(e)}"}), 500
-
-# TEST MANAGEMENT
 @company_bp.route("/jobs/<int:job_id>/test", methods=["POST"])
 @jwt_required()
 def create_skill_test(job_id):
@@ -405,7 +319,8 @@ def create_skill_test(job_id):
                     testId=test.id,
                     content=q["content"],
                     options=str(q.get("options", "")),
-                    correctAnswer=q["correctAnswer"]
+                    correctAnswer=q["correctAnswer"],
+                    gradingMode=q.get("gradingMode")
                 ))
         
         db_session.commit()
@@ -439,6 +354,15 @@ def view_test_results(job_id):
         "submittedAt": r.submittedAt
     } for r, s, t in results])
 
+@company_bp.route("/jobs/<int:job_id>/test-analytics", methods=["GET"])
+@jwt_required()
+def get_job_test_analytics(job_id):
+    """Độ khó, độ phân loại và phân bố lựa chọn của từng câu hỏi trong bài test của job."""
+    auth = require_company()
+    if auth: return auth
+
+    return jsonify(company_service.get_job_test_analytics(get_current_company(), job_id))
+
 # APPLICATION & EVALUATION
 
 @company_bp.route("/companies/<int:company_id>/applications", methods=["GET"])
@@ -451,51 +375,29 @@ def get_all_applications_for_company(company_id):
     if company.id != company_id:
         return jsonify({"detail": "Forbidden"}), 403
 
-    """Dashboard: Xem toàn bộ đơn ứng tuyển của công ty."""
-    apps = db_session.query(Application).join(Job).filter(Job.companyId == company_id).all()
-    response = []
-    
-    for app in apps:
-        test_score = "N/A"
-        # Logic lấy điểm test
-        if app.job.skill_tests:
-            test = app.job.skill_tests[0]
-            tr = db_session.query(TestResult).filter(
-                TestResult.studentId == app.student.id,
-                TestResult.testId == test.id
-            ).first()
-            if tr: test_score = tr.score
-
-        response.append({
-            "applicationId": app.id,
-            "studentName": app.student.fullName,
-            "jobTitle": app.job.title,
-            "appliedAt": app.appliedAt,
-            "status": serialize_status(app.status),
-            "testScore": test_score,
-            "cvUrl": get_student_cv_url(app.student)
-        })
-    return jsonify(response)
+    """Dashboard: Xem đơn ứng tuyển của công ty (phân trang ?limit=&cursor=)."""
+    return paginated_response(company_service.list_company_applications(company_id, *page_args()))
 
 @company_bp.route("/jobs/<int:job_id>/applications", methods=["GET"])
 @jwt_required()
 def get_applications_by_job(job_id):
     auth = require_company()
     if auth: return auth
-    
-    job = db_session.query(Job).filter(Job.id == job_id).first()
-    company = get_current_company()
 
-    if not job or job.companyId != company.id:
-        return jsonify({"detail": "Forbidden"}), 403
+    return jsonify(company_service.get_applications_by_job(get_current_company(), job_id))
 
-    apps = db_session.query(Application).filter(Application.jobId == job_id).all()
-    return jsonify([{
-        "applicationId": app.id,
-        "studentName": app.student.fullName,
-        "status": serialize_status(app.status),
-        "cvUrl": get_student_cv_url(app.student)
-    } for app in apps])
+@company_bp.route("/jobs/<int:job_id>/shortlist", methods=["GET"])
+@jwt_required()
+def get_job_shortlist(job_id):
+    """Ứng viên xếp theo độ phù hợp; ?scope=all để tìm cả student chưa ứng tuyển, ?limit=K."""
+    auth = require_company()
+    if auth: return auth
+
+    return jsonify(company_service.get_job_shortlist(
+        get_current_company(), job_id,
+        scope=request.args.get("scope", "applicants"),
+        limit=request.args.get("limit")
+    ))
 
 @company_bp.route("/applications/<int:app_id>/test-detail", methods=["GET"])
 @jwt_required()
@@ -519,22 +421,15 @@ def get_application_test_detail(app_id):
     if test:
         tr = db_session.query(TestResult).filter(TestResult.testId == test.id, TestResult.studentId == app.studentId).first()
         
-        # Parse answers nếu có
-        if tr is not None and getattr(tr, "answers", None):
-            try:
-                raw_answers = getattr(tr, "answers")
-                if not isinstance(raw_answers, (str, bytes, bytearray)):
-                    raw_answers = str(raw_answers)
-                student_answers = json.loads(raw_answers)
-                questions = db_session.query(Question).filter(Question.testId == test.id).all()
-                for q in questions:
-                    ans_key = f"answer_{q.id}"
-                    details_list.append({
-                        "question": q.content,
-                        "answer": student_answers.get(ans_key, "(Không trả lời)")
-                    })
-            except (TypeError, ValueError, json.JSONDecodeError):
-                pass
+        # Câu hỏi + câu trả lời (1 câu JOIN trên test_answers)
+        if tr is not None:
+            for a in grading_service.list_result_answers(test.id, tr.id):
+                details_list.append({
+                    "question": a["question"],
+                    "answer": a["answer"] if a["answer"] is not None else "(Không trả lời)",
+                    "correct": a["correct"],
+                    "points": a["points"]
+                })
 
     return jsonify({
         "status": serialize_status(app.status),
@@ -694,33 +589,6 @@ def get_job_test_info(job_id):
     """API trả về thông tin bài test và câu hỏi để fill vào form Edit"""
     auth = require_company()
     if auth: return auth
-    
-    # Check quyền sở hữu Job
-    job = db_session.query(Job).filter(Job.id == job_id).first()
-    company = get_current_company()
-    if not job:
-        return jsonify({"detail": "Job not found"}), 404
-    if company is None or job.companyId != company.id:
-        return jsonify({"detail": "Forbidden"}), 403
 
-    # Lấy bài test
-    test = db_session.query(SkillTest).filter(SkillTest.jobId == job_id).first()
-    
-    if not test:
-        # Trả về null nếu không có test, frontend sẽ tự hiểu
-        return jsonify(None) 
-    
-    # Lấy danh sách câu hỏi
-    questions = db_session.query(Question).filter(Question.testId == test.id).all()
-    questions_list = [
-        {"content": q.content, "options": q.options, "correctAnswer": q.correctAnswer} 
-        for q in questions
-    ]
-    
-    return jsonify({
-        "id": test.id,
-        "testName": test.testName,
-        "duration": test.duration,
-        "totalScore": test.totalScore,
-        "questions": questions_list
-    })
\ No newline at end of file
+    # Trả về null nếu không có test, frontend sẽ tự hiểu
+    return jsonify(company_service.get_job_test_info(get_current_company(), job_id))
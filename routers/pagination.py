@@ -0,0 +1,22 @@
+from urllib.parse import urlencode
+
+from flask import request, jsonify
+
+
+def page_args():
+    """(cursor, limit) từ query string: ?limit=50&cursor=..."""
+    return request.args.get("cursor"), request.args.get("limit")
+
+
+def paginated_response(page):
+    """
+    Body giữ nguyên dạng mảng như trước; cursor của trang sau nằm ở
+    header X-Next-Cursor và Link (rel="next"), không có khi đã hết dữ liệu.
+    """
+    resp = jsonify(page["items"])
+    if page["nextCursor"]:
+        args = request.args.to_dict()
+        args["cursor"] = page["nextCursor"]
+        resp.headers["X-Next-Cursor"] = page["nextCursor"]
+        resp.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return resp
@@ -0,0 +1,2 @@
+# services/__init__.py
+from .base import ServiceError
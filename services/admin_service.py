@@ -0,0 +1,143 @@
+from sqlalchemy import func, or_
+from sqlalchemy.orm import joinedload
+
+from database import db_session
+from models.user_models import User, UserRole
+from models.job_models import Job, SkillTest, Question
+from models.app_models import Application, TestResult, TestAnswer, Report
+from .base import ServiceError
+from .pagination import paginate
+
+
+# DASHBOARD
+def get_dashboard_stats():
+    students = db_session.query(User).filter(
+        User.role == UserRole.STUDENT
+    ).count()
+
+    companies = db_session.query(User).filter(
+        User.role == UserRole.COMPANY
+    ).count()
+
+    return {
+        "users": {
+            "total": students + companies,  # không tính admin
+            "students": students,
+            "companies": companies
+        },
+        "jobs": {
+            "total": db_session.query(Job).count(),
+            "open": db_session.query(Job).filter(Job.status != "CLOSED").count(),
+            "closed": db_session.query(Job).filter(Job.status == "CLOSED").count()
+        },
+        "applications": db_session.query(Application).count()
+    }
+
+
+# USERS
+def users_version():
+    """Version của danh sách user cho ETag (thêm / xóa / đổi status...)."""
+    return tuple(db_session.query(
+        func.count(User.id), func.max(User.id), func.max(User.updatedAt)
+    ).one())
+
+
+def list_users(cursor=None, limit=None):
+    users, next_cursor = paginate(db_session.query(User), [User.id], cursor, limit)
+    return {
+        "items": [{
+            "id": u.id,
+            "email": u.email,
+            "role": u.role.value,
+            "status": u.status,
+            "createdAt": u.createdAt.isoformat() if u.createdAt else None
+        } for u in users],
+        "nextCursor": next_cursor
+    }
+
+
+def set_user_status(user_id, status, acting_user_id=None):
+    user = db_session.get(User, user_id)
+    if not user:
+        raise ServiceError("User not found", 404)
+
+    # không cho admin tự khóa chính mình
+    if status == "locked" and acting_user_id is not None and user.id == int(acting_user_id):
+        raise ServiceError("Cannot lock yourself", 400)
+
+    user.status = status
+    db_session.commit()
+    return {"message": "User locked" if status == "locked" else "User unlocked"}
+
+
+# JOBS
+def list_jobs(cursor=None, limit=None):
+    jobs, next_cursor = paginate(db_session.query(Job), [Job.id], cursor, limit)
+    return {
+        "items": [{
+            "id": j.id,
+            "title": j.title,
+            "companyId": j.companyId,
+            "status": j.status,
+            "maxApplicants": j.maxApplicants
+        } for j in jobs],
+        "nextCursor": next_cursor
+    }
+
+
+def close_job(job_id):
+    job = db_session.get(Job, job_id)
+    if not job:
+        raise ServiceError("Job not found", 404)
+
+    job.status = "CLOSED"
+    db_session.commit()
+    return {"message": "Job closed"}
+
+
+# REPORTS
+def list_reports(cursor=None, limit=None):
+    """Report mới nhất trước."""
+    reports, next_cursor = paginate(
+        db_session.query(Report).options(joinedload(Report.company)),
+        [Report.createdAt, Report.id], cursor, limit, descending=True
+    )
+    return {
+        "items": [{
+            "id": r.id,
+            "companyId": r.companyId,
+            "companyName": r.company.companyName if r.company else None,
+            "reportType": r.reportType,
+            "content": r.content,
+            "createdAt": r.createdAt.isoformat() if r.createdAt else None
+        } for r in reports],
+        "nextCursor": next_cursor
+    }
+
+
+# TESTS
+def list_tests():
+    tests = db_session.query(SkillTest).order_by(SkillTest.id).all()
+    return [{
+        "id": t.id,
+        "testName": t.testName,
+        "jobId": t.jobId
+    } for t in tests]
+
+
+def delete_test(test_id):
+    test = db_session.get(SkillTest, test_id)
+    if not test:
+        raise ServiceError("Test not found", 404)
+
+    # câu trả lời trỏ tới kết quả / câu hỏi của test: xóa trước (PostgreSQL báo lỗi khóa ngoại)
+    result_ids = db_session.query(TestResult.id).filter(TestResult.testId == test_id)
+    question_ids = db_session.query(Question.id).filter(Question.testId == test_id)
+    db_session.query(TestAnswer).filter(or_(
+        TestAnswer.resultId.in_(result_ids.scalar_subquery()),
+        TestAnswer.questionId.in_(question_ids.scalar_subquery())
+    )).delete(synchronize_session=False)
+    db_session.query(TestResult).filter(TestResult.testId == test_id).delete()
+    db_session.delete(test)  # questions bị xóa theo cascade
+    db_session.commit()
+    return {"message": "Test deleted"}
@@ -0,0 +1,187 @@
+"""
+Thống kê theo câu hỏi (item analytics) của 1 bài test, tính trên mọi bài đã nộp:
+
+  difficulty      tỉ lệ bài làm đúng câu này (p; không trả lời = sai) — càng cao càng dễ
+  discrimination  D = p(nhóm điểm cao) - p(nhóm điểm thấp); mỗi nhóm là GROUP_RATIO
+                  (27%) số bài theo tổng điểm. D < 0.2: câu hỏi phân loại ứng viên kém
+  options         (câu trắc nghiệm) số bài chọn từng lựa chọn
+
+Không nạp từng câu trả lời lên Python, 3 câu SQL cho cả bài test:
+  1. điểm của mọi bài nộp -> NumPy xếp hạng, lấy ngưỡng (score, id) của 2 nhóm
+  2. GROUP BY (questionId, correct, choice) trên test_answers — chỉ quét index
+     ix_test_answers_questionId_correct_choice: số bài trả lời / đúng / chọn từng nhãn
+  3. số câu đúng của nhóm cao / nhóm thấp theo câu hỏi
+rồi tính chỉ số cho mọi câu vector hóa trên mảng (câu hỏi x số đếm).
+
+Kết quả được cache theo test, kèm version = (số bài, id lớn nhất, tổng điểm) của
+test_results: có bài nộp mới / xóa bài -> version đổi -> tính lại. Chấm lại
+(grading_service.regrade_test) có thể đổi đúng / sai từng câu mà giữ nguyên tổng điểm
+nên xóa cache của test khi xong; sửa câu hỏi xóa cache qua session event.
+
+Cấu hình (env): ANALYTICS_CACHE_SIZE (mặc định 256 test), ANALYTICS_CACHE_TTL (giây, 600).
+"""
+import os
+
+import numpy as np
+from sqlalchemy import and_, case, event, func, or_
+
+from database import db_session
+from models.job_models import SkillTest, Question
+from models.app_models import TestResult, TestAnswer
+from .base import ServiceError
+from .cache import TTLCache
+from .grading_service import AnswerKey, _LABELS
+
+GROUP_RATIO = 0.27
+WEAK_DISCRIMINATION = 0.2
+
+_analytics_cache = TTLCache(
+    maxsize=int(os.getenv("ANALYTICS_CACHE_SIZE", "256")),
+    ttl=int(os.getenv("ANALYTICS_CACHE_TTL", "600"))
+)
+
+
+def results_version(test_id):
+    """Version các bài nộp của test: đổi khi có bài nộp mới / xóa (chấm lại: invalidate_analytics)."""
+    return tuple(db_session.query(
+        func.count(TestResult.id), func.max(TestResult.id), func.sum(TestResult.score)
+    ).filter(TestResult.testId == test_id).one())
+
+
+def get_item_analytics(test_id):
+    """
+    {"testId", "submissions", "groupSize", "questions": [{"questionId", "content", "mode",
+    "answered", "difficulty", "discrimination", "weak", "options"}]} — câu tự luận có
+    difficulty / discrimination None, câu không phải trắc nghiệm có options None.
+    """
+    if not db_session.query(SkillTest.id).filter(SkillTest.id == test_id).first():
+        raise ServiceError("Test not found", 404)
+
+    version = results_version(test_id)
+    cached = _analytics_cache.get(test_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    analytics = compute_item_analytics(test_id)
+    _analytics_cache.set(test_id, (version, analytics))
+    return analytics
+
+
+def compute_item_analytics(test_id):
+    questions = db_session.query(
+        Question.id, Question.content, Question.options, Question.correctAnswer, Question.gradingMode
+    ).filter(Question.testId == test_id).order_by(Question.id).all()
+    key = AnswerKey((q.id, q.options, q.correctAnswer, q.gradingMode) for q in questions)
+    position = {q.id: i for i, q in enumerate(questions)}
+    choice_count = {q[0]: len(q[3]) for q in key.items if q[1] == "choice" and q[3]}
+
+    # 1) điểm các bài nộp; thứ tự xếp hạng: điểm giảm dần, hòa thì id nhỏ trước
+    rows = db_session.query(TestResult.id, func.coalesce(TestResult.score, 0))\
+        .filter(TestResult.testId == test_id).all()
+    n = len(rows)
+    group = max(1, int(round(n * GROUP_RATIO))) if n else 0
+
+    # counts: dòng = câu hỏi; cột = trả lời, đúng, đúng (nhóm cao), đúng (nhóm thấp),
+    # rồi số lần chọn nhãn A, B, ... và "khác" (không khớp lựa chọn nào)
+    width = max(choice_count.values(), default=0)
+    counts = np.zeros((len(questions), 4 + width + 1), dtype=np.int64)
+
+    # 2) trả lời / đúng / nhãn đã chọn — chỉ quét index
+    if n and questions:
+        for question_id, correct, choice, count in db_session.query(
+            TestAnswer.questionId, TestAnswer.correct, TestAnswer.choice, func.count()
+        ).filter(TestAnswer.questionId.in_(list(position)))\
+         .group_by(TestAnswer.questionId, TestAnswer.correct, TestAnswer.choice):
+            row = counts[position[question_id]]
+            row[0] += count
+            if correct:
+                row[1] += count
+            if question_id in choice_count:
+                for label in (choice.split(",") if choice else [None]):
+                    index = _LABELS.find(label) if label else -1
+                    row[4 + index if 0 <= index < choice_count[question_id] else -1] += count
+
+    # 3) số câu đúng của 2 nhóm (ngưỡng là cặp (score, id) nên mỗi nhóm đúng `group` bài)
+    if n > 1 and questions:
+        ids, scores = np.array([tuple(r) for r in rows], dtype=np.int64).T
+        order = np.lexsort((ids, -scores))
+        top_score, top_id = int(scores[order[group - 1]]), int(ids[order[group - 1]])
+        low_score, low_id = int(scores[order[n - group]]), int(ids[order[n - group]])
+        score = func.coalesce(TestResult.score, 0)
+        upper = or_(score > top_score, and_(score == top_score, TestResult.id <= top_id))
+        lower = or_(score < low_score, and_(score == low_score, TestResult.id >= low_id))
+
+        for question_id, correct_upper, correct_lower in db_session.query(
+            TestAnswer.questionId,
+            func.sum(case((upper, 1), else_=0)),
+            func.sum(case((lower, 1), else_=0))
+        ).join(TestResult, TestResult.id == TestAnswer.resultId)\
+         .filter(TestResult.testId == test_id, TestAnswer.correct.is_(True), or_(upper, lower))\
+         .group_by(TestAnswer.questionId):
+            if question_id in position:
+                counts[position[question_id], 2:4] = (correct_upper or 0, correct_lower or 0)
+
+    # 4) chỉ số của mọi câu, vector hóa
+    nan = np.full(len(questions), np.nan)
+    difficulty = counts[:, 1] / n if n else nan
+    discrimination = (counts[:, 2] - counts[:, 3]) / group if n > 1 else nan
+
+    items = []
+    for i, (q, (_, mode, expected, options)) in enumerate(zip(questions, key.items)):
+        gradable = expected is not None
+        d = _round(discrimination[i]) if gradable else None
+        items.append({
+            "questionId": q.id,
+            "content": q.content,
+            "mode": mode if gradable else "essay",
+            "answered": int(counts[i, 0]),
+            "difficulty": _round(difficulty[i]) if gradable else None,
+            "discrimination": d,
+            "weak": d is not None and d < WEAK_DISCRIMINATION,
+            "options": _options(counts[i], expected, options) if q.id in choice_count else None
+        })
+    return {"testId": test_id, "submissions": n, "groupSize": group, "questions": items}
+
+
+def _options(row, expected, options):
+    """[{"label", "text", "count", "isCorrect"}, ..., {"label": None, "text": "Khác", ...}]."""
+    result = [{
+        "label": label,
+        "text": text,
+        "count": int(row[4 + i]),
+        "isCorrect": expected is not None and label in expected
+    } for i, (label, text) in enumerate(zip(_LABELS, options))]
+    result.append({"label": None, "text": "Khác", "count": int(row[-1]), "isCorrect": False})
+    return result
+
+
+def _round(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def invalidate_analytics(test_id):
+    _analytics_cache.invalidate(test_id)
+
+
+def clear_analytics_cache():
+    _analytics_cache.clear()
+
+
+# Sửa câu hỏi (nội dung / lựa chọn / đáp án) -> xóa cache của test khi commit
+@event.listens_for(db_session, "after_flush")
+def _collect_changed_tests(session, flush_context):
+    changed = session.info.setdefault("analytics_tests", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Question):
+            changed.add(obj.testId)
+
+
+@event.listens_for(db_session, "after_commit")
+def _invalidate_analytics(session):
+    for test_id in session.info.pop("analytics_tests", ()):
+        _analytics_cache.invalidate(test_id)
+
+
+@event.listens_for(db_session, "after_rollback")
+def _discard_changed_tests(session):
+    session.info.pop("analytics_tests", None)
@@ -0,0 +1,8 @@
+class ServiceError(Exception):
+    """Lỗi nghiệp vụ: router trả về JSON {"detail": ...}, view hiển thị thông báo."""
+
+    def __init__(self, detail, status_code=400, headers=None):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.headers = headers or {}  # vd. Retry-After khi 503
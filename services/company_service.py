@@ -0,0 +1,325 @@
+from sqlalchemy import String, and_, cast, exists, insert
+from sqlalchemy.orm import contains_eager, joinedload
+
+from database import db_session
+from models.job_models import Job, SkillTest, Question, JobSkill, MatchScore
+from models.user_models import Company, Student
+from models.app_models import Application, TestResult, TestAnswer, Evaluation
+from .base import ServiceError
+from .pagination import paginate
+from .recruitment_service import first_tests_subquery
+from .matching_service import mark_dirty, parse_top_k, rank_candidates, EVALUATION_MAX
+from .skill_service import resolve_skill_ids
+from .analytics_service import get_item_analytics
+from .facet_service import mark_changed
+
+
+def safe_int(value, default=0):
+    """Chuyển đổi an toàn sang int."""
+    try:
+        if value is None or str(value).strip() == "":
+            return default
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def serialize_status(status_obj):
+    """Lấy value từ Enum nếu có, hoặc trả về chính nó."""
+    return status_obj.value if hasattr(status_obj, 'value') else status_obj
+
+
+def get_student_cv_url(student):
+    """Lấy CV URL an toàn từ student object."""
+    if hasattr(student, 'profile') and student.profile:
+        return student.profile.cvUrl
+    return None
+
+
+# COMPANY
+def get_company_by_user(user_id):
+    company = db_session.query(Company).filter(Company.userId == user_id).first()
+    if not company:
+        raise ServiceError("Company not found", 404)
+    return company
+
+
+def get_owned_job(company, job_id):
+    """Lấy job và kiểm tra job thuộc về company."""
+    job = db_session.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise ServiceError("Job not found", 404)
+    if company is None or job.companyId != company.id:
+        raise ServiceError("Forbidden", 403)
+    return job
+
+
+# JOBS
+def get_job_detail(company, job_id):
+    job = get_owned_job(company, job_id)
+    return {
+        "id": job.id,
+        "companyId": job.companyId,
+        "title": job.title,
+        "description": job.description,
+        "location": job.location,
+        "status": job.status,
+        "maxApplicants": job.maxApplicants,
+        "skills": [
+            {"name": js.skill.name, "requiredLevel": js.requiredLevel} for js in job.job_skills
+        ]
+    }
+
+
+def parse_skill_spec(text):
+    """"Python:3, SQL" -> [{"name": "Python", "requiredLevel": 3}, {"name": "SQL", "requiredLevel": 1}]."""
+    skills = []
+    for part in (text or "").split(","):
+        name, _, level = part.partition(":")
+        if name.strip():
+            skills.append({"name": name.strip(), "requiredLevel": safe_int(level, 1)})
+    return skills
+
+
+def set_job_skills(job, skills):
+    """
+    Thay toàn bộ kỹ năng yêu cầu của job: [{"name": "Python", "requiredLevel": 3}, ...]
+    (chưa commit). Tên skill được chuẩn hóa / tra alias; skill chưa có được tạo mới.
+    """
+    db_session.query(JobSkill).filter(JobSkill.jobId == job.id).delete()
+    mark_dirty(jobs=[job.id])
+    mark_changed(jobs=[job.id])
+
+    entries = [(s.get("name"), safe_int(s.get("requiredLevel"), 1)) for s in skills if s.get("name")]
+
+    skill_ids = resolve_skill_ids(name for name, _ in entries)
+    levels = {}
+    for name, level in entries:
+        if name in skill_ids:
+            levels.setdefault(skill_ids[name], level)
+    if levels:
+        db_session.execute(insert(JobSkill), [{
+            "jobId": job.id,
+            "skillId": skill_id,
+            "requiredLevel": level
+        } for skill_id, level in levels.items()])
+
+
+def update_job(company, job_id, data):
+    job = get_owned_job(company, job_id)
+
+    if not data:
+        raise ServiceError("No data provided", 400)
+
+    try:
+        # 1. Update Basic Info
+        if "title" in data: setattr(job, "title", str(data["title"]))
+        if "description" in data: setattr(job, "description", str(data["description"]))
+        if "location" in data: setattr(job, "location", str(data["location"]))
+        if "status" in data: setattr(job, "status", str(data["status"]))
+        if "maxApplicants" in data: setattr(job, "maxApplicants", safe_int(data["maxApplicants"]))
+        if isinstance(data.get("skills"), list): set_job_skills(job, data["skills"])
+
+        # 2. Update Test Logic
+        test_data = data.get("test") or (data if "testName" in data else None)
+
+        if test_data:
+            # Chuẩn hóa input test về dict
+            if not isinstance(test_data, dict):
+                 test_data = {"testName": str(test_data)}
+
+            skill_test = db_session.query(SkillTest).filter(SkillTest.jobId == job.id).first()
+
+            t_name = str(test_data.get("testName", ""))
+            t_duration = safe_int(test_data.get("duration"), 30)
+            t_score = safe_int(test_data.get("totalScore"), 100)
+
+            if t_name:
+                if not skill_test:
+                    skill_test = SkillTest(jobId=job.id, testName=t_name, duration=t_duration, totalScore=t_score)
+                    db_session.add(skill_test)
+                    db_session.flush()
+                else:
+                    setattr(skill_test, "testName", t_name)
+                    setattr(skill_test, "duration", t_duration)
+                    setattr(skill_test, "totalScore", t_score)
+
+                # Update Questions theo thứ tự: giữ id câu hỏi cũ để câu trả lời đã nộp
+                # (lưu theo questionId) vẫn chấm lại được khi đổi đáp án
+                questions_data = test_data.get("questions")
+                if isinstance(questions_data, list):
+                    existing = db_session.query(Question)\
+                        .filter(Question.testId == skill_test.id).order_by(Question.id).all()
+                    removed = [q.id for q in existing[len(questions_data):]]
+                    if removed:
+                        db_session.query(TestAnswer).filter(TestAnswer.questionId.in_(removed))\
+                            .delete(synchronize_session=False)
+                    for question in existing[len(questions_data):]:
+                        db_session.delete(question)
+                    for i, q in enumerate(questions_data):
+                        question = existing[i] if i < len(existing) else Question(testId=skill_test.id)
+                        question.content = str(q.get("content", ""))
+                        question.options = str(q.get("options", ""))
+                        question.correctAnswer = str(q.get("correctAnswer", ""))
+                        question.gradingMode = q.get("gradingMode", question.gradingMode) or None
+                        db_session.add(question)
+
+        db_session.commit()
+        return {"message": "Cập nhật thành công", "id": job.id}
+
+    except Exception as e:
+        db_session.rollback()
+        print(f"Update job error: {e}")
+        raise ServiceError(f"Lỗi cập nhật: {str(e)}", 500)
+
+
+def get_job_test_info(company, job_id):
+    """Thông tin bài test và câu hỏi để fill vào form Edit (None nếu job không có test)."""
+    get_owned_job(company, job_id)
+
+    test = db_session.query(SkillTest).filter(SkillTest.jobId == job_id).first()
+    if not test:
+        return None
+
+    questions = db_session.query(Question).filter(Question.testId == test.id).order_by(Question.id).all()
+    questions_list = [
+        {"content": q.content, "options": q.options, "correctAnswer": q.correctAnswer,
+         "gradingMode": q.gradingMode}
+        for q in questions
+    ]
+
+    return {
+        "id": test.id,
+        "testName": test.testName,
+        "duration": test.duration,
+        "totalScore": test.totalScore,
+        "questions": questions_list
+    }
+
+
+def get_job_test_analytics(company, job_id):
+    """Thống kê theo câu hỏi của bài test (đầu tiên) của job — xem services/analytics_service.py."""
+    get_owned_job(company, job_id)
+
+    test = db_session.query(SkillTest.id).filter(SkillTest.jobId == job_id).order_by(SkillTest.id).first()
+    if not test:
+        raise ServiceError("Job has no test", 404)
+    return get_item_analytics(test.id)
+
+
+# APPLICATIONS
+def test_score_column(test_id, student_id):
+    """Điểm bài test `test_id` của student (kết quả nộp đầu tiên) — scalar subquery dùng trong SELECT."""
+    return db_session.query(TestResult.score).filter(
+        TestResult.testId == test_id,
+        TestResult.studentId == student_id
+    ).order_by(TestResult.id).limit(1).scalar_subquery()
+
+
+def list_company_applications(company_id, cursor=None, limit=None):
+    """
+    Dashboard: đơn ứng tuyển của công ty, mới nhất trước.
+    Job, student, profile và điểm test lấy cùng 1 query (không N+1 theo số dòng).
+    """
+    first_tests = first_tests_subquery()
+    query = db_session.query(
+        Application,
+        test_score_column(first_tests.c.test_id, Application.studentId).label("test_score")
+    ).join(Job, Application.jobId == Job.id)\
+     .outerjoin(first_tests, first_tests.c.jobId == Application.jobId)\
+     .filter(Job.companyId == company_id)\
+     .options(
+        contains_eager(Application.job),
+        joinedload(Application.student).joinedload(Student.profile)
+     )
+
+    rows, next_cursor = paginate(
+        query, [Application.appliedAt, Application.id], cursor, limit, descending=True
+    )
+
+    response = []
+    for app, score in rows:
+        test_score = score if score is not None else "N/A"
+
+        response.append({
+            "applicationId": app.id,
+            "studentName": app.student.fullName,
+            "jobTitle": app.job.title,
+            "appliedAt": app.appliedAt,
+            "status": serialize_status(app.status),
+            "testScore": test_score,
+            "cvUrl": get_student_cv_url(app.student)
+        })
+    return {"items": response, "nextCursor": next_cursor}
+
+
+def get_job_shortlist(company, job_id, scope="applicants", limit=None):
+    """
+    Ứng viên của job xếp theo độ phù hợp (kỹ năng + điểm test + đánh giá), cao trước.
+    scope="all": xếp hạng cả student chưa ứng tuyển (chỉ theo kỹ năng).
+    Điểm kỹ năng đọc từ match_scores (tính sẵn bởi services/match_worker.py).
+    """
+    get_owned_job(company, job_id)
+
+    has_required = db_session.query(
+        exists().where(JobSkill.jobId == job_id)
+    ).scalar()
+    test = db_session.query(SkillTest.id, SkillTest.totalScore)\
+        .filter(SkillTest.jobId == job_id).order_by(SkillTest.id).first()
+
+    # đánh giá mới nhất của mỗi application
+    eval_score = db_session.query(Evaluation.skillScore)\
+        .filter(Evaluation.applicationId == Application.id)\
+        .order_by(Evaluation.id.desc()).limit(1).scalar_subquery()
+    columns = [
+        Application.id, Application.studentId,
+        cast(Application.status, String).label("status"), eval_score.label("evaluation"),
+        MatchScore.score, MatchScore.coverage
+    ]
+    if test:
+        columns.append(test_score_column(test.id, Application.studentId).label("test_score"))
+    apps = db_session.query(*columns)\
+        .outerjoin(MatchScore, and_(
+            MatchScore.jobId == Application.jobId, MatchScore.studentId == Application.studentId
+        ))\
+        .filter(Application.jobId == job_id).all()
+
+    pool = []
+    if scope == "all":
+        # student chưa ứng tuyển chỉ có điểm kỹ năng -> top-K theo match_scores là đủ
+        pool = db_session.query(MatchScore.studentId, MatchScore.score, MatchScore.coverage)\
+            .filter(MatchScore.jobId == job_id)\
+            .filter(~exists().where(
+                Application.jobId == job_id, Application.studentId == MatchScore.studentId
+            ))\
+            .order_by(MatchScore.score.desc(), MatchScore.studentId)\
+            .limit(parse_top_k(limit)).all()
+
+    total = test.totalScore if test and test.totalScore else 100
+    ranked = rank_candidates(has_required, [(
+        a.studentId, a.score, a.coverage,
+        min(a.test_score / total, 1.0) if test and a.test_score is not None else None,
+        a.evaluation / EVALUATION_MAX if a.evaluation is not None else None
+    ) for a in apps], [tuple(p) for p in pool], limit=limit)
+
+    by_student = {a.studentId: a for a in apps}
+    names = dict(db_session.query(Student.id, Student.fullName)
+                 .filter(Student.id.in_([r["studentId"] for r in ranked])).all())
+    for r in ranked:
+        app = by_student.get(r["studentId"])
+        r["fullName"] = names.get(r["studentId"])
+        r["applicationId"] = app.id if app else None
+        r["status"] = app.status.lower() if app else None
+    return ranked
+
+
+def get_applications_by_job(company, job_id):
+    get_owned_job(company, job_id)
+
+    apps = db_session.query(Application).filter(Application.jobId == job_id).all()
+    return [{
+        "applicationId": app.id,
+        "studentName": app.student.fullName,
+        "status": serialize_status(app.status),
+        "cvUrl": get_student_cv_url(app.student)
+    } for app in apps]
@@ -0,0 +1,516 @@
+"""
+Lọc job theo facet kèm số job của từng giá trị:
+
+  location   Job.location
+  industry   ngành của công ty (CompanyProfile.industry)
+  size       quy mô công ty (CompanyProfile.size)
+  skills     kỹ năng yêu cầu (job_skills) — 1 job nhiều giá trị
+  hasTest    job có bài test hay không
+
+Chọn nhiều giá trị trong 1 facet là OR, giữa các facet là AND. Số đếm của mỗi facet
+tính theo bộ lọc của các facet còn lại (đang chọn "Hà Nội" vẫn thấy số job ở "Đà Nẵng"
+để chọn thêm).
+
+Số đếm không lấy bằng GROUP BY trên jobs mỗi lần bấm lọc mà từ index facet trong
+process: mỗi job chưa CLOSED là 1 vị trí trong các mảng NumPy (mã giá trị của từng
+facet; skill là các cặp (vị trí job, skill id)). Lọc = tra bảng mã -> mặt nạ bool,
+đếm = np.bincount; số đếm của từng bộ lọc được cache theo version của index. Request
+chỉ còn 1 câu SQL nạp các job của trang.
+
+Index nạp 1 lần (lần dùng đầu), sau đó chỉ nạp lại các job thay đổi:
+  - ghi Job / JobSkill / SkillTest / CompanyProfile / Application qua ORM (hoặc
+    mark_changed cho câu DELETE / INSERT hàng loạt) -> các job bị ảnh hưởng được nạp
+    lại ở lần đọc sau commit. Thay đổi skill / bài test / hồ sơ công ty cũng cập nhật
+    Job.updatedAt của job trong cùng transaction;
+  - thay đổi từ process khác và các câu UPDATE hàng loạt (đóng job đã đủ người...)
+    -> mỗi FACET_SYNC_INTERVAL giây nạp lại các job có updatedAt mới (index
+    ix_jobs_updatedAt). Cửa sổ SYNC_OVERLAP bù cho transaction commit chậm hơn
+    thời điểm ghi updatedAt; job nạp lại mà không đổi facet thì index giữ nguyên.
+
+Cấu hình (env): FACET_SYNC_INTERVAL (giây, mặc định 5), FACET_LIMIT (số giá trị tối đa
+trả về mỗi facet, 20), FACET_CACHE_SIZE (số mục cache số đếm / trang, 256).
+"""
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import event, exists, inspect, or_, update
+
+from database import db_session
+from models import Job, Skill, JobSkill, SkillTest, Application
+from models.user_models import CompanyProfile
+from .base import ServiceError
+from .cache import TTLCache
+from .pagination import decode_cursor, encode_cursor, parse_limit
+from .recruitment_service import load_jobs
+
+FACET_SYNC_INTERVAL = float(os.getenv("FACET_SYNC_INTERVAL", "5"))
+FACET_LIMIT = int(os.getenv("FACET_LIMIT", "20"))
+SYNC_OVERLAP = timedelta(seconds=60)
+CHUNK_SIZE = 500
+
+# facet 1 giá trị / job, lưu dạng mã (vị trí trong danh sách giá trị, -1 = không có)
+SINGLE_FACETS = ("location", "industry", "size", "hasTest")
+FACETS = SINGLE_FACETS + ("skills",)
+
+_versions = itertools.count(1)
+
+
+class FacetIndex:
+    """
+    Các job dạng cột. Vị trí của job cố định từ lúc nạp; job bị đóng / xóa chỉ tắt cờ
+    alive. Skill của job là các cặp liền nhau [start, end) trong mảng cặp; đổi skill
+    thì bỏ các cặp cũ và thêm cặp mới ở cuối (gom lại khi cặp đã bỏ chiếm quá nửa).
+    `version` đổi mỗi khi có job thực sự thay đổi.
+    """
+
+    def __init__(self):
+        self.version = next(_versions)
+        self.positions = {}   # job id -> vị trí
+        self.size = 0
+        self.ids_sorted = True  # job_ids tăng dần theo vị trí
+        self.job_ids = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.codes = {f: np.zeros(0, dtype=np.int32) for f in SINGLE_FACETS}
+        self.values = {f: [] for f in SINGLE_FACETS}
+        self.lookup = {f: {} for f in SINGLE_FACETS}
+        for value in (False, True):  # mã hasTest: False = 0, True = 1
+            self._code("hasTest", value)
+        self.pair_count = 0
+        self.pair_pos = np.zeros(0, dtype=np.int32)
+        self.pair_skill = np.zeros(0, dtype=np.int32)
+        self.pair_alive = np.zeros(0, dtype=bool)
+        self.pair_start = np.zeros(0, dtype=np.int64)
+        self.pair_end = np.zeros(0, dtype=np.int64)
+        self.max_skill = 0
+        self.skill_names = {}  # skill id -> tên
+        self.synced_until = None  # updatedAt lớn nhất đã nạp
+
+    @classmethod
+    def build(cls, rows, pairs):
+        """rows: (id, status, location, industry, size, hasTest, updatedAt) theo id tăng dần; pairs: (job id, skill id)."""
+        index = cls()
+        n = len(rows)
+        index._reserve(n, len(pairs))
+        ids = np.zeros(0, dtype=np.int64)
+        if n:
+            job_id, status, location, industry, size, has_test, updated_at = zip(*rows)
+            ids = np.array(job_id, dtype=np.int64)
+            index.job_ids[:n] = ids
+            index.positions = dict(zip(job_id, range(n)))
+            index.alive[:n] = np.array(status, dtype=object) != "CLOSED"
+            for facet, column in (("location", location), ("industry", industry), ("size", size)):
+                # mã theo giá trị thô trước, rồi chuẩn hóa từng giá trị khác nhau 1 lần
+                raw = {}
+                raw_codes = np.fromiter((raw.setdefault(v, len(raw)) for v in column), dtype=np.int64, count=n)
+                remap = np.array([index._code(facet, _clean(v)) for v in raw], dtype=np.int32)
+                index.codes[facet][:n] = remap[raw_codes]
+            index.codes["hasTest"][:n] = np.array(has_test, dtype=bool)
+            index.synced_until = max((u for u in updated_at if u is not None), default=None)
+            index.size = n
+        if pairs and n:
+            job, skill = np.array(pairs, dtype=np.int64).T
+            pos = np.minimum(np.searchsorted(ids, job), n - 1)
+            valid = ids[pos] == job
+            order = np.argsort(pos[valid], kind="stable")
+            pos, skill = pos[valid][order], skill[valid][order]
+            count = len(pos)
+            index.pair_pos[:count], index.pair_skill[:count] = pos, skill
+            index.pair_alive[:count] = True
+            index.pair_count = count
+            index._set_pair_ranges()
+            index.max_skill = int(skill.max(initial=0))
+        return index
+
+    # --- ghi ---
+    def _code(self, facet, value):
+        if value is None or value == "":
+            return -1
+        code = self.lookup[facet].get(value)
+        if code is None:
+            code = self.lookup[facet][value] = len(self.values[facet])
+            self.values[facet].append(value)
+        return code
+
+    def _reserve(self, jobs, pairs):
+        if self.size + jobs > len(self.job_ids):
+            capacity = max(2 * len(self.job_ids), self.size + jobs, 1024)
+            self.job_ids = _grow(self.job_ids, capacity)
+            self.alive = _grow(self.alive, capacity)
+            self.pair_start = _grow(self.pair_start, capacity)
+            self.pair_end = _grow(self.pair_end, capacity)
+            for f in SINGLE_FACETS:
+                self.codes[f] = _grow(self.codes[f], capacity, fill=-1)
+        if self.pair_count + pairs > len(self.pair_pos):
+            capacity = max(2 * len(self.pair_pos), self.pair_count + pairs, 4096)
+            self.pair_pos = _grow(self.pair_pos, capacity)
+            self.pair_skill = _grow(self.pair_skill, capacity)
+            self.pair_alive = _grow(self.pair_alive, capacity)
+
+    def _set_pair_ranges(self):
+        # các cặp sắp theo vị trí job -> cặp của 1 job liền nhau
+        positions = np.arange(self.size)
+        pos = self.pair_pos[:self.pair_count]
+        self.pair_start[:self.size] = np.searchsorted(pos, positions, side="left")
+        self.pair_end[:self.size] = np.searchsorted(pos, positions, side="right")
+
+    def apply(self, rows, pairs, missing=()):
+        """Nạp lại các job (cùng dạng build); missing: id job đã bị xóa. Trả về số job thay đổi."""
+        skills = {}
+        for job_id, skill_id in pairs:
+            skills.setdefault(job_id, []).append(skill_id)
+        self._reserve(len(rows), len(pairs))
+        changed = 0
+
+        for job_id in missing:
+            pos = self.positions.get(job_id)
+            if pos is not None and self.alive[pos]:
+                self.alive[pos] = False
+                changed += 1
+
+        for job_id, status, location, industry, size, has_test, updated_at in rows:
+            if updated_at is not None and (self.synced_until is None or updated_at > self.synced_until):
+                self.synced_until = updated_at
+            alive = status != "CLOSED"
+            codes = [self._code(f, v) for f, v in zip(SINGLE_FACETS, (
+                _clean(location), _clean(industry), _clean(size), bool(has_test)
+            ))]
+            job_skills = sorted(skills.get(job_id, ()))
+
+            pos = self.positions.get(job_id)
+            if pos is None:
+                pos = self.positions[job_id] = self.size
+                if self.size and job_id < self.job_ids[self.size - 1]:
+                    self.ids_sorted = False
+                self.size += 1
+                self.job_ids[pos] = job_id
+            else:
+                start, end = self.pair_start[pos], self.pair_end[pos]
+                if self.alive[pos] == alive \
+                        and all(self.codes[f][pos] == c for f, c in zip(SINGLE_FACETS, codes)) \
+                        and sorted(self.pair_skill[start:end].tolist()) == job_skills:
+                    continue  # nạp lại nhưng facet không đổi
+                self.pair_alive[start:end] = False
+
+            self.alive[pos] = alive
+            for f, c in zip(SINGLE_FACETS, codes):
+                self.codes[f][pos] = c
+            start, end = self.pair_count, self.pair_count + len(job_skills)
+            self.pair_pos[start:end] = pos
+            self.pair_skill[start:end] = job_skills
+            self.pair_alive[start:end] = True
+            self.pair_start[pos], self.pair_end[pos] = start, end
+            self.pair_count = end
+            self.max_skill = max([self.max_skill] + job_skills)
+            changed += 1
+
+        if changed:
+            self.version = next(_versions)
+        if self.pair_count > 4096 and np.count_nonzero(self.pair_alive[:self.pair_count]) < self.pair_count // 2:
+            self._compact_pairs()
+        return changed
+
+    def _compact_pairs(self):
+        keep = np.flatnonzero(self.pair_alive[:self.pair_count])
+        keep = keep[np.argsort(self.pair_pos[keep], kind="stable")]
+        count = len(keep)
+        self.pair_pos[:count], self.pair_skill[:count] = self.pair_pos[keep], self.pair_skill[keep]
+        self.pair_alive[:count] = True
+        self.pair_alive[count:self.pair_count] = False
+        self.pair_count = count
+        self._set_pair_ranges()
+
+    # --- đọc ---
+    def _masks(self, selected):
+        n, p = self.size, self.pair_count
+        masks = {}
+        for facet, values in selected.items():
+            if facet == "skills":
+                table = np.zeros(self.max_skill + 1, dtype=bool)
+                table[[v for v in values if 0 <= v <= self.max_skill]] = True
+                hit = self.pair_alive[:p] & table[self.pair_skill[:p]]
+                mask = np.zeros(n, dtype=bool)
+                mask[self.pair_pos[:p][hit]] = True
+            else:
+                # mã -1 (không có giá trị) tra vào phần tử cuối, luôn False
+                table = np.zeros(len(self.values[facet]) + 1, dtype=bool)
+                table[[self.lookup[facet][v] for v in values if v in self.lookup[facet]]] = True
+                mask = table[self.codes[facet][:n]]
+            masks[facet] = mask
+        return masks
+
+    def matches(self, selected):
+        """Mặt nạ các job đang mở khớp bộ lọc (selected: facet -> tập giá trị đã chọn)."""
+        matched = self.alive[:self.size].copy()
+        for mask in self._masks(selected).values():
+            matched &= mask
+        return matched
+
+    def counts(self, selected):
+        """(số job khớp, facet -> {mã giá trị (skill: skill id): số job}); mỗi facet bỏ qua bộ lọc của chính nó."""
+        n, p = self.size, self.pair_count
+        masks = self._masks(selected)
+        alive = self.alive[:n]
+        pair_pos, pair_skill, pair_alive = self.pair_pos[:p], self.pair_skill[:p], self.pair_alive[:p]
+
+        def combined(skip=None):
+            mask = alive.copy()
+            for facet, m in masks.items():
+                if facet != skip:
+                    mask &= m
+            return mask
+
+        matched = combined()
+        counts = {}
+        for facet in FACETS:
+            mask = combined(facet) if facet in masks else matched
+            if facet == "skills":
+                bins = np.bincount(pair_skill[pair_alive & mask[pair_pos]])
+            else:
+                codes = self.codes[facet][:n][mask]
+                bins = np.bincount(codes[codes >= 0], minlength=len(self.values[facet]))
+            counts[facet] = {int(code): int(bins[code]) for code in np.flatnonzero(bins)}
+        return int(np.count_nonzero(matched)), counts
+
+    def page(self, matched, after=None, limit=20):
+        """Tối đa limit + 1 id job khớp, giảm dần, nhỏ hơn `after`."""
+        ids = self.job_ids[:self.size][matched]
+        if not self.ids_sorted:
+            ids = np.sort(ids)
+        end = len(ids) if after is None else int(np.searchsorted(ids, after))
+        return [int(i) for i in ids[max(0, end - limit - 1):end][::-1]]
+
+
+def _grow(array, capacity, fill=0):
+    grown = np.full(capacity, fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+_index = None
+_next_sync = 0.0
+_pending = {"job": set(), "company": set()}  # job / công ty đã commit thay đổi, chờ nạp lại
+_lock = threading.Lock()
+# (version, bộ lọc) -> số đếm; (version, bộ lọc, cursor, limit) -> id job của trang
+_counts_cache = TTLCache(maxsize=int(os.getenv("FACET_CACHE_SIZE", "256")), ttl=600)
+
+
+def _fetch(condition):
+    """Dữ liệu facet của các job thỏa `condition` (None = mọi job): (rows theo id, cặp job-skill)."""
+    has_test = exists().where(SkillTest.jobId == Job.id)
+    query = db_session.query(
+        Job.id, Job.status, Job.location, CompanyProfile.industry, CompanyProfile.size,
+        has_test, Job.updatedAt
+    ).outerjoin(CompanyProfile, CompanyProfile.companyId == Job.companyId)
+    skill_query = db_session.query(JobSkill.jobId, JobSkill.skillId)
+    if condition is not None:
+        query = query.filter(condition)
+        skill_query = skill_query.join(Job, Job.id == JobSkill.jobId).filter(condition)
+    # chạy thẳng trên connection: tuple thô, bỏ qua lớp nạp kết quả của ORM (nhanh hơn ~2 lần)
+    conn = db_session.connection()
+    rows = conn.execute(query.order_by(Job.id).statement).all()
+    pairs = conn.execute(skill_query.statement).all()
+    return [tuple(r) for r in rows], [tuple(p) for p in pairs]
+
+
+def _load_skill_names(index, pairs):
+    unknown = list({skill_id for _, skill_id in pairs} - index.skill_names.keys())
+    for i in range(0, len(unknown), CHUNK_SIZE):
+        index.skill_names.update(
+            db_session.query(Skill.id, Skill.name).filter(Skill.id.in_(unknown[i:i + CHUNK_SIZE]))
+        )
+
+
+def load_facet_index():
+    """Nạp index facet từ toàn bộ jobs (2 câu SELECT + tên skill). Trả về số job đang mở."""
+    global _index, _next_sync
+    with _lock:
+        # thay đổi đã commit trước lúc này nằm sẵn trong dữ liệu sắp nạp
+        _pending["job"].clear()
+        _pending["company"].clear()
+    rows, pairs = _fetch(None)
+    index = FacetIndex.build(rows, pairs)
+    _load_skill_names(index, pairs)
+    with _lock:
+        _index = index
+        _next_sync = time.monotonic() + FACET_SYNC_INTERVAL
+    return int(np.count_nonzero(index.alive[:index.size]))
+
+
+def clear_facet_index():
+    global _index
+    with _lock:
+        _index = None
+        _pending["job"].clear()
+        _pending["company"].clear()
+    _counts_cache.clear()
+
+
+def sync_facet_index(force=False):
+    """
+    Nạp lại các job đã đổi: job commit trong process này, và (mỗi FACET_SYNC_INTERVAL
+    giây hoặc khi force) job có updatedAt mới. Trả về số job thay đổi.
+    """
+    global _next_sync
+    if _index is None:
+        load_facet_index()
+        return 0
+    with _lock:
+        index = _index
+        job_ids, company_ids = list(_pending["job"]), list(_pending["company"])
+        _pending["job"].clear()
+        _pending["company"].clear()
+        due = force or time.monotonic() >= _next_sync
+        if due:
+            _next_sync = time.monotonic() + FACET_SYNC_INTERVAL
+
+    conditions = [Job.id.in_(job_ids[i:i + CHUNK_SIZE]) for i in range(0, len(job_ids), CHUNK_SIZE)]
+    conditions += [Job.companyId.in_(company_ids[i:i + CHUNK_SIZE])
+                   for i in range(0, len(company_ids), CHUNK_SIZE)]
+    if due and index.synced_until is not None:
+        conditions.append(Job.updatedAt >= index.synced_until - SYNC_OVERLAP)
+    if not conditions:
+        return 0
+
+    rows, pairs = [], []
+    for condition in conditions:
+        part_rows, part_pairs = _fetch(condition)
+        rows += part_rows
+        pairs += part_pairs
+    missing = set(job_ids) - {r[0] for r in rows}
+    _load_skill_names(index, pairs)
+    with _lock:
+        return index.apply(rows, pairs, missing)
+
+
+def parse_facet_filters(args):
+    """
+    Bộ lọc từ query string (MultiDict): ?location=Hà Nội&location=Đà Nẵng&industry=
+    &size=&skill=<id>&hasTest=true. Giá trị rỗng bị bỏ qua.
+    """
+    selected = {}
+    for facet in ("location", "industry", "size"):
+        values = {v.strip() for v in args.getlist(facet) if v.strip()}
+        if values:
+            selected[facet] = values
+    try:
+        skills = {int(v) for v in args.getlist("skill") if v.strip()}
+    except ValueError:
+        raise ServiceError("skill phải là id", 400)
+    if skills:
+        selected["skills"] = skills
+    has_test = {v.strip().lower() for v in args.getlist("hasTest") if v.strip()}
+    if has_test:
+        if not has_test <= {"true", "false", "1", "0"}:
+            raise ServiceError("hasTest phải là true / false", 400)
+        selected["hasTest"] = {v in ("true", "1") for v in has_test}
+    return selected
+
+
+def get_job_facets(selected=None, cursor=None, limit=None):
+    """
+    {"total", "facets": {facet: [{"value", "count"} (+ "label" với skills), ...]},
+    "items": [job...], "nextCursor"} — job chưa CLOSED khớp bộ lọc, mới nhất (id lớn) trước.
+    Mỗi facet trả tối đa FACET_LIMIT giá trị nhiều job nhất, luôn kèm giá trị đang chọn.
+    """
+    selected = {f: set(v) for f, v in (selected or {}).items() if v}
+    limit = parse_limit(limit)
+    after = decode_cursor(cursor, [Job.id])[0] if cursor else None
+    sync_facet_index()
+
+    key = tuple(sorted((f, tuple(sorted(v, key=str))) for f, v in selected.items()))
+    with _lock:
+        index = _index
+        cached = _counts_cache.get((index.version, key))
+        if cached is None:
+            cached = index.counts(selected)
+            _counts_cache.set((index.version, key), cached)
+        total, counts = cached
+        page = _counts_cache.get((index.version, key, after, limit))
+        if page is None:
+            page = index.page(index.matches(selected), after, limit)
+            _counts_cache.set((index.version, key, after, limit), page)
+        values = {f: list(index.values[f]) for f in SINGLE_FACETS}
+        skill_names = dict(index.skill_names)
+
+    facets = {}
+    for facet in FACETS:
+        entries = sorted((
+            {"value": code if facet == "skills" else values[facet][code], "count": count}
+            for code, count in counts[facet].items()
+        ), key=lambda e: (-e["count"], str(e["value"])))
+        chosen = selected.get(facet, set())
+        shown = entries[:FACET_LIMIT] + [e for e in entries[FACET_LIMIT:] if e["value"] in chosen]
+        counted = {e["value"] for e in entries}
+        shown += [{"value": v, "count": 0} for v in sorted(chosen, key=str) if v not in counted]
+        if facet == "skills":
+            for e in shown:
+                e["label"] = skill_names.get(e["value"])
+        facets[facet] = shown
+
+    next_cursor = encode_cursor([page[limit - 1]]) if len(page) > limit else None
+    return {"total": total, "facets": facets, "items": load_jobs(page[:limit]), "nextCursor": next_cursor}
+
+
+# CHANGE CAPTURE
+def mark_changed(jobs=(), companies=()):
+    """Job / công ty cần nạp lại vào index facet khi commit (cho câu ghi hàng loạt ngoài ORM)."""
+    pending = db_session.info.setdefault("facet_changes", {"job": set(), "touch": set(), "company": set()})
+    pending["touch"].update(jobs)
+    pending["company"].update(companies)
+
+
+@event.listens_for(db_session, "after_flush")
+def _collect_facet_changes(session, flush_context):
+    pending = session.info.setdefault("facet_changes", {"job": set(), "touch": set(), "company": set()})
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Job):
+            pending["job"].add(obj.id)              # updatedAt đã tự cập nhật
+        elif isinstance(obj, Application):
+            pending["job"].add(obj.jobId)           # job đóng khi đủ người
+        elif isinstance(obj, (JobSkill, SkillTest)):
+            pending["touch"].add(obj.jobId)
+        elif isinstance(obj, CompanyProfile):
+            attrs = inspect(obj).attrs
+            if obj in session.new or obj in session.deleted \
+                    or attrs.industry.history.has_changes() or attrs.size.history.has_changes():
+                pending["company"].add(obj.companyId)
+
+
+@event.listens_for(db_session, "before_commit")
+def _touch_changed_jobs(session):
+    session.flush()
+    pending = session.info.get("facet_changes")
+    if not pending:
+        return
+    touch = {j for j in pending["touch"] if j is not None}
+    companies = {c for c in pending["company"] if c is not None}
+    if touch or companies:
+        # process khác thấy thay đổi qua updatedAt (sync_facet_index)
+        session.execute(
+            update(Job).where(or_(Job.id.in_(touch), Job.companyId.in_(companies)))
+            .values(updatedAt=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(db_session, "after_commit")
+def _queue_facet_changes(session):
+    pending = session.info.pop("facet_changes", None)
+    if not pending:
+        return
+    with _lock:
+        _pending["job"].update(j for j in pending["job"] | pending["touch"] if j is not None)
+        _pending["company"].update(c for c in pending["company"] if c is not None)
+
+
+@event.listens_for(db_session, "after_rollback")
+def _discard_facet_changes(session):
+    session.info.pop("facet_changes", None)
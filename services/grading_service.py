@@ -0,0 +1,344 @@
+"""
+Chấm bài test tự động theo Question.correctAnswer.
+
+Chế độ chấm (Question.gradingMode; để trống = tự chọn: có options -> choice,
+không có -> normalized):
+  exact       so khớp nguyên văn (chỉ bỏ khoảng trắng 2 đầu)
+  normalized  không phân biệt hoa thường, bỏ dấu câu và khoảng trắng thừa
+  choice      trắc nghiệm: đáp án là nhãn ("B") hoặc nhiều nhãn ("A,C"); câu trả lời
+              là nhãn hoặc nội dung lựa chọn
+
+Câu không có correctAnswer (tự luận) không tính điểm.
+TestResult.score = round(số câu đúng / số câu chấm được * SkillTest.totalScore).
+
+Từng câu trả lời được lưu trong bảng test_answers (đúng / sai, điểm câu) để xem chi tiết
+và thống kê theo câu hỏi bằng SQL. Đổi đáp án -> chấm lại mọi bài đã nộp bằng
+`flask regrade-test <testId>` (regrade_test đọc theo từng lô, không nạp cả bảng).
+"""
+import json
+import re
+import string
+import unicodedata
+
+from sqlalchemy import and_, exists, insert, update
+
+from database import db_session
+from models.job_models import SkillTest, Question
+from models.app_models import TestResult, TestAnswer
+from .base import ServiceError
+
+GRADING_MODES = ("exact", "normalized", "choice")
+REGRADE_CHUNK = 500
+
+_LABELS = string.ascii_uppercase
+_LABEL_SPLIT = re.compile(r"[,;/|\s]+")
+_OPTION_PREFIX = re.compile(r"^\s*([A-Za-z])\s*[.)]\s+")
+
+
+def normalize_answer(text):
+    """" Hà  Nội! " -> "hà nội" (NFC, casefold, bỏ dấu câu, gộp khoảng trắng)."""
+    text = unicodedata.normalize("NFC", str(text or "")).casefold()
+    text = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text)
+    return " ".join(text.split())
+
+
+def parse_options(raw):
+    """
+    Question.options -> list nội dung lựa chọn theo thứ tự A, B, C...
+    Nhận JSON list / dict {"A": ...}, hoặc text mỗi dòng 1 lựa chọn ("A. ..." hoặc không nhãn)
+    hay phân cách bằng "|" / ";".
+    """
+    raw = (raw or "").strip()
+    if not raw:
+        return []
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = None
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    if isinstance(value, dict):
+        return [str(value[k]) for k in sorted(value)]
+
+    separator = "\n" if "\n" in raw else "|" if "|" in raw else ";" if ";" in raw else None
+    if separator is None:
+        return []
+    parts = [p.strip() for p in raw.split(separator) if p.strip()]
+    return [_OPTION_PREFIX.sub("", p, count=1) for p in parts]
+
+
+def parse_answers(raw):
+    """
+    Câu trả lời đã nộp -> {questionId: câu trả lời}. Nhận dict {"answer_12": ...} / {"12": ...}
+    (form HTML / API) hoặc list [{"questionId": 12, "answer": ...}]; chuỗi JSON được giải mã trước.
+    """
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return {}
+    items = []
+    if isinstance(raw, dict):
+        items = raw.items()
+    elif isinstance(raw, list):
+        items = [(a.get("questionId"), a.get("answer")) for a in raw if isinstance(a, dict)]
+
+    answers = {}
+    for key, value in items:
+        key = str(key or "")
+        if key.startswith("answer_"):
+            key = key[len("answer_"):]
+        if key.isdigit():
+            answers[int(key)] = value
+    return answers
+
+
+class AnswerKey:
+    """
+    Đáp án của 1 bài test: [(questionId, mode, đáp án đã chuẩn hóa, options)];
+    đáp án None = câu tự luận (không chấm tự động).
+    """
+
+    def __init__(self, questions):
+        self.items = []
+        for question_id, options, correct, mode in questions:
+            options = parse_options(options)
+            mode = mode if mode in GRADING_MODES else ("choice" if options else "normalized")
+            if not (correct or "").strip():
+                expected = None
+            elif mode == "choice":
+                expected = _choice_labels(correct, options)
+            elif mode == "exact":
+                expected = correct.strip()
+            else:
+                expected = normalize_answer(correct)
+            self.items.append((question_id, mode, expected, options))
+        self.gradable = sum(1 for item in self.items if item[2] is not None)
+
+    @classmethod
+    def for_test(cls, test_id):
+        return cls(db_session.query(
+            Question.id, Question.options, Question.correctAnswer, Question.gradingMode
+        ).filter(Question.testId == test_id).order_by(Question.id))
+
+    def mark(self, answers, total_score):
+        """
+        answers: {questionId: câu trả lời} -> list (questionId, câu trả lời, đúng?, điểm câu,
+        nhãn đã chọn) cho các câu đã trả lời; đúng? / điểm là None với câu tự luận, nhãn
+        ("A" / "A,C") chỉ có với câu trắc nghiệm chọn đúng lựa chọn có trong options.
+        """
+        per_question = (total_score or 0) / self.gradable if self.gradable else 0.0
+        marked = []
+        for question_id, mode, expected, options in self.items:
+            answer = answers.get(question_id)
+            if answer is None:
+                continue
+            choice = None
+            if mode == "choice":
+                labels = _choice_labels(answer, options)
+                if labels and labels <= set(_LABELS[:len(options)]):
+                    choice = ",".join(sorted(labels))
+            if expected is None:
+                marked.append((question_id, answer, None, None, choice))
+                continue
+            if mode == "choice":
+                correct = labels == expected
+            elif mode == "exact":
+                correct = str(answer).strip() == expected
+            else:
+                correct = normalize_answer(answer) == expected
+            marked.append((question_id, answer, correct, per_question if correct else 0.0, choice))
+        return marked
+
+
+def _choice_labels(answer, options):
+    """"b" / "A, C" / ["A", "C"] / nội dung lựa chọn -> frozenset nhãn ({"B"}, {"A", "C"})."""
+    labels = _LABELS[:len(options)]
+    values = answer if isinstance(answer, (list, tuple)) else [answer]
+    by_text = {normalize_answer(text): label for label, text in zip(labels, options)}
+
+    chosen = set()
+    for value in values:
+        value = str(value or "").strip()
+        text = normalize_answer(value)
+        if text in by_text:
+            chosen.add(by_text[text])
+            continue
+        tokens = [t for t in _LABEL_SPLIT.split(value.upper()) if t]
+        if tokens and all(len(t) == 1 and t in (labels or _LABELS) for t in tokens):
+            chosen.update(tokens)
+        elif value:
+            chosen.add(value)   # không khớp lựa chọn nào -> luôn sai
+    return frozenset(chosen)
+
+
+def _answer_text(answer):
+    # multi-select (list) lưu dạng "A, C" — _choice_labels đọc lại được khi chấm lại
+    if isinstance(answer, (list, tuple)):
+        return ", ".join(str(a) for a in answer)
+    return str(answer)
+
+
+def _score(key, marked, total_score):
+    correct = sum(1 for _, _, is_correct, _, _ in marked if is_correct)
+    return round(correct * (total_score or 0) / key.gradable) if key.gradable else 0
+
+
+# SUBMISSION
+def record_submission(result, test, answers):
+    """
+    Chấm 1 bài nộp (answers thô từ form / API), ghi từng câu vào test_answers bằng 1 câu
+    INSERT hàng loạt (thay câu trả lời cũ của bài) và cập nhật result.score. Chưa commit.
+    """
+    key = AnswerKey.for_test(test.id)
+    marked = key.mark(parse_answers(answers), test.totalScore)
+
+    if result.id is None:
+        db_session.add(result)
+        db_session.flush()
+    else:
+        db_session.query(TestAnswer).filter(TestAnswer.resultId == result.id)\
+            .delete(synchronize_session=False)
+    if marked:
+        db_session.execute(insert(TestAnswer), [{
+            "resultId": result.id, "questionId": question_id, "answer": _answer_text(answer),
+            "correct": correct, "points": points, "choice": choice
+        } for question_id, answer, correct, points, choice in marked])
+
+    result.score = _score(key, marked, test.totalScore)
+    return result
+
+
+def list_result_answers(test_id, result_id):
+    """
+    Câu hỏi của bài test kèm câu trả lời của 1 bài nộp (1 câu SQL, LEFT JOIN test_answers):
+    [{"questionId", "question", "answer", "correct", "points"}], answer None = không trả lời.
+    """
+    rows = db_session.query(
+        Question.id, Question.content, TestAnswer.answer, TestAnswer.correct, TestAnswer.points
+    ).outerjoin(TestAnswer, and_(
+        TestAnswer.questionId == Question.id, TestAnswer.resultId == result_id
+    )).filter(Question.testId == test_id).order_by(Question.id).all()
+    return [{
+        "questionId": r.id,
+        "question": r.content,
+        "answer": r.answer,
+        "correct": r.correct,
+        "points": r.points
+    } for r in rows]
+
+
+# BATCH
+def _answer_chunks(test_id, chunk_size):
+    """Các lô (list resultId, {resultId: {questionId: câu trả lời}}) của test, keyset theo id."""
+    last_id = 0
+    while True:
+        result_ids = [r for (r,) in db_session.query(TestResult.id).filter(
+            TestResult.testId == test_id, TestResult.id > last_id
+        ).order_by(TestResult.id).limit(chunk_size)]
+        if not result_ids:
+            return
+
+        answers = {result_id: {} for result_id in result_ids}
+        for result_id, question_id, answer in db_session.query(
+            TestAnswer.resultId, TestAnswer.questionId, TestAnswer.answer
+        ).filter(TestAnswer.resultId.in_(result_ids)):
+            answers[result_id][question_id] = answer
+        yield result_ids, answers
+        last_id = result_ids[-1]
+
+
+def regrade_test(test_id, chunk_size=REGRADE_CHUNK):
+    """
+    Chấm lại mọi TestResult của 1 bài test theo đáp án hiện tại, từng lô `chunk_size`
+    bài (keyset theo id, commit mỗi lô): đọc test_answers của cả lô bằng 1 câu SQL,
+    cập nhật correct / points / choice và điểm bằng UPDATE hàng loạt. Trả về số bài đã chấm lại.
+    """
+    test = db_session.query(SkillTest).filter(SkillTest.id == test_id).first()
+    if not test:
+        raise ServiceError("Test not found", 404)
+    key = AnswerKey.for_test(test_id)
+    total_score = test.totalScore
+
+    regraded = 0
+    for result_ids, answers in _answer_chunks(test_id, chunk_size):
+        answer_rows, score_rows = [], []
+        for result_id, result_answers in answers.items():
+            marked = key.mark(result_answers, total_score)
+            answer_rows += [{
+                "resultId": result_id, "questionId": question_id,
+                "correct": correct, "points": points, "choice": choice
+            } for question_id, _, correct, points, choice in marked]
+            score_rows.append({"id": result_id, "score": _score(key, marked, total_score)})
+
+        if answer_rows:
+            db_session.execute(update(TestAnswer), answer_rows)
+        db_session.execute(update(TestResult), score_rows)
+        db_session.commit()
+        regraded += len(result_ids)
+
+    # đúng / sai từng câu có thể đổi mà tổng điểm giữ nguyên -> version cache không đổi
+    from .analytics_service import invalidate_analytics
+    invalidate_analytics(test_id)
+    return regraded
+
+
+def backfill_answer_choices(chunk_size=REGRADE_CHUNK):
+    """
+    Điền test_answers.choice (cột mới) cho các câu trắc nghiệm đã nộp, giữ nguyên
+    correct / points / điểm. Trả về số câu trả lời đã cập nhật.
+    """
+    test_ids = [t for (t,) in db_session.query(Question.testId).filter(
+        Question.options.isnot(None), Question.options != ""
+    ).distinct()]
+
+    updated = 0
+    for test_id in test_ids:
+        key = AnswerKey.for_test(test_id)
+        for _, answers in _answer_chunks(test_id, chunk_size):
+            rows = [{
+                "resultId": result_id, "questionId": question_id, "choice": choice
+            } for result_id, result_answers in answers.items()
+              for question_id, _, _, _, choice in key.mark(result_answers, 0) if choice is not None]
+            if rows:
+                db_session.execute(update(TestAnswer), rows)
+            db_session.commit()
+            updated += len(rows)
+    return updated
+
+
+def migrate_legacy_answers(chunk_size=REGRADE_CHUNK):
+    """
+    Chuyển TestResult.answers (JSON cũ) của các bài chưa có dòng test_answers sang bảng
+    test_answers, từng lô `chunk_size`; giữ nguyên điểm đã lưu. Trả về số bài đã chuyển.
+    """
+    keys = {}
+    migrated, last_id = 0, 0
+    while True:
+        chunk = db_session.query(TestResult.id, TestResult.testId, TestResult.answers).filter(
+            TestResult.id > last_id,
+            TestResult.answers.isnot(None),
+            ~exists().where(TestAnswer.resultId == TestResult.id)
+        ).order_by(TestResult.id).limit(chunk_size).all()
+        if not chunk:
+            return migrated
+
+        missing = {test_id for _, test_id, _ in chunk} - set(keys)
+        for test_id, total_score in db_session.query(SkillTest.id, SkillTest.totalScore)\
+                .filter(SkillTest.id.in_(missing)):
+            keys[test_id] = (AnswerKey.for_test(test_id), total_score)
+
+        rows = []
+        for result_id, test_id, raw in chunk:
+            if test_id not in keys:
+                continue
+            key, total_score = keys[test_id]
+            rows += [{
+                "resultId": result_id, "questionId": question_id, "answer": _answer_text(answer),
+                "correct": correct, "points": points, "choice": choice
+            } for question_id, answer, correct, points, choice in key.mark(parse_answers(raw), total_score)]
+        if rows:
+            db_session.execute(insert(TestAnswer), rows)
+        db_session.commit()
+        migrated += len(chunk)
+        last_id = chunk[-1].id
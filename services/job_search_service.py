@@ -0,0 +1,120 @@
+"""
+Tìm kiếm job full-text trên title, description, location (index: models/job_models.py).
+
+Câu tìm kiếm được tách thành từ, job phải chứa mọi từ (AND). Từ cuối khớp theo
+prefix để tìm ngay khi đang gõ ("lập trình pyth" -> Python); từ kết thúc bằng "*"
+cũng là prefix. Lọc theo địa điểm dùng luôn index (cụm từ trong cột location).
+
+  SQLite      FTS5 MATCH, xếp hạng BM25 (title x10, location x3, description x1),
+              không phân biệt dấu ("ha noi" khớp "Hà Nội")
+  PostgreSQL  tsvector @@ to_tsquery('simple'), xếp hạng ts_rank_cd theo trọng số
+              A / B / C (PostgreSQL không có BM25); phân biệt dấu
+  DB khác     LIKE trên 3 cột, mới nhất trước (không có index)
+
+Mặc định xếp hạng mọi job khớp (ORDER BY rank LIMIT trong câu full-text). Bật
+JOB_SEARCH_CANDIDATES > 0 để chỉ xếp hạng chừng đó job khớp mới nhất: câu tìm kiếm
+quá rộng (hàng trăm nghìn job) nhanh hơn vì duyệt index theo id giảm dần dừng sớm
+được, nhưng job cũ liên quan hơn có thể bị bỏ qua.
+
+Chỉ 2 câu SQL: lấy id theo thứ hạng (LIMIT trong DB), rồi nạp các job đó.
+
+Cấu hình (env): JOB_SEARCH_CANDIDATES (mặc định 0 = xếp hạng mọi job khớp).
+"""
+import os
+import re
+import weakref
+
+from sqlalchemy import and_, or_, text
+
+from database import db_session
+from models import Job
+from models.job_models import has_job_search_index
+from .pagination import parse_limit
+from .recruitment_service import load_jobs
+
+SEARCH_CANDIDATES = int(os.getenv("JOB_SEARCH_CANDIDATES", "0"))
+
+_TOKEN = re.compile(r"\w+\*?")
+
+# engine -> có index full-text không (kiểm tra 1 lần cho mỗi engine)
+_index_available = weakref.WeakKeyDictionary()
+
+
+def parse_query(q):
+    """"Python  dev*" -> [("python", False), ("dev", True)]; từ cuối luôn là prefix."""
+    tokens = [(raw.rstrip("*").lower(), raw.endswith("*")) for raw in _TOKEN.findall(q or "")]
+    if tokens:
+        tokens[-1] = (tokens[-1][0], True)
+    return tokens
+
+
+def search_jobs(q, status="open", location=None, limit=None):
+    """
+    Job khớp `q`, thứ hạng cao trước. status: lọc đúng giá trị Job.status (None = mọi job);
+    location: cụm từ phải có trong Job.location.
+    """
+    tokens = parse_query(q)
+    places = [t for t, _ in parse_query(location)]
+    limit = parse_limit(limit)
+    if not tokens and not places:
+        return []
+
+    bind = db_session.get_bind()
+    if bind not in _index_available:
+        with bind.connect() as conn:
+            _index_available[bind] = has_job_search_index(conn)
+    dialect = bind.dialect.name if _index_available[bind] else None
+
+    if dialect == "sqlite":
+        ids = _search_sqlite(tokens, places, status, limit)
+    elif dialect == "postgresql":
+        ids = _search_postgres(tokens, places, status, limit)
+    else:
+        ids = _search_like(tokens, places, status, limit)
+    return load_jobs(ids)
+
+
+def _search_sqlite(tokens, places, status, limit):
+    # index lưu "đ" thành "d" (models/job_models.py)
+    terms = [f'"{t.replace("đ", "d")}"' + ("*" if prefix else "") for t, prefix in tokens]
+    if places:
+        terms.append('location : "' + " ".join(places).replace("đ", "d") + '"')
+    sql = ("SELECT jobs.id, jobs_fts.rank AS rank FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid "
+           "WHERE jobs_fts MATCH :match")
+    if status:
+        sql += " AND jobs.status = :status"
+    if SEARCH_CANDIDATES > 0:
+        sql = f"SELECT id, rank FROM ({sql} ORDER BY jobs_fts.rowid DESC LIMIT :candidates)"
+    sql = f"SELECT id FROM ({sql}) ORDER BY rank, id DESC LIMIT :limit"
+    return [r for (r,) in db_session.execute(text(sql), {
+        "match": " ".join(terms), "status": status, "candidates": SEARCH_CANDIDATES, "limit": limit
+    })]
+
+
+def _search_postgres(tokens, places, status, limit):
+    terms = [f"{t}:*" if prefix else t for t, prefix in tokens]
+    if places:
+        terms.append("(" + " <-> ".join(f"{t}:B" for t in places) + ")")
+    sql = ('SELECT id, "searchVector" AS vector FROM jobs '
+           """WHERE "searchVector" @@ to_tsquery('simple', :match)""")
+    if status:
+        sql += " AND status = :status"
+    if SEARCH_CANDIDATES > 0:
+        sql += " ORDER BY id DESC LIMIT :candidates"
+    sql = (f"SELECT id FROM ({sql}) candidates "
+           "ORDER BY ts_rank_cd(vector, to_tsquery('simple', :match)) DESC, id DESC LIMIT :limit")
+    return [r for (r,) in db_session.execute(text(sql), {
+        "match": " & ".join(terms), "status": status, "candidates": SEARCH_CANDIDATES, "limit": limit
+    })]
+
+
+def _search_like(tokens, places, status, limit):
+    conditions = [or_(
+        Job.title.ilike(f"%{t}%"), Job.description.ilike(f"%{t}%"), Job.location.ilike(f"%{t}%")
+    ) for t, _ in tokens]
+    conditions += [Job.location.ilike(f"%{t}%") for t in places]
+    if status:
+        conditions.append(Job.status == status)
+    return [r for (r,) in db_session.query(Job.id).filter(and_(*conditions))
+            .order_by(Job.id.desc()).limit(limit)]
+
@@ -0,0 +1,124 @@
+"""
+Server nói giao thức Redis (RESP) tối giản, thay Redis thật cho môi trường dev / 1 máy.
+
+Chỉ gồm các lệnh RedisStore dùng (PING, SET ... PX NX, INCRBY, GET, MGET, PTTL, DEL,
+SCAN, FLUSHDB), dữ liệu giữ trong MemoryStore nên cũng bị giới hạn LIMITER_MAX_KEYS key.
+Các worker trỏ LIMITER_STORAGE_URI=redis://127.0.0.1:<port>/0 vào đây để dùng chung bộ đếm.
+
+Chạy:  flask --app app limiter-server [--port 6390]
+"""
+import socket
+import socketserver
+import threading
+
+from .limiter_store import LimiterStoreError, MemoryStore, read_reply
+
+
+def encode_reply(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, LimiterStoreError):
+        return b"-ERR %s\r\n" % str(value).encode("utf-8")
+    if isinstance(value, bool):
+        return b"+OK\r\n" if value else b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode("utf-8")
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+    data = value if isinstance(value, bytes) else str(value).encode("utf-8")
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class CommandHandler:
+    def __init__(self, store):
+        self.store = store
+
+    def execute(self, args):
+        name, *args = [arg.decode("utf-8") for arg in args]
+        method = getattr(self, "cmd_" + name.lower(), None)
+        if method is None:
+            raise LimiterStoreError(f"unknown command '{name}'")
+        return method(*args)
+
+    def cmd_ping(self):
+        return "PONG"
+
+    def cmd_set(self, key, value, *options):
+        # chỉ dạng RedisStore gửi: SET key <số> PX <ms> NX
+        options = [option.upper() for option in options]
+        if "NX" not in options or "PX" not in options:
+            raise LimiterStoreError("only SET key value PX ms NX is supported")
+        ttl = int(options[options.index("PX") + 1]) / 1000
+        if self.store.get_many([key])[0] or self.store.expires_in(key):
+            return None
+        self.store.incr(key, int(value), ttl)
+        return True
+
+    def cmd_incrby(self, key, amount):
+        return self.store.incr(key, int(amount))
+
+    def cmd_get(self, key):
+        return self.cmd_mget(key)[0]
+
+    def cmd_mget(self, *keys):
+        return [None if not self.store.expires_in(key) else str(count)
+                for key, count in zip(keys, self.store.get_many(keys))]
+
+    def cmd_pttl(self, key):
+        ttl = self.store.expires_in(key)
+        if not ttl:
+            return -2
+        return -1 if ttl == float("inf") else int(ttl * 1000)
+
+    def cmd_del(self, *keys):
+        return self.store.delete(*keys)
+
+    def cmd_scan(self, cursor, *options):
+        # trả mọi key khớp trong 1 lượt (cursor "0")
+        pattern = options[options.index("MATCH") + 1] if "MATCH" in options else "*"
+        return ["0", self.store.keys(pattern.rstrip("*"))]
+
+    def cmd_flushdb(self):
+        self.store.clear_all()
+        return "OK"
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        # client gửi pipeline và chờ đủ phản hồi: không để Nagle giữ gói nhỏ
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        commands = self.server.commands
+        while True:
+            try:
+                args = read_reply(self.rfile)
+            except (ConnectionError, OSError):
+                return
+            try:
+                reply = commands.execute(args)
+            except (LimiterStoreError, TypeError, ValueError, IndexError) as e:
+                reply = e if isinstance(e, LimiterStoreError) else LimiterStoreError(str(e))
+            self.wfile.write(encode_reply(reply))
+
+
+class LimiterServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=6390, store=None):
+        super().__init__((host, port), _RequestHandler)
+        self.commands = CommandHandler(store or MemoryStore())
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        """Chạy trong thread nền (cho test)."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,478 @@
+"""
+Bộ đếm giới hạn tần suất dùng chung giữa các worker (đăng nhập sai, Flask-Limiter).
+
+Mỗi giới hạn là 1 "sliding window counter": đếm theo khung cố định `window` giây
+(key "<key>/<window>/<số thứ tự khung>") và ước lượng số lần trong `window` giây gần
+nhất = khung trước * phần còn nằm trong cửa sổ + khung hiện tại. Mỗi lần kiểm tra chỉ
+đọc / tăng 2 bộ đếm -> O(1), không giữ danh sách thời điểm như sliding log.
+
+Backend (env LIMITER_STORAGE_URI):
+  memory://                  trong process (mặc định; chỉ đúng khi chạy 1 process,
+                             app cảnh báo khi WEB_CONCURRENCY > 1)
+  sqlite:///limiter.db       file SQLite dùng chung cho các worker trên cùng máy
+  redis://host:6379/0        Redis (hoặc `flask --app app limiter-server`) cho nhiều máy
+
+Mọi backend có trần bộ nhớ cố định: tối đa LIMITER_MAX_KEYS bộ đếm (memory: bỏ key ít
+dùng nhất; SQLite: dọn key hết hạn, rồi key sắp hết hạn nhất; Redis: key tự hết hạn).
+
+Flask-Limiter dùng cùng store qua storage "limiter://" (SharedStorage bên dưới).
+"""
+import itertools
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport
+
+LIMITER_STORAGE_URI = os.getenv("LIMITER_STORAGE_URI", "memory://")
+LIMITER_MAX_KEYS = int(os.getenv("LIMITER_MAX_KEYS", "100000"))
+# số worker của server (gunicorn đọc cùng biến này); chỉ dùng để cảnh báo memory://
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+REDIS_PREFIX = "limiter:"
+
+
+class LimiterStoreError(Exception):
+    """Lỗi từ backend (vd. Redis trả lỗi)."""
+
+
+class LimiterStore(ABC):
+    """
+    Lớp cơ sở: backend chỉ cần incr / get_many / expires_in / delete / clear_all,
+    phần sliding window dùng chung. Thiếu hàm nào -> lỗi ngay khi tạo store.
+    """
+
+    def __init__(self, clock=time.time):
+        # thời gian thực (không phải monotonic): các process phải cùng chia khung
+        self.clock = clock
+
+    # --- bộ đếm (backend cài đặt) ---
+    @abstractmethod
+    def incr(self, key, amount, ttl):
+        """Cộng `amount`; key chưa có / đã hết hạn -> tạo mới, hết hạn sau `ttl` giây."""
+        ...
+
+    @abstractmethod
+    def get_many(self, keys):
+        ...
+
+    @abstractmethod
+    def expires_in(self, key):
+        """Số giây còn lại của key (0 nếu không có)."""
+        ...
+
+    @abstractmethod
+    def delete(self, *keys):
+        ...
+
+    @abstractmethod
+    def clear_all(self):
+        ...
+
+    def ping(self):
+        return True
+
+    def incr_get(self, key, amount, ttl, other_key):
+        """incr(key) rồi đọc other_key; backend mạng gộp thành 1 lượt gửi."""
+        return self.incr(key, amount, ttl), self.get_many([other_key])[0]
+
+    # --- sliding window ---
+    def _window(self, key, window):
+        index, offset = divmod(self.clock(), window)
+        index = int(index)
+        # phần của khung trước còn nằm trong `window` giây gần nhất
+        weight = 1 - offset / window
+        return f"{key}/{window}/{index}", f"{key}/{window}/{index - 1}", weight
+
+    def hit(self, key, window, amount=1):
+        """Ghi `amount` lần, trả về số lần ước lượng trong `window` giây gần nhất."""
+        current_key, previous_key, weight = self._window(key, window)
+        current, previous = self.incr_get(current_key, amount, 2 * window, previous_key)
+        return previous * weight + current
+
+    def count(self, key, window):
+        current_key, previous_key, weight = self._window(key, window)
+        current, previous = self.get_many([current_key, previous_key])
+        return previous * weight + current
+
+    def acquire(self, key, limit, window, amount=1):
+        """Ghi nếu chưa vượt `limit`; vượt thì hoàn lại và trả False."""
+        current_key, previous_key, weight = self._window(key, window)
+        current, previous = self.incr_get(current_key, amount, 2 * window, previous_key)
+        if previous * weight + current > limit:
+            self.incr(current_key, -amount, 2 * window)
+            return False
+        return True
+
+    def sliding_window(self, key, window):
+        """(số khung trước, ttl khung trước, số khung hiện tại, ttl khung hiện tại) như thư viện limits."""
+        current_key, previous_key, weight = self._window(key, window)
+        current, previous = self.get_many([current_key, previous_key])
+        return previous, weight * window, current, weight * window + window
+
+    def clear(self, key, window):
+        current_key, previous_key, _ = self._window(key, window)
+        self.delete(current_key, previous_key)
+
+
+class MemoryStore(LimiterStore):
+    """Trong process, tối đa `max_keys` key (bỏ key ít dùng nhất khi đầy)."""
+
+    def __init__(self, max_keys=LIMITER_MAX_KEYS, clock=time.time):
+        super().__init__(clock)
+        self.max_keys = max_keys
+        self._data = OrderedDict()  # key -> [count, expires_at]
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def incr(self, key, amount, ttl=None):
+        """ttl=None: không hết hạn (như INCRBY của Redis trên key chưa có)."""
+        with self._lock:
+            now = self.clock()
+            entry = self._live(key, now)
+            if entry is None:
+                entry = self._data[key] = [0, now + ttl if ttl is not None else float("inf")]
+                if len(self._data) > self.max_keys:
+                    self._data.popitem(last=False)
+            else:
+                self._data.move_to_end(key)
+            entry[0] += amount
+            return entry[0]
+
+    def get_many(self, keys):
+        with self._lock:
+            now = self.clock()
+            return [entry[0] if (entry := self._live(key, now)) else 0 for key in keys]
+
+    def expires_in(self, key):
+        with self._lock:
+            entry = self._live(key, self.clock())
+            return max(0.0, entry[1] - self.clock()) if entry else 0.0
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def keys(self, prefix=""):
+        with self._lock:
+            now = self.clock()
+            return [key for key, entry in self._data.items() if key.startswith(prefix) and entry[1] > now]
+
+    def clear_all(self):
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+            return count
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore(LimiterStore):
+    """
+    File SQLite (WAL) dùng chung cho mọi worker trên cùng máy. Mỗi lần tăng là 1 câu
+    UPSERT ... RETURNING (nguyên tử giữa các process). Cứ PRUNE_EVERY lần ghi thì xóa key
+    hết hạn và cắt về `max_keys` key.
+    """
+
+    PRUNE_EVERY = 1000
+
+    _UPSERT = """
+        INSERT INTO rate_limits (key, count, expires_at) VALUES (:key, :amount, :expires_at)
+        ON CONFLICT(key) DO UPDATE SET
+            count = CASE WHEN rate_limits.expires_at <= :now THEN excluded.count
+                         ELSE rate_limits.count + excluded.count END,
+            expires_at = CASE WHEN rate_limits.expires_at <= :now THEN excluded.expires_at
+                              ELSE rate_limits.expires_at END
+        RETURNING count
+    """
+
+    def __init__(self, path, max_keys=LIMITER_MAX_KEYS, clock=time.time):
+        super().__init__(clock)
+        self.path = path
+        self.max_keys = max_keys
+        self._local = threading.local()
+        self._writes = itertools.count(1)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at)")
+
+    def _conn(self):
+        # 1 kết nối / thread / process (không dùng lại kết nối của process cha sau fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def incr(self, key, amount, ttl):
+        now = self.clock()
+        conn = self._conn()
+        count = conn.execute(self._UPSERT, {
+            "key": key, "amount": amount, "expires_at": now + ttl, "now": now
+        }).fetchone()[0]
+        if next(self._writes) % self.PRUNE_EVERY == 0:
+            self.prune()
+        return count
+
+    def get_many(self, keys):
+        rows = dict(self._conn().execute(
+            f"SELECT key, count FROM rate_limits WHERE key IN ({','.join('?' * len(keys))}) AND expires_at > ?",
+            [*keys, self.clock()]
+        ).fetchall())
+        return [rows.get(key, 0) for key in keys]
+
+    def expires_in(self, key):
+        row = self._conn().execute("SELECT expires_at FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        return max(0.0, row[0] - self.clock()) if row else 0.0
+
+    def delete(self, *keys):
+        return self._conn().execute(
+            f"DELETE FROM rate_limits WHERE key IN ({','.join('?' * len(keys))})", keys
+        ).rowcount
+
+    def prune(self):
+        """Xóa key hết hạn; còn quá max_keys thì bỏ các key sắp hết hạn nhất."""
+        conn = self._conn()
+        conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (self.clock(),))
+        excess = conn.execute("SELECT count(*) FROM rate_limits").fetchone()[0] - self.max_keys
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM rate_limits WHERE key IN "
+                "(SELECT key FROM rate_limits ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+
+    def clear_all(self):
+        return self._conn().execute("DELETE FROM rate_limits").rowcount
+
+    def __len__(self):
+        return self._conn().execute("SELECT count(*) FROM rate_limits").fetchone()[0]
+
+
+# --- giao thức RESP (Redis) tối thiểu: không cần cài redis-py ---
+def encode_command(*args):
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def read_reply(reader):
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("Kết nối Redis bị đóng")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode("utf-8")
+    if kind == b"-":
+        raise LimiterStoreError(body.decode("utf-8"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        return None if size < 0 else reader.read(size + 2)[:-2]
+    if kind == b"*":
+        size = int(body)
+        return None if size < 0 else [read_reply(reader) for _ in range(size)]
+    raise LimiterStoreError(f"Phản hồi RESP không hợp lệ: {line!r}")
+
+
+class RedisStore(LimiterStore):
+    """
+    Redis qua socket (RESP), 1 kết nối / thread; các lệnh của 1 thao tác gửi cùng lượt
+    (pipeline). Key có tiền tố REDIS_PREFIX và luôn có hạn -> Redis tự dọn.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, timeout=1.0,
+                 prefix=REDIS_PREFIX, clock=time.time):
+        super().__init__(clock)
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.prefix = prefix
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        setup = ([("AUTH", self.password)] if self.password else []) + ([("SELECT", self.db)] if self.db else [])
+        if setup:
+            self._send(conn, setup)
+        return conn
+
+    @staticmethod
+    def _send(conn, commands):
+        sock, reader = conn
+        sock.sendall(b"".join(encode_command(*command) for command in commands))
+        return [read_reply(reader) for _ in commands]
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def pipeline(self, *commands):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid != os.getpid():
+            conn = None
+        # kết nối cũ có thể đã bị server đóng -> thử lại 1 lần với kết nối mới
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self._connect()
+                self._local.conn, self._local.pid = conn, os.getpid()
+            try:
+                return self._send(conn, commands)
+            except OSError:
+                self._close()
+                if not reused:
+                    raise
+                conn, reused = None, False
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def incr(self, key, amount, ttl):
+        # SET NX đặt hạn khi key mới tạo, INCRBY giữ nguyên hạn
+        _, count = self.pipeline(("SET", self._key(key), 0, "PX", int(ttl * 1000), "NX"),
+                                 ("INCRBY", self._key(key), amount))
+        return count
+
+    def incr_get(self, key, amount, ttl, other_key):
+        _, count, other = self.pipeline(("SET", self._key(key), 0, "PX", int(ttl * 1000), "NX"),
+                                        ("INCRBY", self._key(key), amount),
+                                        ("GET", self._key(other_key)))
+        return count, int(other or 0)
+
+    def get_many(self, keys):
+        values, = self.pipeline(("MGET", *(self._key(key) for key in keys)))
+        return [int(value or 0) for value in values]
+
+    def expires_in(self, key):
+        ttl, = self.pipeline(("PTTL", self._key(key)))
+        return max(0, ttl) / 1000
+
+    def delete(self, *keys):
+        deleted, = self.pipeline(("DEL", *(self._key(key) for key in keys)))
+        return deleted
+
+    def clear_all(self):
+        cursor, deleted = b"0", 0
+        while True:
+            (cursor, keys), = self.pipeline(("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 1000))
+            if keys:
+                deleted += self.pipeline(("DEL", *keys))[0]
+            if cursor in (b"0", "0"):
+                return deleted
+
+    def ping(self):
+        return self.pipeline(("PING",))[0] == "PONG"
+
+
+def store_from_uri(uri):
+    """memory:// | sqlite:///duong/dan.db | redis://[:mat_khau@]host:port/db"""
+    parsed = urlparse(uri)
+    if parsed.scheme == "memory":
+        return MemoryStore()
+    if parsed.scheme == "sqlite":
+        return SQLiteStore(uri[len("sqlite:///"):])
+    if parsed.scheme == "redis":
+        return RedisStore(parsed.hostname or "127.0.0.1", parsed.port or 6379,
+                          int(parsed.path.strip("/") or 0), parsed.password)
+    raise ValueError(f"LIMITER_STORAGE_URI không hợp lệ: {uri}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = store_from_uri(LIMITER_STORAGE_URI)
+    return _store
+
+
+def set_store(store):
+    global _store
+    _store = store
+
+
+def per_process_warning(uri=None, workers=None):
+    """Cảnh báo (str) nếu bộ đếm memory:// chạy với nhiều worker: giới hạn bị nhân theo số worker."""
+    uri = uri or LIMITER_STORAGE_URI
+    workers = workers or WEB_CONCURRENCY
+    if urlparse(uri).scheme == "memory" and workers > 1:
+        return (f"LIMITER_STORAGE_URI={uri} chỉ đếm trong từng process: với {workers} worker, "
+                f"giới hạn đăng nhập bị nhân {workers} lần. Dùng sqlite:/// hoặc redis://.")
+    return None
+
+
+class SharedStorage(Storage, SlidingWindowCounterSupport):
+    """
+    Storage của thư viện limits (Flask-Limiter) trên store ở trên:
+    Limiter(storage_uri="limiter://", strategy="sliding-window-counter").
+    """
+
+    STORAGE_SCHEME = ["limiter"]
+
+    @property
+    def base_exceptions(self):
+        return OSError, sqlite3.Error, LimiterStoreError
+
+    def incr(self, key, expiry, amount=1):
+        return get_store().incr(key, amount, expiry)
+
+    def get(self, key):
+        return get_store().get_many([key])[0]
+
+    def get_expiry(self, key):
+        store = get_store()
+        return store.clock() + store.expires_in(key)
+
+    def check(self):
+        try:
+            return get_store().ping()
+        except self.base_exceptions:
+            return False
+
+    def reset(self):
+        return get_store().clear_all()
+
+    def clear(self, key):
+        get_store().delete(key)
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        return get_store().acquire(key, limit, expiry, amount)
+
+    def get_sliding_window(self, key, expiry):
+        return get_store().sliding_window(key, expiry)
+
+    def clear_sliding_window(self, key, expiry):
+        get_store().clear(key, expiry)
@@ -0,0 +1,177 @@
+"""
+Worker tính lại match_scores theo hàng đợi match_dirty.
+
+Worker giữ ma trận kỹ năng job / student trong bộ nhớ và chỉ vá các dòng bị đánh
+dấu: student đổi kỹ năng -> tính lại 1 dòng (student x mọi job), job đổi yêu cầu
+hoặc trạng thái -> tính lại 1 cột (mọi student x job). Không dựng lại toàn bộ
+ma trận trừ khi số dòng ghi đè vượt OVERRIDE_LIMIT.
+
+Chạy:  flask --app app match-worker          (vòng lặp, chạy nền)
+       flask --app app recompute-matches     (tính lại toàn bộ, lần đầu / sau sự cố)
+
+Cấu hình (env):
+  MATCH_WORKER_INTERVAL  số giây nghỉ khi hàng đợi rỗng (mặc định 2)
+  MATCH_WORKER_BATCH     số dòng match_dirty xử lý mỗi lượt (mặc định 500)
+"""
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from database import db_session
+from models.job_models import Job, JobSkill, StudentSkill, MatchScore, MatchDirty
+from .matching_service import OVERRIDE_LIMIT, build_job_matrix, build_student_index
+
+WORKER_INTERVAL = float(os.getenv("MATCH_WORKER_INTERVAL", "2"))
+WORKER_BATCH = int(os.getenv("MATCH_WORKER_BATCH", "500"))
+
+
+def _delete_dirty(ids, chunk_size=1000):
+    for start in range(0, len(ids), chunk_size):
+        db_session.query(MatchDirty).filter(MatchDirty.id.in_(ids[start:start + chunk_size]))\
+            .delete(synchronize_session=False)
+
+
+class MatchWorker:
+    def __init__(self, batch_size=WORKER_BATCH):
+        self.batch_size = batch_size
+        self.job_matrix = None
+        self.student_index = None
+        self._stop = threading.Event()
+
+    def _ensure_matrices(self):
+        if self.job_matrix is None or len(self.job_matrix.overrides) > OVERRIDE_LIMIT:
+            self.job_matrix = build_job_matrix()
+        if self.student_index is None or len(self.student_index.overrides) > OVERRIDE_LIMIT:
+            self.student_index = build_student_index()
+
+    def process_dirty(self):
+        """Xử lý 1 lô match_dirty. Trả về (số student, số job) đã tính lại."""
+        batch = db_session.query(MatchDirty.id, MatchDirty.kind, MatchDirty.entityId)\
+            .order_by(MatchDirty.id).limit(self.batch_size).all()
+        if not batch:
+            return 0, 0
+
+        self._ensure_matrices()
+        student_ids = sorted({e for _, kind, e in batch if kind == "student"})
+        job_ids = sorted({e for _, kind, e in batch if kind == "job"})
+
+        # 1) vá ma trận trước để 2 chiều tính lại nhìn cùng 1 trạng thái
+        student_skills = self._load_student_skills(student_ids)
+        job_skills = self._load_job_skills(job_ids)
+        for student_id in student_ids:
+            self.student_index.set_row(student_id, student_skills.get(student_id, {}))
+        for job_id in job_ids:
+            self.job_matrix.set_row(job_id, job_skills.get(job_id, {}))
+
+        # 2) tính lại dòng của student / cột của job
+        now = datetime.utcnow()
+        rows = []
+        for student_id in student_ids:
+            ids, score, coverage, gap = self.job_matrix.score(student_skills.get(student_id, {}))
+            rows += _score_rows(now, [student_id] * len(ids), ids, score, coverage, gap)
+        for job_id in job_ids:
+            required = job_skills.get(job_id)
+            if required:
+                ids, score, coverage, gap = self.student_index.fit(required)
+                rows += _score_rows(now, ids, [job_id] * len(ids), score, coverage, gap)
+
+        # cặp (student dirty, job dirty) được tính ở cả 2 chiều -> giữ 1 bản
+        rows = list({(r["studentId"], r["jobId"]): r for r in rows}.values())
+
+        if student_ids:
+            db_session.query(MatchScore).filter(MatchScore.studentId.in_(student_ids))\
+                .delete(synchronize_session=False)
+        if job_ids:
+            db_session.query(MatchScore).filter(MatchScore.jobId.in_(job_ids))\
+                .delete(synchronize_session=False)
+        if rows:
+            db_session.execute(insert(MatchScore), rows)
+        # chỉ xóa đúng các dòng đã đọc: dòng id nhỏ hơn commit muộn (PostgreSQL) vẫn còn trong hàng đợi
+        _delete_dirty([d.id for d in batch])
+        db_session.commit()
+        return len(student_ids), len(job_ids)
+
+    def drain(self):
+        """Xử lý tới khi hàng đợi rỗng (dùng trong test / CLI)."""
+        students = jobs = 0
+        while True:
+            s, j = self.process_dirty()
+            if not s and not j:
+                return students, jobs
+            students, jobs = students + s, jobs + j
+
+    def recompute_all(self):
+        """Tính lại toàn bộ match_scores theo từng cột job (dựng ma trận mới)."""
+        self.job_matrix = build_job_matrix()
+        self.student_index = build_student_index()
+        dirty_ids = [i for (i,) in db_session.query(MatchDirty.id)]
+
+        db_session.query(MatchScore).delete(synchronize_session=False)
+        job_skills = self._load_job_skills()
+        now = datetime.utcnow()
+        total = 0
+        for job_id, required in job_skills.items():
+            ids, score, coverage, gap = self.student_index.fit(required)
+            rows = _score_rows(now, ids, [job_id] * len(ids), score, coverage, gap)
+            if rows:
+                db_session.execute(insert(MatchScore), rows)
+            total += len(rows)
+        _delete_dirty(dirty_ids)
+        db_session.commit()
+        return total
+
+    def run(self, interval=WORKER_INTERVAL):
+        """Vòng lặp chạy nền; dừng bằng stop()."""
+        while not self._stop.is_set():
+            try:
+                students, jobs = self.process_dirty()
+            except Exception as e:
+                db_session.rollback()
+                print(f"⚠️ match worker error: {e}")
+                students = jobs = 0
+            finally:
+                db_session.remove()
+            if not students and not jobs:
+                self._stop.wait(interval)
+
+    def start(self, interval=WORKER_INTERVAL):
+        thread = threading.Thread(target=self.run, args=(interval,), name="match-worker", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    @staticmethod
+    def _load_student_skills(student_ids):
+        skills = {}
+        if student_ids:
+            for student_id, skill_id, level in db_session.query(
+                StudentSkill.studentId, StudentSkill.skillId, StudentSkill.level
+            ).filter(StudentSkill.studentId.in_(student_ids), StudentSkill.level > 0):
+                skills.setdefault(student_id, {})[skill_id] = level
+        return skills
+
+    @staticmethod
+    def _load_job_skills(job_ids=None):
+        """Yêu cầu kỹ năng của các job còn mở (job CLOSED / đã xóa -> không có); None = mọi job."""
+        query = db_session.query(JobSkill.jobId, JobSkill.skillId, JobSkill.requiredLevel)\
+            .join(Job, Job.id == JobSkill.jobId)\
+            .filter(Job.status != "CLOSED")
+        if job_ids is not None:
+            if not job_ids:
+                return {}
+            query = query.filter(JobSkill.jobId.in_(job_ids))
+        skills = {}
+        for job_id, skill_id, level in query:
+            skills.setdefault(job_id, {})[skill_id] = level or 0
+        return skills
+
+
+def _score_rows(now, student_ids, job_ids, score, coverage, gap):
+    return [{
+        "studentId": int(s), "jobId": int(j), "score": float(sc),
+        "coverage": float(cv), "levelGap": float(g), "updatedAt": now
+    } for s, j, sc, cv, g in zip(student_ids, job_ids, score, coverage, gap)]
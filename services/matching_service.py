@@ -0,0 +1,307 @@
+"""
+Engine ghép năng lực: xếp hạng job theo mức độ phù hợp kỹ năng của student, và
+ngược lại xếp hạng ứng viên cho 1 job (shortlist).
+
+Yêu cầu của các job (job_skills) và kỹ năng của student (student_skills) được nạp
+thành ma trận thưa (dòng x skill, giá trị level) bằng mảng NumPy; chấm điểm chỉ
+cần vector kỹ năng phía bên kia rồi tính vector hóa:
+
+  fit      = min(level / requiredLevel, 1)          cho từng (job, skill)
+  score    = Σ requiredLevel·fit / Σ requiredLevel  (skill yêu cầu cao nặng hơn)
+  coverage = số skill student có / số skill job yêu cầu
+  gap      = Σ max(requiredLevel - level, 0)
+
+Điểm được tính sẵn vào bảng match_scores bởi services/match_worker.py; request chỉ
+đọc bảng này (có index). Ghi StudentSkill / JobSkill / Job được bắt qua session
+event và ghi vào hàng đợi match_dirty trong cùng transaction (mark_dirty cho các
+câu DELETE hàng loạt mà session không thấy từng object).
+
+Shortlist kết hợp thêm điểm test (TestResult.score / totalScore) và đánh giá của
+công ty (Evaluation.skillScore / 5) theo SHORTLIST_WEIGHTS.
+"""
+import numpy as np
+from sqlalchemy import event, exists, insert
+
+from database import db_session
+from models.job_models import Job, JobSkill, StudentSkill, MatchScore, MatchDirty
+from models.app_models import Application
+from .recruitment_service import _has_capacity
+
+DEFAULT_TOP_K = 10
+MAX_TOP_K = 100
+OVERRIDE_LIMIT = 1000  # quá số dòng ghi đè này thì worker dựng lại ma trận
+
+
+def top_k(scores, ids, k):
+    """Chỉ số của k phần tử điểm cao nhất, cao -> thấp, hòa thì id nhỏ trước."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    # argpartition O(n) rồi chỉ sort k phần tử
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.lexsort((ids[candidates], -scores[candidates]))]
+
+
+class SkillMatrix:
+    """
+    Ma trận thưa (dòng = job hoặc student) x skill, giá trị là level.
+    Dòng đổi sau khi dựng được ghi đè trong `overrides` (dòng cũ đánh dấu stale)
+    thay vì dựng lại cả ma trận.
+    """
+
+    def __init__(self, row_ids, skill_ids, entry_row, entry_skill, entry_level):
+        self.row_ids = row_ids          # (n_rows,)   id job / student theo thứ tự dòng
+        self.skill_ids = skill_ids      # (n_skills,) id skill đã sort, theo thứ tự cột
+        n_rows, n_skills = len(row_ids), len(skill_ids)
+
+        self.row_weight = np.bincount(entry_row, weights=entry_level, minlength=n_rows)
+        self.row_count = np.bincount(entry_row, minlength=n_rows)
+
+        # Lưu theo cột (CSC): các phần tử của skill c nằm trong [indptr[c], indptr[c+1])
+        # -> chấm điểm chỉ chạm vào cột của các skill cần so, không quét cả ma trận.
+        order = np.argsort(entry_skill, kind="stable")
+        self.col_row = entry_row[order]
+        self.col_level = entry_level[order]
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(entry_skill, minlength=n_skills))))
+
+        self.stale = np.zeros(n_rows, dtype=bool)
+        self.overrides = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: iterable (rowId, skillId, level)."""
+        data = np.array(list(rows), dtype=np.int64).reshape(-1, 3)
+        row_ids, entry_row = np.unique(data[:, 0], return_inverse=True)
+        skill_ids, entry_skill = np.unique(data[:, 1], return_inverse=True)
+        # level thiếu / <= 0 coi như 1 (chỉ cần có skill)
+        entry_level = np.maximum(data[:, 2], 1).astype(np.float64)
+        return cls(row_ids, skill_ids, entry_row, entry_skill, entry_level)
+
+    def skill_vector(self, skills):
+        """skills: {skillId: level} -> vector level theo cột (0 = không có)."""
+        vector = np.zeros(len(self.skill_ids), dtype=np.float64)
+        for skill_id, level in skills.items():
+            col = np.searchsorted(self.skill_ids, skill_id)
+            if col < len(self.skill_ids) and self.skill_ids[col] == skill_id:
+                vector[col] = max(level or 0, 0)
+        return vector
+
+    def set_row(self, row_id, skills):
+        """skills: {skillId: level} — thay toàn bộ dòng ({} = xóa dòng)."""
+        row = np.searchsorted(self.row_ids, row_id)
+        if row < len(self.row_ids) and self.row_ids[row] == row_id:
+            self.stale[row] = True
+        self.overrides[row_id] = {s: max(level or 0, 1) for s, level in skills.items()}
+
+    def overlap(self, skills):
+        """
+        skills: {skillId: level} phía bên kia. Với mọi dòng còn hiệu lực trả về
+        (ids, Σ min(level 2 phía), số skill chung, Σ level của dòng, số skill của dòng).
+        min(level, requiredLevel) = requiredLevel·min(level/requiredLevel, 1).
+        """
+        vector = self.skill_vector(skills)
+        n_rows = len(self.row_ids)
+        cols = np.flatnonzero(vector)
+        if len(cols):
+            idx = np.concatenate([np.arange(self.indptr[c], self.indptr[c + 1]) for c in cols])
+            other = np.repeat(vector[cols], np.diff(self.indptr)[cols])
+        else:
+            idx = other = np.empty(0, dtype=np.int64)
+        rows = self.col_row[idx]
+
+        weighted = np.bincount(rows, weights=np.minimum(other, self.col_level[idx]), minlength=n_rows)
+        covered = np.bincount(rows, minlength=n_rows)
+
+        keep = ~self.stale
+        result = [self.row_ids[keep], weighted[keep], covered[keep],
+                  self.row_weight[keep], self.row_count[keep]]
+
+        # dòng đã ghi đè (thường rất ít) -> tính trực tiếp
+        extra = [
+            (row_id,
+             sum(min(level, skills[s]) for s, level in row.items() if skills.get(s)),
+             sum(1 for s in row if skills.get(s)),
+             sum(row.values()),
+             len(row))
+            for row_id, row in self.overrides.items() if row
+        ]
+        if extra:
+            result = [np.concatenate((base, np.array(col))) for base, col in zip(result, zip(*extra))]
+        return result
+
+
+class JobSkillMatrix(SkillMatrix):
+    """Yêu cầu kỹ năng của các job chưa CLOSED (level = requiredLevel)."""
+
+    def score(self, skills):
+        """skills: kỹ năng student -> (job_ids, score, coverage, gap) cho job có skill chung."""
+        ids, weighted, covered, weight, count = self.overlap(skills)
+        keep = covered > 0
+        return ids[keep], (weighted / weight)[keep], (covered / count)[keep], (weight - weighted)[keep]
+
+
+class StudentSkillIndex(SkillMatrix):
+    """Kỹ năng của mọi student (level = StudentSkill.level)."""
+
+    def fit(self, required):
+        """
+        required: {skillId: requiredLevel} của 1 job -> (student_ids, score, coverage, gap)
+        cho mọi student có ít nhất 1 skill chung.
+        """
+        required = {s: max(level or 0, 1) for s, level in required.items()}
+        ids, weighted, covered, _, _ = self.overlap(required)
+        keep = covered > 0
+        ids, weighted, covered = ids[keep], weighted[keep], covered[keep]
+        total = float(sum(required.values())) or 1.0
+        return ids, weighted / total, covered / max(len(required), 1), total - weighted
+
+
+def build_job_matrix():
+    rows = db_session.query(JobSkill.jobId, JobSkill.skillId, JobSkill.requiredLevel)\
+        .join(Job, Job.id == JobSkill.jobId)\
+        .filter(Job.status != "CLOSED")\
+        .all()
+    return JobSkillMatrix.from_rows(
+        (job_id, skill_id, level or 0) for job_id, skill_id, level in rows
+    )
+
+
+def build_student_index():
+    rows = db_session.query(StudentSkill.studentId, StudentSkill.skillId, StudentSkill.level)\
+        .filter(StudentSkill.level > 0)\
+        .all()
+    return StudentSkillIndex.from_rows(rows)
+
+
+# CHANGE CAPTURE -> match_dirty
+def mark_dirty(students=(), jobs=()):
+    """Đánh dấu student / job cần tính lại điểm (ghi vào match_dirty khi commit)."""
+    pending = db_session.info.setdefault("match_dirty", {"student": set(), "job": set()})
+    pending["student"].update(students)
+    pending["job"].update(jobs)
+
+
+@event.listens_for(db_session, "after_flush")
+def _collect_match_changes(session, flush_context):
+    students, jobs = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, StudentSkill):
+            students.add(obj.studentId)
+        elif isinstance(obj, JobSkill):
+            jobs.add(obj.jobId)
+        elif isinstance(obj, Job):
+            jobs.add(obj.id)
+    if students or jobs:
+        pending = session.info.setdefault("match_dirty", {"student": set(), "job": set()})
+        pending["student"].update(students)
+        pending["job"].update(jobs)
+
+
+@event.listens_for(db_session, "before_commit")
+def _write_match_dirty(session):
+    session.flush()  # để after_flush thấy cả các object chưa flush
+    pending = session.info.pop("match_dirty", None)
+    if not pending:
+        return
+    rows = [
+        {"kind": kind, "entityId": entity_id}
+        for kind, ids in pending.items() for entity_id in ids if entity_id is not None
+    ]
+    if rows:
+        session.execute(insert(MatchDirty), rows)
+
+
+@event.listens_for(db_session, "after_rollback")
+def _discard_match_dirty(session):
+    session.info.pop("match_dirty", None)
+
+
+# RANKING (đọc match_scores)
+def parse_top_k(value):
+    try:
+        k = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_TOP_K
+    return max(1, min(k, MAX_TOP_K))
+
+
+def rank_jobs_for_student(student_id, limit=None):
+    """
+    Top-K job phù hợp nhất với kỹ năng của student (bỏ job đã ứng tuyển,
+    đã CLOSED hoặc đã đủ người). Job không khai báo kỹ năng không được xếp hạng.
+    """
+    rows = db_session.query(
+        Job.id, Job.title, Job.companyId, Job.location,
+        MatchScore.score, MatchScore.coverage, MatchScore.levelGap
+    ).join(Job, Job.id == MatchScore.jobId)\
+     .filter(MatchScore.studentId == student_id, MatchScore.score > 0)\
+     .filter(Job.status != "CLOSED", _has_capacity())\
+     .filter(~exists().where(
+        Application.jobId == MatchScore.jobId,
+        Application.studentId == student_id
+     ))\
+     .order_by(MatchScore.score.desc(), MatchScore.jobId)\
+     .limit(parse_top_k(limit)).all()
+
+    return [{
+        "jobId": r.id,
+        "title": r.title,
+        "companyId": r.companyId,
+        "location": r.location,
+        "score": round(r.score * 100, 1),
+        "coverage": round(r.coverage, 3),
+        "levelGap": int(r.levelGap),
+    } for r in rows]
+
+
+# SHORTLIST (chiều ngược lại: xếp hạng student cho 1 job)
+SHORTLIST_WEIGHTS = np.array([0.5, 0.3, 0.2])  # kỹ năng, điểm test, đánh giá của công ty
+EVALUATION_MAX = 5                               # Evaluation.skillScore là số sao 1-5
+
+
+def combine_scores(components, weights=SHORTLIST_WEIGHTS):
+    """
+    components: mảng (n, 3) giá trị 0..1, NaN = chưa có (chưa làm test / chưa đánh giá).
+    Trung bình có trọng số trên các thành phần đã có của từng ứng viên.
+    """
+    present = ~np.isnan(components)
+    w = np.where(present, weights, 0.0)
+    total = w.sum(axis=1)
+    weighted = (np.where(present, components, 0.0) * w).sum(axis=1)
+    return np.divide(weighted, total, out=np.zeros(len(components)), where=total > 0)
+
+
+def rank_candidates(has_required, applicants, pool=(), limit=None):
+    """
+    has_required: job có khai báo kỹ năng không (không -> bỏ thành phần kỹ năng)
+    applicants:   list (studentId, fit, coverage, test 0..1, evaluation 0..1) — None = chưa có
+    pool:         list (studentId, fit, coverage) của student chưa ứng tuyển
+
+    Chấm cả lô bằng mảng NumPy; trả về top-K dict, điểm cao trước.
+    """
+    k = parse_top_k(limit) if limit is not None or pool else len(applicants)
+    applied = {a[0] for a in applicants}
+    candidates = list(applicants) + [p + (None, None) for p in pool if p[0] not in applied]
+    if not candidates:
+        return []
+
+    ids = np.array([c[0] for c in candidates], dtype=np.int64)
+    # None -> NaN; ứng viên chưa có dòng match_scores = không có skill chung (fit 0)
+    components = np.array([
+        [(c[1] or 0.0) if has_required else None, c[3], c[4]] for c in candidates
+    ], dtype=np.float64)
+    coverage = np.array([c[2] or 0.0 for c in candidates])
+    scores = combine_scores(components)
+
+    def value(x):
+        return None if np.isnan(x) else round(float(x), 3)
+
+    return [{
+        "studentId": int(ids[i]),
+        "applied": int(ids[i]) in applied,
+        "score": round(float(scores[i]) * 100, 1),
+        "skillFit": value(components[i, 0]),
+        "coverage": round(float(coverage[i]), 3),
+        "testScore": value(components[i, 1]),
+        "evaluation": value(components[i, 2]),
+    } for i in top_k(scores, ids, k)]
@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import DateTime, tuple_
+
+from .base import ServiceError
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def parse_limit(value):
+    """limit từ query string -> trong khoảng [1, MAX_LIMIT], mặc định DEFAULT_LIMIT."""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(v) if isinstance(col.type, DateTime) else v
+            for col, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise ServiceError("Cursor không hợp lệ", 400)
+
+
+def paginate(query, columns, cursor=None, limit=None, descending=False):
+    """
+    Keyset pagination: sắp xếp theo `columns` (cột cuối phải duy nhất, thường là id)
+    và lấy các dòng nằm sau cursor — không dùng OFFSET nên chi phí không tăng theo trang.
+    Trả về (rows, next_cursor); next_cursor = None khi đã hết dữ liệu.
+    """
+    limit = parse_limit(limit)
+
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key, bound = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < bound if descending else key > bound)
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([_key_value(rows[-1], c) for c in columns])
+    return rows, next_cursor
+
+
+def _key_value(row, column):
+    # row là entity / Row các cột, hoặc Row (entity, cột phụ...)
+    if hasattr(row, column.key):
+        return getattr(row, column.key)
+    return getattr(row[0], column.key)
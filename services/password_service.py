@@ -0,0 +1,152 @@
+"""
+Băm / kiểm tra mật khẩu bcrypt trong process pool riêng.
+
+bcrypt cố ý tốn CPU (~250 ms với cost 12). pyca/bcrypt nhả GIL khi băm nên không chặn
+thread khác, nhưng chạy ngay trên thread của request thì 1 đợt đăng nhập dồn dập chiếm
+hết thread worker và mọi core của máy, các request nhẹ phải chờ. Ở đây mỗi lần băm /
+kiểm tra được gửi sang PASSWORD_HASH_WORKERS process (giới hạn số core dành cho bcrypt);
+thread của request chỉ chờ kết quả.
+
+Hàng đợi có giới hạn: tối đa PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE việc cùng lúc,
+quá mức đó (hoặc chờ quá PASSWORD_HASH_TIMEOUT giây) -> ServiceError 503 kèm header
+Retry-After (ước lượng theo thời gian băm gần đây) thay vì xếp hàng vô hạn.
+
+Cost (BCRYPT_ROUNDS) đổi được bất cứ lúc nào: hash cũ vẫn kiểm tra được (cost nằm trong
+hash), và được băm lại với cost mới ở lần đăng nhập thành công kế tiếp (needs_rehash).
+
+Process con khởi động kiểu "spawn" và import lại module chính: script tự viết gọi
+hash_password (vd. seed_data.py) phải đặt code trong `if __name__ == "__main__":`
+(hoặc chạy với PASSWORD_HASH_WORKERS=0).
+
+Cấu hình (env): BCRYPT_ROUNDS (mặc định 12), PASSWORD_HASH_WORKERS (mặc định 2;
+0 = băm ngay trong thread của request), PASSWORD_HASH_QUEUE (16), PASSWORD_HASH_TIMEOUT (giây, 10).
+"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+from .base import ServiceError
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))
+HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+# bcrypt chỉ dùng 72 byte đầu; bcrypt >= 5 báo lỗi thay vì tự cắt như các bản cũ
+# (hash đã lưu được tạo theo kiểu cắt) -> cắt trước để hành vi không đổi
+MAX_PASSWORD_BYTES = 72
+
+
+# Chạy trong process của pool (hàm cấp module để pickle được)
+def _hash(password, rounds):
+    return bcrypt.hashpw(password[:MAX_PASSWORD_BYTES], bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(hashed, password):
+    try:
+        return bcrypt.checkpw(password[:MAX_PASSWORD_BYTES], hashed)
+    except ValueError:  # không phải hash bcrypt hợp lệ
+        return False
+
+
+class HashPool:
+    """
+    ProcessPoolExecutor tạo khi dùng lần đầu, hàng đợi có giới hạn. Process con khởi động
+    kiểu "spawn": tạo từ thread request của server đa luồng, fork sẽ chép cả lock đang giữ
+    và kết nối DB đang mở.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, queue=HASH_QUEUE, timeout=HASH_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue) if workers > 0 else None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._avg_seconds = 0.25  # thời gian chờ 1 kết quả (trung bình trượt), để ước lượng Retry-After
+
+    def run(self, fn, *args):
+        if self._slots is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise self._busy()
+        start = time.monotonic()
+        try:
+            with self._lock:
+                self._pending += 1
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                executor = self._executor
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # slot chỉ được trả khi việc thật sự xong / bị hủy, kể cả khi request đã thôi chờ
+        future.add_done_callback(self._release)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()  # còn trong hàng đợi -> bỏ; đang chạy -> giữ slot tới khi chạy xong
+            raise self._busy()
+        with self._lock:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - start)
+        return result
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def try_run(self, fn, *args):
+        """Như run nhưng trả None khi pool đang bận (cho việc không bắt buộc)."""
+        try:
+            return self.run(fn, *args)
+        except ServiceError:
+            return None
+
+    def _busy(self):
+        retry_after = max(1, math.ceil(self._pending * self._avg_seconds / self.workers))
+        return ServiceError("Hệ thống đang bận, vui lòng thử lại sau", 503,
+                            headers={"Retry-After": str(retry_after)})
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+pool = HashPool()
+
+
+def hash_password(password, rounds=None):
+    """Hash bcrypt (str) với cost `rounds` (mặc định BCRYPT_ROUNDS)."""
+    return pool.run(_hash, password.encode("utf-8"), rounds or BCRYPT_ROUNDS)
+
+
+def verify_password(hashed, password):
+    if not hashed or not password or not isinstance(password, str):
+        return False
+    return pool.run(_check, hashed.encode("utf-8"), password.encode("utf-8"))
+
+
+def hash_rounds(hashed):
+    """Cost của hash "$2b$12$..." (None nếu không đọc được)."""
+    parts = (hashed or "").split("$")
+    return int(parts[2]) if len(parts) > 3 and parts[2].isdigit() else None
+
+
+def needs_rehash(hashed):
+    return hash_rounds(hashed) != BCRYPT_ROUNDS
+
+
+def rehash_password(password):
+    """Hash mới với cost hiện tại, hoặc None nếu pool đang bận (để lần đăng nhập sau)."""
+    return pool.try_run(_hash, password.encode("utf-8"), BCRYPT_ROUNDS)
@@ -0,0 +1,239 @@
+from sqlalchemy import func, or_, exists
+from sqlalchemy.exc import IntegrityError
+
+from database import db_session
+from models import Job, Application, ApplicationStatus, SkillTest
+from .base import ServiceError
+from .pagination import paginate
+
+
+def first_tests_subquery():
+    """Bài test đầu tiên của mỗi job (tương đương job.skill_tests[0])."""
+    return db_session.query(
+        SkillTest.jobId.label("jobId"),
+        func.min(SkillTest.id).label("test_id")
+    ).group_by(SkillTest.jobId).subquery()
+
+
+def list_open_jobs(cursor=None, limit=None):
+    """Job đang mở (status == "open"), mới nhất trước."""
+    first_tests = first_tests_subquery()
+    query = db_session.query(
+        Job.id, Job.title, Job.description, Job.location, Job.status,
+        Job.companyId, Job.maxApplicants, Job.createdAt, first_tests.c.test_id
+    ).outerjoin(first_tests, first_tests.c.jobId == Job.id)\
+     .filter(Job.status == "open")
+    rows, next_cursor = paginate(query, [Job.createdAt, Job.id], cursor, limit, descending=True)
+
+    items = [{
+        "id": r.id,
+        "title": r.title,
+        "description": r.description,
+        "location": r.location,
+        "status": r.status,
+        "companyId": r.companyId,
+        "maxApplicants": r.maxApplicants,
+        "hasTest": r.test_id is not None,
+        "testId": r.test_id
+    } for r in rows]
+    return {"items": items, "nextCursor": next_cursor}
+
+
+def load_jobs(ids):
+    """Các job theo đúng thứ tự `ids` (cùng dạng list_open_jobs); id không còn tồn tại bị bỏ qua."""
+    if not ids:
+        return []
+    # bài test đầu tiên của từng job (tra index skill_tests.jobId, không GROUP BY cả bảng)
+    test_id = db_session.query(func.min(SkillTest.id))\
+        .filter(SkillTest.jobId == Job.id).scalar_subquery()
+    rows = {r.id: r for r in db_session.query(
+        Job.id, Job.title, Job.description, Job.location, Job.status,
+        Job.companyId, Job.maxApplicants, test_id.label("test_id")
+    ).filter(Job.id.in_(ids))}
+
+    return [{
+        "id": r.id,
+        "title": r.title,
+        "description": r.description,
+        "location": r.location,
+        "status": r.status,
+        "companyId": r.companyId,
+        "maxApplicants": r.maxApplicants,
+        "hasTest": r.test_id is not None,
+        "testId": r.test_id
+    } for r in (rows.get(job_id) for job_id in ids) if r is not None]
+
+
+def jobs_version():
+    """
+    Version của danh sách job cho ETag: đổi khi có job thêm / xóa / sửa
+    (updatedAt, kể cả appliedCount / status) hoặc bài test của job thay đổi.
+    """
+    jobs = db_session.query(func.count(Job.id), func.max(Job.id), func.max(Job.updatedAt)).one()
+    tests = db_session.query(func.count(SkillTest.id), func.max(SkillTest.id)).one()
+    return tuple(jobs) + tuple(tests)
+
+
+def list_jobs_for_student(student_id):
+    """
+    Danh sách job chưa CLOSED, chưa đủ người và student chưa ứng tuyển.
+    Số query cố định (không phụ thuộc số job); không ghi DB trong luồng đọc —
+    việc đóng job đã đầy do apply_job / close_full_jobs đảm nhiệm.
+    """
+    first_tests = first_tests_subquery()
+
+    query = db_session.query(
+        Job.id, Job.title, Job.description, Job.location, Job.status,
+        Job.maxApplicants, Job.appliedCount, first_tests.c.test_id
+    ).outerjoin(first_tests, first_tests.c.jobId == Job.id)\
+     .filter(Job.status != "CLOSED")\
+     .filter(_has_capacity())
+
+    # anti-join: bỏ các job student đã apply
+    if student_id:
+        query = query.filter(~exists().where(
+            Application.jobId == Job.id,
+            Application.studentId == student_id
+        ))
+
+    return [{
+        "id": r.id,
+        "title": r.title,
+        "description": r.description,
+        "location": r.location,
+        "status": r.status,
+        "hasTest": r.test_id is not None,
+        "testId": r.test_id,
+        "appliedCount": r.appliedCount,
+        "maxApplicants": r.maxApplicants
+    } for r in query.order_by(Job.id).all()]
+
+
+def close_full_jobs():
+    """Đóng (1 câu UPDATE) mọi job đã đủ số lượng ứng viên. Trả về số job bị đóng."""
+    closed = db_session.query(Job).filter(
+        Job.status != "CLOSED",
+        Job.maxApplicants > 0,
+        Job.appliedCount >= Job.maxApplicants
+    ).update({Job.status: "CLOSED"}, synchronize_session=False)
+    db_session.commit()
+    return closed
+
+
+# APPLICATION COUNTER (Job.appliedCount)
+def _has_capacity():
+    return or_(
+        Job.maxApplicants.is_(None),
+        Job.maxApplicants <= 0,
+        Job.appliedCount < Job.maxApplicants
+    )
+
+
+def _close_if_full(job_id):
+    db_session.query(Job).filter(
+        Job.id == job_id,
+        Job.status != "CLOSED",
+        Job.maxApplicants > 0,
+        Job.appliedCount >= Job.maxApplicants
+    ).update({Job.status: "CLOSED"}, synchronize_session=False)
+
+
+def add_application(job_id, student_id, status):
+    """
+    Thêm Application và tăng Job.appliedCount trong cùng transaction (chưa commit).
+    Giữ chỗ bằng 1 câu UPDATE có điều kiện ("tăng nếu còn dưới max") nên an toàn
+    khi nhiều request chạy song song, kể cả trên SQLite (không hỗ trợ FOR UPDATE).
+    Job tự chuyển CLOSED khi vừa đạt maxApplicants.
+
+    Trả về (application, created). Request song song của cùng student đã tạo trước
+    (unique index) -> rollback transaction (trả chỗ) và trả application đã có, created=False.
+    Vì có thể rollback, gọi hàm này trước các thay đổi khác của request.
+    """
+    reserved = db_session.query(Job).filter(Job.id == job_id, _has_capacity()).update(
+        {Job.appliedCount: Job.appliedCount + 1}, synchronize_session=False
+    )
+    if not reserved:
+        raise ServiceError("Job đã đủ người", 400)
+
+    _close_if_full(job_id)
+
+    app = Application(jobId=job_id, studentId=student_id, status=status)
+    db_session.add(app)
+    try:
+        db_session.flush()
+    except IntegrityError:
+        db_session.rollback()
+        return _find_application(student_id, job_id), False
+    return app, True
+
+
+def recount_applied(job_ids=None):
+    """Dựng lại Job.appliedCount từ bảng applications. Trả về số job được cập nhật."""
+    applied_count = db_session.query(func.count(Application.id))\
+        .filter(Application.jobId == Job.id)\
+        .scalar_subquery()
+
+    query = db_session.query(Job)
+    if job_ids is not None:
+        query = query.filter(Job.id.in_(job_ids))
+    updated = query.update({Job.appliedCount: applied_count}, synchronize_session=False)
+    db_session.commit()
+    return updated
+
+
+def _find_application(student_id, job_id):
+    return db_session.query(Application).filter(
+        Application.studentId == student_id,
+        Application.jobId == job_id
+    ).first()
+
+
+def apply_job(student_id, job_id):
+    """Trả về dict có "status": APPLIED / NEED_TEST / ALREADY_APPLIED."""
+    job = db_session.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise ServiceError("Job không tồn tại", 404)
+
+    # không cho apply trùng
+    existing_app = _find_application(student_id, job_id)
+    if existing_app:
+        return {
+            "status": "ALREADY_APPLIED",
+            "applicationId": existing_app.id
+        }
+
+    has_test = bool(job.skill_tests)
+    try:
+        # giữ chỗ + tạo application + đóng job nếu vừa đủ người, cùng 1 transaction
+        new_app, created = add_application(
+            job.id,
+            student_id,
+            ApplicationStatus.TESTING if has_test else ApplicationStatus.PENDING
+        )
+        db_session.commit()
+    except ServiceError:
+        # hết chỗ -> đóng job nếu đã đầy
+        db_session.rollback()
+        _close_if_full(job.id)
+        db_session.commit()
+        raise
+
+    if not created:
+        # request song song của cùng student đã apply trước
+        return {
+            "status": "ALREADY_APPLIED",
+            "applicationId": new_app.id if new_app else None
+        }
+
+    if has_test:
+        test = job.skill_tests[0]
+        return {
+            "status": "NEED_TEST",
+            "testId": test.id,
+            "applicationId": new_app.id
+        }
+
+    return {
+        "status": "APPLIED",
+        "applicationId": new_app.id
+    }
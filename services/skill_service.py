@@ -0,0 +1,316 @@
+"""
+Danh mục skill: chuẩn hóa tên, alias, cache name -> id và autocomplete.
+
+Tên skill do người dùng nhập tự do nên được chuẩn hóa trước khi tra
+(normalize_skill_name: gộp khoảng trắng + casefold) và tra qua bảng skill_aliases
+("py", "python3" -> Python). Danh mục mặc định SKILL_TAXONOMY (tên chuẩn, nhóm,
+alias) được ghi vào DB bởi seed_skill_taxonomy khi init_db.
+
+Bảng skills nhỏ và gần như chỉ thêm mới nên được nạp 1 lần vào cache trong process
+(load_skill_cache, lúc khởi động hoặc lần dùng đầu), gồm:
+  - map tên chuẩn hóa / alias -> id: resolve_skill_ids trả id cho cả danh sách tên
+    với số câu SQL cố định (tên chưa có -> 1 câu upsert hàng loạt + 1 câu SELECT);
+  - SkillTrie theo tên + alias cho autocomplete (tra cứu chỉ đi hết prefix).
+
+Skill vừa tạo chỉ vào cache / trie khi transaction commit (rollback thì bỏ). Skill /
+alias thêm, sửa, xóa qua ORM làm cache bị xóa khi commit và nạp lại ở lần dùng sau.
+"""
+import bisect
+import threading
+
+from sqlalchemy import event, insert, or_, update
+
+from database import db_session
+from models.job_models import Skill, SkillAlias
+
+AUTOCOMPLETE_MAX = 10
+DEFAULT_CATEGORY = "general"
+
+# tên chuẩn -> (nhóm, alias)
+SKILL_TAXONOMY = {
+    "Python": ("programming", ["py", "python3", "python 3"]),
+    "Java": ("programming", ["java se", "java ee"]),
+    "JavaScript": ("programming", ["js", "ecmascript", "es6"]),
+    "TypeScript": ("programming", ["ts"]),
+    "C": ("programming", ["c language"]),
+    "C++": ("programming", ["cpp", "c plus plus"]),
+    "C#": ("programming", ["csharp", "c sharp"]),
+    "Go": ("programming", ["golang"]),
+    "PHP": ("programming", []),
+    "Kotlin": ("programming", []),
+    "Swift": ("programming", []),
+    "SQL": ("database", []),
+    "MySQL": ("database", ["my sql"]),
+    "PostgreSQL": ("database", ["postgres", "psql"]),
+    "MongoDB": ("database", ["mongo"]),
+    "HTML": ("web", ["html5"]),
+    "CSS": ("web", ["css3"]),
+    "React": ("web", ["reactjs", "react.js"]),
+    "Vue.js": ("web", ["vue", "vuejs"]),
+    "Angular": ("web", ["angularjs"]),
+    "Node.js": ("web", ["node", "nodejs"]),
+    "Flask": ("web", []),
+    "Django": ("web", []),
+    "Spring Boot": ("web", ["spring", "springboot"]),
+    "Git": ("devops", ["github", "gitlab"]),
+    "Docker": ("devops", []),
+    "Kubernetes": ("devops", ["k8s"]),
+    "Linux": ("devops", []),
+    "AWS": ("devops", ["amazon web services"]),
+    "Machine Learning": ("data", ["ml"]),
+    "Data Analysis": ("data", ["phân tích dữ liệu"]),
+    "Excel": ("office", ["microsoft excel", "ms excel"]),
+    "English": ("language", ["tiếng anh"]),
+    "Communication": ("soft skill", ["giao tiếp"]),
+    "Teamwork": ("soft skill", ["làm việc nhóm"]),
+}
+
+
+def normalize_skill_name(name):
+    """"  Machine   learning " -> "machine learning" (khóa tra cứu / so trùng)."""
+    return " ".join((name or "").split()).casefold()
+
+
+# TRIE (autocomplete)
+class _TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.top = []   # tối đa `size` gợi ý tốt nhất dưới node: (len(term), term, skillId)
+
+
+class SkillTrie:
+    """
+    Prefix trie trên tên đã chuẩn hóa (tên skill + alias). Mỗi node giữ sẵn các gợi
+    ý tốt nhất (term ngắn trước, rồi theo chữ cái; mỗi skill 1 lần) nên lookup chỉ
+    đi hết prefix, không duyệt cây con. Thêm term là tăng dần; không hỗ trợ xóa.
+    """
+
+    def __init__(self, size=AUTOCOMPLETE_MAX):
+        self.size = size
+        self.root = _TrieNode()
+
+    def insert(self, term, skill_id):
+        entry = (len(term), term, skill_id)
+        node = self.root
+        self._offer(node, entry)
+        for ch in term:
+            node = node.children.setdefault(ch, _TrieNode())
+            self._offer(node, entry)
+
+    def _offer(self, node, entry):
+        top = node.top
+        for i, existing in enumerate(top):
+            if existing[2] == entry[2]:
+                if existing <= entry:
+                    return
+                del top[i]
+                break
+        bisect.insort(top, entry)
+        del top[self.size:]
+
+    def lookup(self, prefix, limit=AUTOCOMPLETE_MAX):
+        """Id skill khớp prefix (đã chuẩn hóa), tốt nhất trước."""
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return [skill_id for _, _, skill_id in node.top[:limit]]
+
+
+# CACHE
+_skill_ids = {}   # tên chuẩn hóa / alias -> id
+_skills = {}      # id -> (tên, nhóm)
+_trie = SkillTrie()
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_skill_cache():
+    """Nạp toàn bộ skill + alias (2 câu SELECT) và dựng lại trie. Trả về số skill."""
+    global _trie, _loaded
+    skills = db_session.query(Skill.id, Skill.name, Skill.normalizedName, Skill.category).all()
+    aliases = db_session.query(SkillAlias.alias, SkillAlias.skillId).all()
+
+    trie = SkillTrie()
+    with _lock:
+        _skill_ids.clear()
+        _skills.clear()
+        for skill_id, name, key, category in skills:
+            _skills[skill_id] = (name, category)
+            if key:
+                _skill_ids[key] = skill_id
+                trie.insert(key, skill_id)
+        # alias được ưu tiên hơn skill cũ trùng tên (vd. skill "Py" tạo trước khi có alias)
+        for alias, skill_id in aliases:
+            if skill_id in _skills:
+                _skill_ids[alias] = skill_id
+                trie.insert(alias, skill_id)
+        _trie = trie
+        _loaded = True
+    return len(skills)
+
+
+def clear_skill_cache():
+    global _trie, _loaded
+    with _lock:
+        _skill_ids.clear()
+        _skills.clear()
+        _trie = SkillTrie()
+        _loaded = False
+
+
+def resolve_skill_ids(names, category=DEFAULT_CATEGORY):
+    """
+    names -> {name: skillId} (tên khác nhau có thể về cùng 1 id: "Python", "py").
+    Skill chưa có được tạo trong transaction hiện tại (chưa commit). Tên rỗng bị bỏ qua.
+    """
+    if not _loaded:
+        load_skill_cache()
+
+    keys = {}
+    for name in names:
+        key = normalize_skill_name(name)
+        if key:
+            keys.setdefault(name, key)
+
+    pending = db_session.info.get("new_skills", {})
+    with _lock:
+        ids = {key: _skill_ids[key] for key in set(keys.values()) if key in _skill_ids}
+    ids.update({key: pending[key][0] for key in set(keys.values()) if key not in ids and key in pending})
+
+    missing = {}
+    for name, key in keys.items():
+        if key not in ids:
+            missing.setdefault(key, " ".join(name.split()))
+    if missing:
+        db_session.execute(_insert_ignore(Skill.__table__), [
+            {"name": name, "normalizedName": key, "category": category}
+            for key, name in missing.items()
+        ])
+        # skill cũ (chưa có normalizedName) trùng đúng tên -> insert bị bỏ qua, tìm theo tên
+        created = db_session.query(Skill.id, Skill.name, Skill.normalizedName, Skill.category).filter(or_(
+            Skill.normalizedName.in_(list(missing)), Skill.name.in_(list(missing.values()))
+        )).all()
+        by_name = {name: key for key, name in missing.items()}
+        new_skills = db_session.info.setdefault("new_skills", {})
+        for skill_id, name, key, skill_category in created:
+            key = key if key in missing else by_name[name]
+            ids.setdefault(key, skill_id)
+            new_skills[key] = (skill_id, name, skill_category)
+
+    return {name: ids[key] for name, key in keys.items()}
+
+
+def autocomplete_skills(prefix, limit=AUTOCOMPLETE_MAX):
+    """Gợi ý skill theo prefix: [{"id", "name", "category"}], tối đa `limit`."""
+    if not _loaded:
+        load_skill_cache()
+    prefix = normalize_skill_name(prefix)
+    if not prefix:
+        return []
+    limit = max(1, min(limit, AUTOCOMPLETE_MAX))
+    with _lock:
+        ids = _trie.lookup(prefix, limit)
+        return [{"id": i, "name": _skills[i][0], "category": _skills[i][1]} for i in ids]
+
+
+def _insert_ignore(table):
+    """INSERT bỏ qua dòng trùng (request / process khác vừa tạo cùng skill)."""
+    dialect = db_session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(table).prefix_with("IGNORE", dialect="mysql")
+    return dialect_insert(table).on_conflict_do_nothing()
+
+
+# TAXONOMY (init_db)
+def backfill_normalized_names():
+    """Điền Skill.normalizedName cho dữ liệu cũ; skill trùng sau chuẩn hóa giữ id nhỏ nhất."""
+    taken = {key for (key,) in db_session.query(Skill.normalizedName).filter(Skill.normalizedName.isnot(None))}
+    rows = []
+    for skill_id, name in db_session.query(Skill.id, Skill.name)\
+            .filter(Skill.normalizedName.is_(None)).order_by(Skill.id):
+        key = normalize_skill_name(name)
+        if key and key not in taken:
+            taken.add(key)
+            rows.append({"id": skill_id, "normalizedName": key})
+    if rows:
+        db_session.execute(update(Skill), rows)
+    db_session.commit()
+    return len(rows)
+
+
+def seed_skill_taxonomy(taxonomy=None):
+    """
+    Ghi SKILL_TAXONOMY vào DB (idempotent): tạo skill chuẩn còn thiếu, gán nhóm cho
+    skill đang ở nhóm mặc định và thêm alias. Trả về số alias đã có trong DB.
+    """
+    taxonomy = taxonomy or SKILL_TAXONOMY
+    keys = {normalize_skill_name(name): name for name in taxonomy}
+
+    db_session.execute(_insert_ignore(Skill.__table__), [
+        {"name": name, "normalizedName": key, "category": taxonomy[name][0]}
+        for key, name in keys.items()
+    ])
+    ids = dict(db_session.query(Skill.normalizedName, Skill.id).filter(Skill.normalizedName.in_(list(keys))))
+
+    categories = {}
+    aliases = []
+    for key, name in keys.items():
+        if key not in ids:
+            continue
+        category, names = taxonomy[name]
+        categories.setdefault(category, []).append(ids[key])
+        aliases += [{"alias": normalize_skill_name(a), "skillId": ids[key]} for a in names]
+
+    for category, skill_ids in categories.items():
+        db_session.query(Skill).filter(
+            Skill.id.in_(skill_ids),
+            or_(Skill.category.is_(None), Skill.category == DEFAULT_CATEGORY)
+        ).update({Skill.category: category}, synchronize_session=False)
+    if aliases:
+        db_session.execute(_insert_ignore(SkillAlias.__table__), aliases)
+    db_session.commit()
+    clear_skill_cache()
+    return db_session.query(SkillAlias).count()
+
+
+# SESSION EVENTS
+@event.listens_for(Skill.name, "set")
+def _normalize_on_set(target, value, oldvalue, initiator):
+    # Skill tạo / đổi tên qua ORM giữ normalizedName khớp với name
+    target.normalizedName = normalize_skill_name(value) or None
+
+
+@event.listens_for(db_session, "after_flush")
+def _collect_skill_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Skill, SkillAlias)):
+            session.info["skill_cache_stale"] = True
+            return
+
+
+@event.listens_for(db_session, "after_commit")
+def _apply_skill_changes(session):
+    created = session.info.pop("new_skills", {})
+    if session.info.pop("skill_cache_stale", False):
+        clear_skill_cache()
+    elif created and _loaded:
+        # thêm tăng dần vào cache + trie, không dựng lại
+        with _lock:
+            for key, (skill_id, name, category) in created.items():
+                _skill_ids[key] = skill_id
+                _skills[skill_id] = (name, category)
+                _trie.insert(key, skill_id)
+
+
+@event.listens_for(db_session, "after_rollback")
+def _discard_skill_changes(session):
+    session.info.pop("new_skills", None)
+    session.info.pop("skill_cache_stale", None)
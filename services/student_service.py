@@ -0,0 +1,265 @@
+from datetime import datetime
+
+from sqlalchemy import exists, func, insert
+from sqlalchemy.orm import contains_eager, joinedload
+
+from database import db_session
+from models.user_models import Company, Student, StudentProfile
+from models.app_models import Application, Report, TestResult, ApplicationStatus
+from models.job_models import SkillTest, Job, Question, StudentSkill
+from .base import ServiceError
+from .pagination import paginate
+from .recruitment_service import add_application, first_tests_subquery
+from .matching_service import mark_dirty
+from .skill_service import resolve_skill_ids
+from .grading_service import record_submission
+
+
+# STUDENT
+def get_student_by_user(user_id):
+    student = db_session.query(Student).filter(Student.userId == user_id).first()
+    if not student:
+        raise ServiceError("Student not found", 404)
+    return student
+
+
+def serialize_student(student):
+    return {
+        "id": student.id,
+        "userId": student.userId,
+        "fullName": student.fullName,
+        "cccd": student.cccd,
+        "dob": student.dob.isoformat() if student.dob is not None else None,
+        "major": student.major,
+        "skills": [
+            {"name": ss.skill.name, "level": ss.level} for ss in student.skills
+        ],
+        "profile": {
+            "cvUrl": student.profile.cvUrl,
+            "about": student.profile.about,
+            "educationLevel": student.profile.educationLevel,
+            "degrees": student.profile.degrees,
+            "portfolioUrl": student.profile.portfolioUrl
+        } if student.profile else None
+    }
+
+
+def get_student_data(user_id):
+    return serialize_student(get_student_by_user(user_id))
+
+
+def update_student(student, data):
+    if "fullName" in data:
+        student.fullName = data["fullName"]
+    if "major" in data:
+        student.major = data["major"]
+    if "cccd" in data:
+        student.cccd = data["cccd"]
+    if "dob" in data and data["dob"]:
+        try:
+            # Chuyển chuỗi '2000-01-01' thành đối tượng datetime (keeps time component for DB column)
+            student.dob = datetime.strptime(data["dob"], "%Y-%m-%d")
+        except ValueError:
+            pass # Bỏ qua nếu định dạng ngày sai
+    if not student.profile:
+        student.profile = StudentProfile(studentId=student.id)
+
+    for field in ["cvUrl", "about", "educationLevel", "degrees", "portfolioUrl"]:
+        if field in data:
+            setattr(student.profile, field, data[field])
+
+    skills = data.get("skills")
+    if isinstance(skills, list):
+        db_session.query(StudentSkill).filter(
+            StudentSkill.studentId == student.id
+        ).delete()
+        # DELETE hàng loạt không qua session -> tự đánh dấu để tính lại điểm phù hợp
+        mark_dirty(students=[student.id])
+
+        entries = [(s.get("name"), s.get("level", 3)) for s in skills if s.get("name")]
+
+        # số câu SQL cố định: tra cache tên -> id (đã chuẩn hóa / alias), upsert skill mới,
+        # insert hàng loạt. "Python" và "py" về cùng 1 skill -> giữ mục đầu tiên.
+        skill_ids = resolve_skill_ids(name for name, _ in entries)
+        levels = {}
+        for name, level in entries:
+            if name in skill_ids:
+                levels.setdefault(skill_ids[name], level)
+        if levels:
+            db_session.execute(insert(StudentSkill), [{
+                "studentId": student.id,
+                "skillId": skill_id,
+                "level": level
+            } for skill_id, level in levels.items()])
+
+    db_session.commit()
+    return {"message": "Lưu hồ sơ thành công"}
+
+
+def get_missing_profile_fields(student_data):
+    """Các trường bắt buộc trước khi ứng tuyển / làm bài test."""
+    required_fields = {
+        "fullName": "Họ tên",
+        "cccd": "CCCD",
+        "major": "Ngành học"
+    }
+
+    missing = []
+    for field, label in required_fields.items():
+        if not student_data.get(field):
+            missing.append(label)
+
+    profile = student_data.get("profile")
+    if not profile or not profile.get("cvUrl"):
+        missing.append("Link CV")
+    return missing
+
+
+# TESTS
+def start_test_session(student, job_id):
+    job = db_session.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise ServiceError("Job not found", 404)
+
+    test = db_session.query(SkillTest).filter(SkillTest.jobId == job_id).first()
+    if not test:
+        raise ServiceError("Job does not have a test", 404)
+
+    app = db_session.query(Application).filter(
+        Application.studentId == student.id,
+        Application.jobId == job_id
+    ).first()
+
+    if not app:
+        # request song song đã tạo trước -> add_application trả application đã có
+        add_application(job.id, student.id, ApplicationStatus.TESTING)
+        db_session.commit()
+
+    return {"testId": test.id, "message": "Ready to test"}
+
+
+def get_test_details(test_id):
+    test = db_session.query(SkillTest).filter(SkillTest.id == test_id).first()
+    if not test:
+        raise ServiceError("Test not found", 404)
+
+    questions = db_session.query(Question).filter(
+        Question.testId == test_id
+    ).order_by(Question.id).all()
+
+    return {
+        "id": test.id,
+        "jobId": test.jobId,
+        "testName": test.testName,
+        "duration": test.duration,
+        "questions": [{
+            "id": q.id,
+            "content": q.content,
+            "options": q.options
+        } for q in questions]
+    }
+
+
+def submit_test(student, test_id, data):
+    test = db_session.query(SkillTest).filter(SkillTest.id == test_id).first()
+    if not test:
+        raise ServiceError("Test not found", 404)
+
+    # 1) Tạo / cập nhật Application => PENDING (trước khi chấm: add_application có thể
+    #    rollback khi request song song đã tạo application trước)
+    app = db_session.query(Application).filter(
+        Application.jobId == test.jobId,
+        Application.studentId == student.id
+    ).first()
+
+    if not app:
+        app, _ = add_application(test.jobId, student.id, ApplicationStatus.PENDING)
+    app.status = ApplicationStatus.PENDING
+
+    # 2) Chấm theo đáp án (không tin điểm client gửi lên), lưu từng câu vào test_answers
+    tr = TestResult(testId=test_id, studentId=student.id)
+    record_submission(tr, test, data.get("answers", []))
+
+    db_session.commit()
+    return {"message": "Submitted", "applicationStatus": "PENDING", "score": tr.score}
+
+
+# APPLICATIONS
+def applications_version(student_id):
+    """Version các application của student cho ETag (apply / đổi trạng thái)."""
+    return tuple(db_session.query(
+        func.count(Application.id), func.max(Application.id), func.max(Application.updatedAt)
+    ).filter(Application.studentId == student_id).one())
+
+
+def get_student_applications(student_id, cursor=None, limit=None):
+    """
+    Application mới nhất trước: {"items": [...], "nextCursor": ...}.
+    Job, company, profile và trạng thái bài test lấy cùng 1 query (không N+1 theo số dòng).
+    """
+    first_tests = first_tests_subquery()
+    test_done = exists().where(
+        TestResult.testId == first_tests.c.test_id,
+        TestResult.studentId == Application.studentId
+    )
+    query = db_session.query(
+        Application, first_tests.c.test_id, test_done.label("test_done")
+    ).join(Job, Application.jobId == Job.id)\
+     .outerjoin(first_tests, first_tests.c.jobId == Application.jobId)\
+     .filter(Application.studentId == student_id)\
+     .options(
+        contains_eager(Application.job).joinedload(Job.company).joinedload(Company.profile)
+     )
+    rows, next_cursor = paginate(
+        query, [Application.appliedAt, Application.id], cursor, limit, descending=True
+    )
+
+    result = []
+    for app, test_id, done in rows:
+        job = app.job
+        has_test = test_id is not None
+        test_status = "not_required"
+        if has_test:
+            test_status = "done" if done else "pending"
+
+        result.append({
+            "id": app.id,
+            "jobId": job.id,
+            "jobTitle": job.title,
+            "companyId": job.companyId,
+            "companyName": job.company.companyName if job.company else "N/A",
+            "logoUrl": job.company.profile.logoUrl if job.company and job.company.profile else None,
+            "status": app.status.value if hasattr(app.status, "value") else str(app.status),
+            "appliedAt": app.appliedAt.strftime("%d/%m/%Y"),
+            "hasTest": has_test,
+            "testId": test_id,
+            "testStatus": test_status
+        })
+
+    return {"items": result, "nextCursor": next_cursor}
+
+
+# REPORTS
+def report_company(student, data):
+    """Trả về (payload, created) — không cho report cùng công ty nhiều lần."""
+    company_id = data.get("companyId")
+
+    existed = db_session.query(Report).filter(
+        Report.companyId == company_id,
+        Report.studentId == student.id
+    ).first()
+
+    if existed:
+        return {"message": "Already reported"}, False
+
+    report = Report(
+        companyId=company_id,
+        studentId=student.id,
+        reportType=data.get("reportType"),
+        content=data.get("content")
+    )
+
+    db_session.add(report)
+    db_session.commit()
+
+    return {"message": "Reported"}, True
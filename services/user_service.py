@@ -0,0 +1,247 @@
+import os
+import re
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func
+
+from database import db_session
+from models.user_models import (
+    User, Student, Company, CompanyProfile,
+    StudentProfile, UserRole
+)
+from models.app_models import Notification
+from .base import ServiceError
+from .cache import TTLCache
+from .limiter_store import get_store
+from .pagination import paginate
+from .password_service import hash_password, verify_password, needs_rehash, rehash_password
+
+EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+MAX_ATTEMPTS = 5
+BLOCK_TIME = 300  # 5 phút
+
+# Số lần sai theo ip:email nằm trong store dùng chung (services/limiter_store),
+# mọi worker cùng thấy; tính trong BLOCK_TIME giây gần nhất.
+def is_blocked(key):
+    return get_store().count(f"login:{key}", BLOCK_TIME) >= MAX_ATTEMPTS
+
+def is_valid_email(email: str) -> bool:
+    if not email or len(email) > 255:
+        return False
+    return bool(EMAIL_REGEX.match(email))
+
+def is_strong_password(password: str) -> bool:
+    if not password or len(password) < 6 or len(password) > 128:
+        return False
+    if not re.search(r"[A-Z]", password):
+        return False
+    if not re.search(r"[a-z]", password):
+        return False
+    if not re.search(r"[0-9]", password):
+        return False
+    if not re.search(r"[!@#$%^&*()_+=\-]", password):
+        return False
+    return True
+
+
+# REGISTER
+def create_user(email, password, role_str="student"):
+    email = (email or "").strip().lower()
+
+    if not is_valid_email(email):
+        raise ServiceError("Email không hợp lệ", 400)
+
+    if not is_strong_password(password):
+        raise ServiceError(
+            "Mật khẩu phải ≥ 6 ký tự, gồm chữ hoa, chữ thường, số và ký tự đặc biệt", 400
+        )
+
+    if db_session.query(User).filter(User.email == email).first():
+        raise ServiceError("Email đã tồn tại", 400)
+
+    # băm trước khi mở transaction (pool bận -> 503, không ghi gì)
+    password_hash = hash_password(password)
+
+    try:
+        try:
+            role_enum = UserRole(role_str)
+        except ValueError:
+            role_enum = UserRole.STUDENT
+
+        new_user = User(
+            email=email,
+            password=password_hash,
+            role=role_enum,
+            status="active"
+        )
+        db_session.add(new_user)
+        db_session.flush()
+
+        if role_enum == UserRole.STUDENT:
+            student = Student(
+                userId=new_user.id,
+                fullName=email.split("@")[0],
+                major="Chưa cập nhật"
+            )
+            db_session.add(student)
+            db_session.flush()
+            db_session.add(StudentProfile(studentId=student.id))
+
+        elif role_enum == UserRole.COMPANY:
+            company = Company(
+                userId=new_user.id,
+                companyName=email.split("@")[0]
+            )
+            db_session.add(company)
+            db_session.flush()
+            db_session.add(CompanyProfile(companyId=company.id))
+
+        db_session.commit()
+        return {
+            "id": new_user.id,
+            "email": new_user.email,
+            "role": new_user.role.value,
+            "message": "Đăng ký thành công"
+        }
+
+    except Exception as e:
+        db_session.rollback()
+        raise ServiceError(f"Lỗi server: {str(e)}", 500)
+
+
+# LOGIN (JWT)
+def authenticate(email, password, ip):
+    email = (email or "").strip().lower()
+    key = f"{ip}:{email}"
+
+    if is_blocked(key):
+        raise ServiceError("Quá nhiều lần đăng nhập sai. Vui lòng thử lại sau.", 429)
+
+    user = db_session.query(User).filter(User.email == email).first()
+
+    # Email không tồn tại → KHÔNG tăng attempts
+    if not user:
+        raise ServiceError("Sai tài khoản hoặc mật khẩu", 401)
+
+    # Email tồn tại nhưng sai mật khẩu → TĂNG attempts
+    if not verify_password(user.password, password):
+        get_store().hit(f"login:{key}", BLOCK_TIME)
+        raise ServiceError("Sai tài khoản hoặc mật khẩu", 401)
+
+    if user.status != "active":
+        raise ServiceError("Tài khoản đã bị khóa", 403)
+
+    get_store().clear(f"login:{key}", BLOCK_TIME)
+
+    # BCRYPT_ROUNDS đã đổi -> băm lại với cost mới (bỏ qua nếu pool đang bận)
+    if needs_rehash(user.password):
+        new_hash = rehash_password(password)
+        if new_hash:
+            user.password = new_hash
+            db_session.commit()
+
+    access_token = create_access_token(
+        identity=str(user.id),
+        additional_claims={"role": user.role.value}
+    )
+
+    return {
+        "access_token": access_token,
+        "user": {
+            "id": user.id,
+            "email": user.email,
+            "role": user.role.value
+        }
+    }
+
+
+# NOTIFICATIONS
+def list_notifications(user_id, cursor=None, limit=None):
+    """Thông báo mới nhất trước."""
+    notifications, next_cursor = paginate(
+        db_session.query(Notification).filter(Notification.userId == user_id),
+        [Notification.createdAt, Notification.id], cursor, limit, descending=True
+    )
+
+    return {
+        "items": [{
+            "id": n.id,
+            "content": n.content,
+            "isRead": n.isRead,
+            "createdAt": n.createdAt.strftime("%Y-%m-%d %H:%M")
+        } for n in notifications],
+        "nextCursor": next_cursor
+    }
+
+
+def mark_as_read(user_id, notif_id):
+    notif = db_session.query(Notification).filter(
+        Notification.id == notif_id
+    ).first()
+
+    if not notif:
+        raise ServiceError("Không tìm thấy thông báo", 404)
+
+    if notif.userId != user_id:
+        raise ServiceError("Forbidden", 403)
+
+    notif.isRead = True
+    db_session.commit()
+    return {"message": "Đã đánh dấu đã đọc"}
+
+
+# NOTIFICATION BELL (layout): số chưa đọc + N thông báo mới nhất, cache theo user.
+# Cache bị xóa khi Notification của user được thêm / cập nhật (commit);
+# TTL giới hạn độ trễ khi chạy nhiều worker (mỗi process có cache riêng).
+NOTIFICATION_BELL_SIZE = 5
+_bell_cache = TTLCache(
+    maxsize=int(os.getenv("NOTIF_CACHE_SIZE", "10000")),
+    ttl=int(os.getenv("NOTIF_CACHE_TTL", "30"))
+)
+
+
+def get_notification_bell(user_id):
+    """{"unread": số chưa đọc, "latest": NOTIFICATION_BELL_SIZE thông báo mới nhất}."""
+    cached = _bell_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    unread = db_session.query(func.count(Notification.id)).filter(
+        Notification.userId == user_id,
+        Notification.isRead.isnot(True)
+    ).scalar()
+
+    latest = db_session.query(Notification).filter(
+        Notification.userId == user_id
+    ).order_by(Notification.createdAt.desc(), Notification.id.desc())\
+     .limit(NOTIFICATION_BELL_SIZE).all()
+
+    bell = {
+        "unread": unread,
+        "latest": [{
+            "id": n.id,
+            "content": n.content,
+            "isRead": n.isRead,
+            "createdAt": n.createdAt.strftime("%Y-%m-%d %H:%M")
+        } for n in latest]
+    }
+    _bell_cache.set(user_id, bell)
+    return bell
+
+
+@event.listens_for(db_session, "after_flush")
+def _collect_notification_users(session, flush_context):
+    changed = session.info.setdefault("notification_users", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Notification):
+            changed.add(obj.userId)
+
+
+@event.listens_for(db_session, "after_commit")
+def _invalidate_notification_bells(session):
+    for user_id in session.info.pop("notification_users", ()):
+        _bell_cache.invalidate(user_id)
+
+
+@event.listens_for(db_session, "after_rollback")
+def _discard_notification_users(session):
+    session.info.pop("notification_users", None)
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py raise RuntimeError nếu thiếu secret
+os.environ.setdefault("FLASK_SECRET_KEY", "test-flask-secret")
+os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret-test-jwt-secret-0")
+
+import database
+from models import User, Company, Job, SkillTest, UserRole
+from models.base import Base
+from models.user_models import CompanyProfile
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """SQLite tạm cho từng test (file thật để nhiều thread dùng chung được)."""
+    test_engine = database.create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=test_engine)
+    database.db_session.configure(bind=test_engine)
+    # cache trong process giữ id của DB test trước
+    from services import user_service, skill_service, analytics_service, facet_service, limiter_store
+    user_service._bell_cache.clear()
+    limiter_store.set_store(limiter_store.MemoryStore())
+    import jwt_cache
+    jwt_cache.token_cache.clear()
+    skill_service.clear_skill_cache()
+    analytics_service.clear_analytics_cache()
+    facet_service.clear_facet_index()
+    yield test_engine
+    database.db_session.remove()
+    database.db_session.configure(bind=database.engine)
+    test_engine.dispose()
+
+
+@pytest.fixture
+def app(engine):
+    import app as app_module
+
+    app_module.app.config["TESTING"] = True
+    # N+1 trong routers / view -> test fail thay vì chỉ log
+    app_module.app.config["SQL_COUNTER_RAISE"] = True
+    app_module.limiter.enabled = False
+    app_module.talisman.force_https = False
+    return app_module.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_company(engine):
+    """Tạo User (role company) + Company (đã commit); truyền field của CompanyProfile để tạo kèm profile."""
+    db_session = database.db_session
+
+    def make(email="company@example.com", name="ACME", **profile):
+        user = User(email=email, password="x", role=UserRole.COMPANY)
+        db_session.add(user)
+        db_session.flush()
+        company = Company(userId=user.id, companyName=name)
+        db_session.add(company)
+        db_session.flush()
+        if profile:
+            db_session.add(CompanyProfile(companyId=company.id, **profile))
+        db_session.commit()
+        return company
+    return make
+
+
+@pytest.fixture
+def make_job(engine):
+    """
+    Tạo Job của company (đã commit), trả về id. skills: tên kỹ năng yêu cầu;
+    test=True: thêm SkillTest (10 điểm) cùng tên job; field khác của Job qua kwargs.
+    """
+    from services import company_service
+    db_session = database.db_session
+
+    def make(company, title="Backend", status="open", skills=(), test=False, **fields):
+        job = Job(companyId=company.id, title=title, status=status, **fields)
+        db_session.add(job)
+        db_session.flush()
+        if skills:
+            company_service.set_job_skills(job, [{"name": s} for s in skills])
+        if test:
+            db_session.add(SkillTest(jobId=job.id, testName=title, totalScore=10))
+        db_session.commit()
+        return job.id
+    return make
@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from database import db_session
+from models import User, Student, Job, SkillTest, Application, ApplicationStatus, UserRole
+from models.job_models import Question
+from models import TestResult as Result  # tránh pytest thu thập nhầm class Test*
+
+
+N_STUDENTS = 200
+MAX_APPLICANTS = 25
+
+
+@pytest.fixture
+def seed(make_company, make_job):
+    def seed(n_students, max_applicants):
+        job_id = make_job(make_company(), maxApplicants=max_applicants)
+
+        users = [
+            User(email=f"student{i}@example.com", password="x", role=UserRole.STUDENT)
+            for i in range(n_students)
+        ]
+        db_session.add_all(users)
+        db_session.flush()
+        db_session.add_all([Student(userId=u.id, fullName=u.email) for u in users])
+        db_session.commit()
+
+        user_ids = [u.id for u in users]
+        db_session.remove()
+        return job_id, user_ids
+    return seed
+
+
+def student_tokens(app, user_ids):
+    with app.app_context():
+        return [
+            create_access_token(identity=str(uid), additional_claims={"role": "student"})
+            for uid in user_ids
+        ]
+
+
+def fire(app, requests_, path=lambda job_id: "/api/apply/"):
+    """Gửi đồng loạt các POST {"jobId"} tới path(jobId) theo (token, jobId), mỗi request 1 thread."""
+    barrier = threading.Barrier(len(requests_))
+    statuses = [None] * len(requests_)
+
+    def worker(i, token, job_id):
+        client = app.test_client()
+        barrier.wait()
+        resp = client.post(
+            path(job_id),
+            json={"jobId": job_id},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        statuses[i] = resp.status_code
+
+    threads = [
+        threading.Thread(target=worker, args=(i, token, job_id))
+        for i, (token, job_id) in enumerate(requests_)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return statuses
+
+
+def test_concurrent_applies_never_exceed_max_applicants(app, seed):
+    job_id, user_ids = seed(N_STUDENTS, MAX_APPLICANTS)
+    tokens = student_tokens(app, user_ids)
+
+    statuses = fire(app, [(token, job_id) for token in tokens])
+
+    assert statuses.count(201) == MAX_APPLICANTS
+    assert statuses.count(400) == N_STUDENTS - MAX_APPLICANTS
+
+    job = db_session.get(Job, job_id)
+    assert db_session.query(Application).filter(Application.jobId == job_id).count() == MAX_APPLICANTS
+    assert job.appliedCount == MAX_APPLICANTS
+    assert job.status == "CLOSED"
+
+
+def test_concurrent_duplicate_applies_create_one_application(app, seed):
+    job_id, user_ids = seed(1, 0)
+    token = student_tokens(app, user_ids)[0]
+
+    statuses = fire(app, [(token, job_id)] * 50)
+
+    assert statuses.count(201) == 1
+    assert statuses.count(200) == 49
+
+    job = db_session.get(Job, job_id)
+    assert db_session.query(Application).filter(Application.jobId == job_id).count() == 1
+    assert job.appliedCount == 1
+
+
+def add_test(job_id):
+    test = SkillTest(jobId=job_id, testName="Python", totalScore=10)
+    db_session.add(test)
+    db_session.flush()
+    db_session.add(Question(testId=test.id, content="1 + 1?", correctAnswer="2"))
+    db_session.commit()
+    test_id = test.id
+    db_session.remove()
+    return test_id
+
+
+def test_concurrent_test_sessions_create_one_application(app, seed):
+    job_id, user_ids = seed(1, 0)
+    test_id = add_test(job_id)
+    token = student_tokens(app, user_ids)[0]
+
+    # start: add_application trả application đã có khi request khác tạo trước
+    statuses = fire(app, [(token, job_id)] * 20, path=lambda job_id: "/api/tests/start")
+    assert statuses == [200] * 20
+    assert db_session.query(Application).filter(Application.jobId == job_id).count() == 1
+    assert db_session.get(Job, job_id).appliedCount == 1
+    db_session.remove()
+
+    # submit khi chưa có application: mỗi bài nộp vẫn được lưu, chỉ 1 application
+    db_session.query(Application).delete()
+    db_session.query(Job).update({Job.appliedCount: 0})
+    db_session.commit()
+    statuses = fire(app, [(token, job_id)] * 20, path=lambda job_id: f"/api/tests/{test_id}/submit")
+    assert statuses == [200] * 20
+
+    apps = db_session.query(Application).filter(Application.jobId == job_id).all()
+    assert [a.status for a in apps] == [ApplicationStatus.PENDING]
+    assert db_session.get(Job, job_id).appliedCount == 1
+    assert db_session.query(Result).filter(Result.testId == test_id).count() == 20
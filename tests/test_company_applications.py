@@ -0,0 +1,95 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from database import db_session
+from services import user_service
+from models import User, Student, StudentProfile, Job, SkillTest, Application, UserRole
+from models import TestResult as Result  # tránh pytest thu thập nhầm class Test*
+
+
+def add_applications(company_id, start, stop):
+    jobs = db_session.query(Job).filter(Job.companyId == company_id).order_by(Job.id).all()
+    test = db_session.query(SkillTest).filter(SkillTest.jobId == jobs[0].id).one()
+
+    for i in range(start, stop):
+        user = User(email=f"student{i}@example.com", password="x", role=UserRole.STUDENT)
+        db_session.add(user)
+        db_session.flush()
+        student = Student(userId=user.id, fullName=f"Student {i}")
+        db_session.add(student)
+        db_session.flush()
+        db_session.add(StudentProfile(studentId=student.id, cvUrl=f"http://cv/{i}"))
+        job = jobs[i % len(jobs)]
+        db_session.add(Application(studentId=student.id, jobId=job.id))
+        if job.id == test.jobId:
+            db_session.add(Result(testId=test.id, studentId=student.id, score=i))
+
+    db_session.commit()
+    db_session.remove()
+
+
+def count_queries(engine, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+@pytest.fixture
+def company_token(app):
+    def make(user_id):
+        with app.app_context():
+            return create_access_token(identity=str(user_id), additional_claims={"role": "company"})
+    return make
+
+
+def run_dashboard(engine, client, token, company_id):
+    def api():
+        resp = client.get(
+            f"/api/companies/{company_id}/applications",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert resp.status_code == 200
+        api.rows = resp.get_json()
+
+    def view():
+        user_service._bell_cache.clear()  # đo cả query của chuông thông báo
+        client.set_cookie("ui_access_token", token)
+        resp = client.get("/company/applications")
+        assert resp.status_code == 200
+        view.html = resp.get_data(as_text=True)
+
+    return count_queries(engine, api), api.rows, count_queries(engine, view), view.html
+
+
+def test_dashboard_query_count_does_not_grow_with_rows(engine, client, company_token, make_company, make_job):
+    company = make_company()
+    for i in range(3):
+        make_job(company, f"Job {i}", test=i == 0)
+    user_id, company_id = company.userId, company.id
+    db_session.remove()
+    token = company_token(user_id)
+
+    add_applications(company_id, 0, 3)
+    small = run_dashboard(engine, client, token, company_id)
+
+    add_applications(company_id, 3, 30)
+    api_queries, rows, view_queries, html = run_dashboard(engine, client, token, company_id)
+
+    assert (api_queries, view_queries) == (small[0], small[2])
+
+    assert len(rows) == 30
+    scores = {r["studentName"]: r["testScore"] for r in rows}
+    assert scores["Student 0"] == 0
+    assert scores["Student 3"] == 3
+    assert scores["Student 1"] == "N/A"
+    assert all(r["cvUrl"] for r in rows)
+    assert "27/10" in html
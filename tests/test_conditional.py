@@ -0,0 +1,129 @@
+import gzip
+import re
+
+from flask_jwt_extended import create_access_token
+
+from database import db_session
+from models import User, Company, Student, Job, UserRole
+from services import admin_service
+
+
+def _seed_jobs(n=20):
+    user = User(email="company@example.com", password="x", role=UserRole.COMPANY)
+    db_session.add(user)
+    db_session.flush()
+    company = Company(userId=user.id, companyName="ACME")
+    db_session.add(company)
+    db_session.flush()
+    db_session.add_all([
+        Job(companyId=company.id, title=f"Job {i}", description="Mô tả công việc " * 10,
+            status="open", maxApplicants=10)
+        for i in range(n)
+    ])
+    db_session.commit()
+
+
+def test_jobs_list_returns_304_until_data_changes(client):
+    _seed_jobs()
+
+    first = client.get("/api/jobs/")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    cached = client.get("/api/jobs/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b""
+
+    job = db_session.query(Job).first()
+    job.title = "Đổi tên"
+    db_session.commit()
+
+    changed = client.get("/api/jobs/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_etag_depends_on_query_string(client):
+    _seed_jobs()
+
+    etag = client.get("/api/jobs/?limit=5").headers["ETag"]
+    other = client.get("/api/jobs/?limit=6", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+
+
+def test_admin_users_304_only_for_admin(app, client):
+    admin = User(email="admin@example.com", password="x", role=UserRole.ADMIN)
+    student = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add_all([admin, student])
+    db_session.commit()
+    student_id = student.id
+
+    with app.app_context():
+        admin_token = create_access_token(identity=str(admin.id), additional_claims={"role": "admin"})
+        student_token = create_access_token(identity=str(student.id), additional_claims={"role": "student"})
+
+    resp = client.get("/api/admin/users", headers={"Authorization": f"Bearer {admin_token}"})
+    etag = resp.headers["ETag"]
+    assert client.get("/api/admin/users", headers={
+        "Authorization": f"Bearer {admin_token}", "If-None-Match": etag
+    }).status_code == 304
+
+    forbidden = client.get("/api/admin/users", headers={
+        "Authorization": f"Bearer {student_token}", "If-None-Match": etag
+    })
+    assert forbidden.status_code == 403
+
+    admin_service.set_user_status(student_id, "locked")
+    assert client.get("/api/admin/users", headers={
+        "Authorization": f"Bearer {admin_token}", "If-None-Match": etag
+    }).status_code == 200
+
+
+def test_gzip_when_client_accepts_it(client):
+    _seed_jobs()
+
+    plain = client.get("/api/jobs/")
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    resp = client.get("/api/jobs/", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(resp.get_data()) == plain.get_data()
+    assert len(resp.get_data()) < len(plain.get_data())
+
+
+def test_student_home_revalidates_and_masks_apply_token(app, client):
+    _seed_jobs(3)
+    user = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.flush()
+    db_session.add(Student(userId=user.id, fullName="SV"))
+    db_session.commit()
+
+    with app.app_context():
+        token = create_access_token(identity=str(user.id), additional_claims={"role": "student"})
+    client.set_cookie("ui_access_token", token)
+
+    def form_token(resp):
+        return re.search(r'name="csrf_token" value="([0-9a-f]+)"', resp.get_data(as_text=True)).group(1)
+
+    # lần đầu chưa có bí mật -> cấp cookie, chưa có ETag
+    assert "ETag" not in client.get("/student/home").headers
+    secret = client.get_cookie("apply_csrf").value
+
+    first = client.get("/student/home")
+    etag, first_token = first.headers["ETag"], form_token(first)
+    assert secret not in first.get_data(as_text=True)
+
+    # trang khác query string render lại: token khác (mask mới), bí mật giữ nguyên
+    other = client.get("/student/home?msg=hello")
+    assert form_token(other) != first_token
+    assert client.get_cookie("apply_csrf").value == secret
+
+    # trang trong cache (304) vẫn giữ token cũ -> vẫn ứng tuyển được
+    assert client.get("/student/home", headers={"If-None-Match": etag}).status_code == 304
+    assert client.post("/apply/1", data={"csrf_token": first_token}).status_code != 400
+    assert client.post("/apply/1", data={"csrf_token": form_token(other)}).status_code != 400
+    assert client.post("/apply/1", data={"csrf_token": secret}).status_code == 400
+    assert client.post("/apply/1", data={"csrf_token": "zz"}).status_code == 400
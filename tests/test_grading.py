@@ -0,0 +1,166 @@
+import json
+
+import pytest
+
+from database import db_session
+from services import admin_service, company_service, grading_service, student_service
+from services.grading_service import AnswerKey, _score, parse_answers, parse_options
+from models import User, Student, SkillTest, UserRole
+from models import TestResult as Result, TestAnswer as Answer  # tránh pytest thu thập nhầm class Test*
+from models.job_models import Question
+
+
+@pytest.fixture
+def seed_test(make_company, make_job):
+    def seed(questions, total_score=100):
+        company = make_company()
+        job_id = make_job(company)
+        test = SkillTest(jobId=job_id, testName="Python", totalScore=total_score)
+        db_session.add(test)
+        db_session.flush()
+        ids = []
+        for content, options, answer, *mode in questions:
+            q = Question(testId=test.id, content=content, options=options, correctAnswer=answer,
+                         gradingMode=mode[0] if mode else None)
+            db_session.add(q)
+            db_session.flush()
+            ids.append(q.id)
+        db_session.commit()
+        return company, job_id, test.id, ids
+    return seed
+
+
+def seed_student(n=0):
+    user = User(email=f"student{n}@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.flush()
+    student = Student(userId=user.id, fullName=f"Student {n}")
+    db_session.add(student)
+    db_session.commit()
+    return student
+
+
+def test_parse_options_and_answers():
+    assert parse_options('["1", "2", "3"]') == ["1", "2", "3"]
+    assert parse_options("A. Flask\nB. Django\n") == ["Flask", "Django"]
+    assert parse_options("Flask | Django") == ["Flask", "Django"]
+    assert parse_options("") == []
+
+    assert parse_answers({"answer_3": "B", "csrf": "x"}) == {3: "B"}
+    assert parse_answers('[{"questionId": 4, "answer": "A"}]') == {4: "A"}
+    assert parse_answers("not json") == {}
+
+
+def test_grading_modes():
+    key = AnswerKey([
+        (1, "A. list\nB. dict\nC. set", "B", None),       # trắc nghiệm (tự nhận theo options)
+        (2, "", "Hà Nội", None),                           # normalized
+        (3, "", "SELECT 1", "exact"),
+        (4, "", "", None),                                 # tự luận -> không chấm
+        (5, "red|green|blue", "A, C", None),               # nhiều đáp án
+    ])
+    marked = key.mark({1: "b", 2: " hà  nội! ", 3: "SELECT 1", 4: "...", 5: ["C", "A"]}, 8)
+    assert [(q, correct, points) for q, _, correct, points, _ in marked] == [
+        (1, True, 2.0), (2, True, 2.0), (3, True, 2.0), (4, None, None), (5, True, 2.0)
+    ]
+    marked = key.mark({1: "dict", 2: "Ha Noi", 3: "select 1", 5: "A"}, 8)
+    assert [correct for _, _, correct, _, _ in marked] == [True, False, False, False]
+    assert _score(key, marked, 8) == 2
+    assert _score(key, key.mark({1: "B", 2: "Hà Nội"}, 10), 10) == 5
+
+    # không có câu chấm được -> 0 điểm (như record_submission)
+    essay = AnswerKey([(1, "", "", None)])
+    assert _score(essay, essay.mark({1: "x"}, 10), 10) == 0
+
+
+def test_submit_grades_against_answer_key(seed_test):
+    company, job_id, test_id, (q1, q2) = seed_test([
+        ("2 + 2?", "3\n4\n5", "B"),
+        ("Thủ đô?", "", "Hà Nội"),
+    ], total_score=10)
+    student = seed_student()
+
+    result = student_service.submit_test(student, test_id, {
+        "score": 999,  # điểm client gửi bị bỏ qua
+        "answers": {f"answer_{q1}": "B", f"answer_{q2}": "hà nội"}
+    })
+    assert result["score"] == 10
+    tr = db_session.query(Result).filter(Result.testId == test_id).one()
+    assert tr.score == 10 and tr.answers is None
+
+    answers = grading_service.list_result_answers(test_id, tr.id)
+    assert [(a["questionId"], a["answer"], a["correct"], a["points"]) for a in answers] == [
+        (q1, "B", True, 5.0), (q2, "hà nội", True, 5.0)
+    ]
+
+
+def test_detail_lists_unanswered_and_essay_questions(seed_test):
+    company, job_id, test_id, (q1, q2, q3) = seed_test([
+        ("2 + 2?", "3\n4\n5", "B"),
+        ("Giới thiệu bản thân", "", ""),
+        ("Thủ đô?", "", "Hà Nội"),
+    ], total_score=10)
+    student = seed_student()
+    student_service.submit_test(student, test_id, {"answers": [
+        {"questionId": q1, "answer": "C"}, {"questionId": q2, "answer": "Tôi là..."}
+    ]})
+    tr = db_session.query(Result).one()
+
+    answers = grading_service.list_result_answers(test_id, tr.id)
+    assert [(a["answer"], a["correct"], a["points"]) for a in answers] == [
+        ("C", False, 0.0), ("Tôi là...", None, None), (None, None, None)
+    ]
+    assert tr.score == 0
+
+
+def test_migrate_legacy_json_answers(seed_test):
+    company, job_id, test_id, (q1, q2) = seed_test([
+        ("2 + 2?", "3\n4\n5", "B"),
+        ("Thủ đô?", "", "Hà Nội"),
+    ], total_score=10)
+    for i in range(3):
+        student = seed_student(i)
+        db_session.add(Result(testId=test_id, studentId=student.id, score=0,
+                              answers=json.dumps({f"answer_{q1}": "B", f"answer_{q2}": "x"})))
+    db_session.commit()
+
+    assert grading_service.migrate_legacy_answers(chunk_size=2) == 3
+    assert db_session.query(Answer).count() == 6
+    assert grading_service.migrate_legacy_answers() == 0   # đã chuyển -> bỏ qua
+
+
+def test_regrade_streams_results_in_chunks(seed_test):
+    company, job_id, test_id, (q1,) = seed_test([("2 + 2?", "3\n4\n5", "B")], total_score=10)
+    test = db_session.get(SkillTest, test_id)
+    for i in range(7):
+        student = seed_student(i)
+        grading_service.record_submission(Result(testId=test_id, studentId=student.id), test,
+                                          {f"answer_{q1}": "A" if i % 2 else "B"})
+    db_session.commit()
+    assert [s for (s,) in db_session.query(Result.score).order_by(Result.id)] == [10, 0, 10, 0, 10, 0, 10]
+
+    # đổi đáp án qua update_job: id câu hỏi giữ nguyên -> chấm lại được
+    company_service.update_job(company, job_id, {"test": {"testName": "Python", "totalScore": 10, "questions": [
+        {"content": "2 + 2?", "options": "3\n4\n5", "correctAnswer": "A"}
+    ]}})
+    assert [q.id for q in db_session.query(Question).filter(Question.testId == test_id)] == [q1]
+
+    assert grading_service.regrade_test(test_id, chunk_size=3) == 7
+    scores = [s for (s,) in db_session.query(Result.score).filter(Result.testId == test_id).order_by(Result.id)]
+    assert scores == [0, 10, 0, 10, 0, 10, 0]
+    assert db_session.query(Answer).filter(Answer.correct.is_(True)).count() == 3
+
+
+def test_delete_test_removes_answers(seed_test):
+    company, job_id, test_id, (q1, q2) = seed_test([
+        ("2 + 2?", "3\n4\n5", "B"),
+        ("Thủ đô?", "", "Hà Nội"),
+    ], total_score=10)
+    for i in range(2):
+        student_service.submit_test(seed_student(i), test_id, {"answers": {f"answer_{q1}": "B", f"answer_{q2}": "x"}})
+    assert db_session.query(Answer).count() == 4
+
+    admin_service.delete_test(test_id)
+    assert db_session.query(Answer).count() == 0
+    assert db_session.query(Result).count() == 0
+    assert db_session.query(Question).count() == 0
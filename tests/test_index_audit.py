@@ -0,0 +1,16 @@
+from sqlalchemy import text
+
+import index_audit
+
+
+def test_catalogue_queries_use_indexes(engine):
+    failures = [(name, plan) for name, plan, scans in index_audit.run_audit() if scans]
+    assert failures == []
+
+
+def test_missing_index_is_reported(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_notifications_userId_createdAt"))
+
+    scans = {name: scans for name, _, scans in index_audit.run_audit()}
+    assert scans["notifications của user, mới nhất trước"] == ["notifications"]
@@ -0,0 +1,148 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from database import db_session
+from services import analytics_service, company_service, grading_service
+from models import User, Student, SkillTest, UserRole
+from models import TestResult as Result, TestAnswer as Answer  # tránh pytest thu thập nhầm class Test*
+from models.job_models import Question
+
+
+@pytest.fixture
+def seed_test(make_company, make_job):
+    def seed():
+        company = make_company()
+        job_id = make_job(company)
+        test = SkillTest(jobId=job_id, testName="Python", totalScore=10)
+        db_session.add(test)
+        db_session.flush()
+        ids = []
+        for content, options, answer in [("2 + 2?", "1|4|5|6", "B"), ("Thủ đô?", "", "Hà Nội"), ("Giới thiệu", "", "")]:
+            q = Question(testId=test.id, content=content, options=options, correctAnswer=answer)
+            db_session.add(q)
+            db_session.flush()
+            ids.append(q.id)
+        db_session.commit()
+        return company.userId, company, job_id, test, ids
+    return seed
+
+
+def submit(test, n, answers):
+    user = User(email=f"student{n}@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.flush()
+    student = Student(userId=user.id, fullName=f"Student {n}")
+    db_session.add(student)
+    db_session.flush()
+    grading_service.record_submission(Result(testId=test.id, studentId=student.id), test, answers)
+    db_session.commit()
+
+
+def seed_submissions(test, ids):
+    q1, q2, q3 = ids
+    for i in range(10):
+        answers = {q2: "hà nội" if i % 2 == 0 else "abc", q3: "..."}
+        if i < 9:
+            answers[q1] = "B" if i < 6 else "C" if i < 8 else "x"
+        submit(test, i, answers)
+
+
+def count_statements(engine, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return result, len(statements)
+
+
+def test_difficulty_discrimination_and_options(seed_test):
+    _, _, _, test, ids = seed_test()
+    seed_submissions(test, ids)
+
+    analytics = analytics_service.get_item_analytics(test.id)
+    assert (analytics["submissions"], analytics["groupSize"]) == (10, 3)
+
+    choice, text, essay = analytics["questions"]
+    # nhóm cao: 3 bài 10 điểm; nhóm thấp: 2 bài 0 điểm + bài 5 điểm id lớn nhất
+    assert (choice["mode"], choice["answered"], choice["difficulty"], choice["discrimination"]) == ("choice", 9, 0.6, 1.0)
+    assert (text["difficulty"], text["discrimination"], text["weak"]) == (0.5, 0.6667, False)
+    assert (essay["mode"], essay["answered"], essay["difficulty"], essay["discrimination"]) == ("essay", 10, None, None)
+
+    assert [(o["label"], o["count"], o["isCorrect"]) for o in choice["options"]] == [
+        ("A", 0, False), ("B", 6, True), ("C", 2, False), ("D", 0, False), (None, 1, False)
+    ]
+    assert text["options"] is None
+
+
+def test_cached_until_new_submission_or_question_edit(engine, seed_test):
+    _, company, job_id, test, ids = seed_test()
+    seed_submissions(test, ids)
+    first = analytics_service.get_item_analytics(test.id)
+
+    cached, statements = count_statements(engine, lambda: analytics_service.get_item_analytics(test.id))
+    assert cached is first
+    assert statements == 2  # kiểm tra test + version
+
+    submit(test, 10, {ids[0]: "A"})
+    assert analytics_service.get_item_analytics(test.id)["submissions"] == 11
+
+    company_service.update_job(company, job_id, {"test": {"testName": "Python", "totalScore": 10, "questions": [
+        {"content": "2 + 2 = ?", "options": "1|4|5|6", "correctAnswer": "B"}
+    ]}})
+    questions = analytics_service.get_item_analytics(test.id)["questions"]
+    assert [q["content"] for q in questions] == ["2 + 2 = ?"]
+
+
+def test_regrade_with_same_total_score_refreshes_cache(seed_test):
+    _, company, job_id, test, (q1, q2, _) = seed_test()
+    for n, answers in enumerate([{q1: "B", q2: "x"}, {q1: "B", q2: "x"}, {q1: "A", q2: "abc"}]):
+        submit(test, n, answers)
+
+    # đổi đáp án, xem thống kê trước khi chấm lại (test_answers vẫn theo đáp án cũ)
+    company_service.update_job(company, job_id, {"test": {"testName": "Python", "totalScore": 10, "questions": [
+        {"content": "2 + 2?", "options": "1|4|5|6", "correctAnswer": "A"},
+        {"content": "Thủ đô?", "options": "", "correctAnswer": "abc"},
+        {"content": "Giới thiệu", "options": "", "correctAnswer": ""},
+    ]}})
+    version = analytics_service.results_version(test.id)
+    assert analytics_service.get_item_analytics(test.id)["questions"][0]["difficulty"] == 0.6667
+
+    # điểm từng bài đổi (5, 5, 0 -> 0, 0, 10) nhưng tổng điểm giữ nguyên
+    assert grading_service.regrade_test(test.id) == 3
+    assert analytics_service.results_version(test.id) == version
+    assert analytics_service.get_item_analytics(test.id)["questions"][0]["difficulty"] == 0.3333
+
+
+def test_analytics_endpoint_checks_ownership(client, app, seed_test, make_company):
+    user_id, _, job_id, test, ids = seed_test()
+    seed_submissions(test, ids)
+    other_id = make_company("other@example.com", "Other").userId
+
+    def get(uid):
+        with app.app_context():
+            token = create_access_token(identity=str(uid), additional_claims={"role": "company"})
+        return client.get(f"/api/jobs/{job_id}/test-analytics", headers={"Authorization": f"Bearer {token}"})
+
+    res = get(user_id)
+    assert res.status_code == 200
+    assert res.get_json()["submissions"] == 10
+    assert get(other_id).status_code == 403
+
+
+def test_backfill_answer_choices(seed_test):
+    _, _, _, test, ids = seed_test()
+    seed_submissions(test, ids)
+    expected = analytics_service.compute_item_analytics(test.id)
+
+    # dữ liệu trước khi có cột choice
+    db_session.query(Answer).update({Answer.choice: None}, synchronize_session=False)
+    db_session.commit()
+    assert grading_service.backfill_answer_choices(chunk_size=4) == 8  # "x" không khớp lựa chọn nào
+    assert analytics_service.compute_item_analytics(test.id) == expected
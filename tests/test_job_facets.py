@@ -0,0 +1,122 @@
+import pytest
+from sqlalchemy import event
+
+from database import db_session
+from services import company_service, facet_service, recruitment_service
+from models import User, Student, Job, UserRole
+from models.user_models import CompanyProfile
+
+
+@pytest.fixture
+def seed_jobs(make_company, make_job):
+    def seed():
+        it = make_company("it@example.com", "it@example.com", industry="IT", size="50-100")
+        bank = make_company("bank@example.com", "bank@example.com", industry="Tài chính", size="1000+")
+        make_job(it, "Backend", location="Hà Nội", skills=["Python", "SQL"], test=True)
+        make_job(it, "Frontend", location="Đà Nẵng", skills=["JavaScript"])
+        make_job(bank, "Data", location="Hà Nội", skills=["Python"], test=True)
+        make_job(bank, "Đã đóng", "CLOSED", location="Hà Nội", skills=["Python"])
+        return it, bank
+    return seed
+
+
+def counts(result, facet):
+    return {e["value"]: e["count"] for e in result["facets"][facet]}
+
+
+def skill_counts(result):
+    return {e["label"]: e["count"] for e in result["facets"]["skills"]}
+
+
+def test_counts_and_multi_select(seed_jobs):
+    seed_jobs()
+
+    result = facet_service.get_job_facets()
+    assert result["total"] == 3  # job CLOSED không tính
+    assert counts(result, "location") == {"Hà Nội": 2, "Đà Nẵng": 1}
+    assert counts(result, "industry") == {"IT": 2, "Tài chính": 1}
+    assert counts(result, "size") == {"50-100": 2, "1000+": 1}
+    assert counts(result, "hasTest") == {True: 2, False: 1}
+    assert skill_counts(result) == {"Python": 2, "SQL": 1, "JavaScript": 1}
+    assert [j["title"] for j in result["items"]] == ["Data", "Frontend", "Backend"]
+
+    # OR trong 1 facet, AND giữa các facet; facet đang lọc vẫn đếm theo các facet khác
+    result = facet_service.get_job_facets({"location": {"Hà Nội"}, "industry": {"IT"}})
+    assert [j["title"] for j in result["items"]] == ["Backend"]
+    assert counts(result, "location") == {"Hà Nội": 1, "Đà Nẵng": 1}
+    assert counts(result, "industry") == {"IT": 1, "Tài chính": 1}
+    assert skill_counts(result) == {"Python": 1, "SQL": 1}
+
+    python = next(e["value"] for e in facet_service.get_job_facets()["facets"]["skills"] if e["label"] == "Python")
+    result = facet_service.get_job_facets({"skills": {python}, "hasTest": {True}, "location": {"Huế"}})
+    assert result["total"] == 0
+    assert counts(result, "location") == {"Hà Nội": 2, "Huế": 0}  # giá trị đang chọn luôn có mặt
+
+
+def test_counts_without_sql_and_incremental_updates(engine, seed_jobs):
+    it, bank = seed_jobs()
+    facet_service.get_job_facets()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        facet_service.get_job_facets({"location": {"Hà Nội"}}, limit=1)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 1  # chỉ nạp job của trang, không đếm bằng SQL
+
+    # sửa job / skill / bài test / hồ sơ công ty -> chỉ nạp lại job bị ảnh hưởng
+    frontend = db_session.query(Job).filter(Job.title == "Frontend").one().id
+    company_service.update_job(it, frontend, {
+        "location": "Hà Nội", "skills": [{"name": "Go"}], "test": {"testName": "Go"}
+    })
+    profile = db_session.query(CompanyProfile).filter(CompanyProfile.companyId == bank.id).one()
+    profile.industry = "Ngân hàng"
+    db_session.commit()
+
+    result = facet_service.get_job_facets()
+    assert counts(result, "location") == {"Hà Nội": 3}
+    assert counts(result, "industry") == {"IT": 2, "Ngân hàng": 1}
+    assert counts(result, "hasTest") == {True: 3}
+    assert skill_counts(result) == {"Python": 2, "SQL": 1, "Go": 1}
+
+
+def test_bulk_close_seen_by_sync(seed_jobs, make_job):
+    it, _ = seed_jobs()
+    full = make_job(it, "Full", location="Huế", maxApplicants=1)
+    facet_service.get_job_facets()
+
+    user = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.flush()
+    student = Student(userId=user.id, fullName="Student")
+    db_session.add(student)
+    db_session.commit()
+
+    # job đóng bằng câu UPDATE hàng loạt khi đủ người
+    recruitment_service.apply_job(student.id, full)
+    assert "Huế" not in counts(facet_service.get_job_facets(), "location")
+
+    # thay đổi từ process khác: chỉ thấy qua updatedAt khi tới lượt đồng bộ
+    db_session.query(Job).filter(Job.id == full).update({Job.status: "open"}, synchronize_session=False)
+    db_session.commit()
+    facet_service.sync_facet_index(force=True)
+    assert counts(facet_service.get_job_facets(), "location")["Huế"] == 1
+
+
+def test_facets_endpoint(client, seed_jobs):
+    seed_jobs()
+
+    res = client.get("/api/jobs/facets?location=Hà Nội&location=Đà Nẵng&hasTest=true&limit=1")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["total"] == 2
+    assert [j["title"] for j in body["items"]] == ["Data"]
+
+    res = client.get(f"/api/jobs/facets?location=Hà Nội&hasTest=true&limit=1&cursor={body['nextCursor']}")
+    assert [j["title"] for j in res.get_json()["items"]] == ["Backend"]
+    assert res.get_json()["nextCursor"] is None
+
+    assert client.get("/api/jobs/facets?hasTest=maybe").status_code == 400
+    assert client.get("/api/jobs/facets?skill=python").status_code == 400
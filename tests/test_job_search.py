@@ -0,0 +1,85 @@
+import pytest
+
+from database import db_session
+from services import company_service, job_search_service
+from services.job_search_service import parse_query
+from models import Job, SkillTest
+
+
+@pytest.fixture
+def add_job(make_job):
+    def add(company, title, description="", location="Hà Nội", status="open"):
+        return make_job(company, title, status, description=description, location=location)
+    return add
+
+
+def titles(results):
+    return [r["title"] for r in results]
+
+
+def test_parse_query():
+    assert parse_query("Python  dev*") == [("python", False), ("dev", True)]
+    assert parse_query("lập trình \"; DROP") == [("lập", False), ("trình", False), ("drop", True)]
+    assert parse_query("  ") == []
+
+
+def test_ranking_prefix_and_filters(make_company, add_job):
+    company = make_company()
+    add_job(company, "Backend Developer", "Làm việc với Python và Django")
+    add_job(company, "Python Developer", "Xây dựng API", location="Hồ Chí Minh")
+    add_job(company, "Kế toán", "Không liên quan")
+    closed = add_job(company, "Python Intern", status="CLOSED")
+
+    # title nặng hơn description
+    assert titles(job_search_service.search_jobs("python")) == ["Python Developer", "Backend Developer"]
+    assert titles(job_search_service.search_jobs("python dev")) == ["Python Developer", "Backend Developer"]
+    assert titles(job_search_service.search_jobs("ke toan")) == ["Kế toán"]   # bỏ dấu
+    assert job_search_service.search_jobs("pyth dev") == []                  # chỉ từ cuối là prefix
+    assert titles(job_search_service.search_jobs("python", location="ha noi")) == ["Backend Developer"]
+    assert closed in [r["id"] for r in job_search_service.search_jobs("intern", status=None)]
+    assert job_search_service.search_jobs("intern") == []
+    assert job_search_service.search_jobs("") == []
+
+
+def test_index_follows_job_updates(make_company, add_job):
+    company = make_company()
+    job_id = add_job(company, "Java Developer")
+    db_session.add(SkillTest(jobId=job_id, testName="Java", totalScore=10))
+    db_session.commit()
+
+    company_service.update_job(company, job_id, {"title": "Golang Developer", "location": "Đà Nẵng"})
+    assert job_search_service.search_jobs("java") == []
+    [job] = job_search_service.search_jobs("golang", location="da nang")
+    assert (job["id"], job["hasTest"]) == (job_id, True)
+
+    # UPDATE / DELETE hàng loạt không qua ORM vẫn được trigger cập nhật
+    db_session.query(Job).filter(Job.id == job_id).update({Job.title: "Rust Developer"}, synchronize_session=False)
+    db_session.commit()
+    assert titles(job_search_service.search_jobs("rust")) == ["Rust Developer"]
+    db_session.query(SkillTest).delete()
+    db_session.query(Job).delete()
+    db_session.commit()
+    assert job_search_service.search_jobs("rust") == []
+
+
+def test_ranks_all_matches_unless_cutoff_enabled(make_company, add_job, monkeypatch):
+    company = make_company()
+    add_job(company, "Python Developer")                      # cũ nhất, khớp ở title
+    for i in range(5):
+        add_job(company, f"Backend {i}", "Có dùng Python")
+
+    assert titles(job_search_service.search_jobs("python", limit=1)) == ["Python Developer"]
+    # chỉ xếp hạng 3 job khớp mới nhất (opt-in) -> job cũ bị bỏ qua
+    monkeypatch.setattr(job_search_service, "SEARCH_CANDIDATES", 3)
+    assert titles(job_search_service.search_jobs("python", limit=1)) == ["Backend 4"]
+
+
+def test_search_endpoint(client, make_company, add_job):
+    company = make_company()
+    add_job(company, "Python Developer")
+    add_job(company, "Python Intern", status="CLOSED")
+
+    res = client.get("/api/jobs/search?q=pyth")
+    assert res.status_code == 200
+    assert titles(res.get_json()) == ["Python Developer"]
+    assert len(client.get("/api/jobs/search?q=python&status=all").get_json()) == 2
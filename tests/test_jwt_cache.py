@@ -0,0 +1,95 @@
+import time
+
+import jwt
+import pytest
+from flask_jwt_extended import create_access_token
+from flask_jwt_extended.jwt_manager import JWTManager
+
+import jwt_cache
+from database import db_session
+from models import User, UserRole
+from jwt_cache import VerifiedTokenCache
+
+
+@pytest.fixture
+def token(app):
+    user = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.commit()
+    with app.app_context():
+        return user.id, create_access_token(identity=str(user.id), additional_claims={"role": "student"})
+
+
+def count_calls(monkeypatch, owner, name):
+    calls = []
+    original = getattr(owner, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(owner, name, wrapper)
+    return calls
+
+
+def test_page_verifies_cookie_token_once(client, token, monkeypatch):
+    decodes = count_calls(monkeypatch, jwt, "decode")
+    client.set_cookie("ui_access_token", token[1])
+
+    # wrap_layout + show_notifications cùng đọc token: 1 lần kiểm tra
+    assert client.get("/login").status_code == 200
+    assert len(decodes) == 1
+    # request sau: lấy từ LRU
+    assert client.get("/login").status_code == 200
+    assert len(decodes) == 1
+
+    client.set_cookie("ui_access_token", token[1] + "x")
+    html = client.get("/login").get_data(as_text=True)
+    assert "/student/home" not in html
+    assert len(jwt_cache.token_cache) == 1   # token sai không vào cache
+
+
+def test_api_verifies_header_token_once(client, token, monkeypatch):
+    # flask_jwt_extended phải đi qua hàm ghi đè (hàm riêng có thể đổi khi nâng cấp)
+    overrides = count_calls(monkeypatch, jwt_cache.CachedJWTManager, "_decode_jwt_from_config")
+    decodes = count_calls(monkeypatch, JWTManager, "_decode_jwt_from_config")
+    user_id, access_token = token
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    for _ in range(3):
+        assert client.get(f"/api/notifications/{user_id}", headers=headers).status_code == 200
+    assert len(overrides) == 3
+    assert len(decodes) == 1
+
+    bad = {"Authorization": f"Bearer {access_token}x"}
+    assert client.get(f"/api/notifications/{user_id}", headers=bad).status_code in (401, 422)
+    assert client.get(f"/api/notifications/{user_id}", headers=bad).status_code in (401, 422)
+    assert len(decodes) == 3
+
+
+def test_manager_rejects_changed_private_signature(monkeypatch):
+    monkeypatch.setattr(JWTManager, "_decode_jwt_from_config", lambda self, encoded_token: {})
+    with pytest.raises(RuntimeError):
+        jwt_cache.CachedJWTManager()
+
+
+def test_cached_claims_expire_with_token():
+    cache = VerifiedTokenCache(maxsize=2, ttl=300)
+    calls = []
+
+    def decode(exp):
+        calls.append(exp)
+        return {"sub": "1", "exp": exp}
+
+    soon = time.time() + 0.05
+    cache.claims("a", lambda: decode(soon))
+    cache.claims("a", lambda: decode(soon))
+    assert len(calls) == 1
+    time.sleep(0.1)
+    cache.claims("a", lambda: decode(time.time() + 60))
+    assert len(calls) == 2
+
+    # LRU tối đa 2 token
+    for key in "bcd":
+        cache.claims(key, lambda: decode(time.time() + 60))
+    assert len(cache) == 2
@@ -0,0 +1,21 @@
+from utils import STYLESHEET_URL
+
+
+def test_layout_links_fingerprinted_stylesheet(client):
+    html = client.get("/login").get_data(as_text=True)
+
+    assert f'href="{STYLESHEET_URL}"' in html
+    assert "<style>" not in html
+
+
+def test_stylesheet_is_cached_long_term(client):
+    resp = client.get(STYLESHEET_URL)
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/css"
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert ".notif-bell" in resp.get_data(as_text=True)
+
+
+def test_stale_fingerprint_is_not_served(client):
+    assert client.get("/assets/app.000000000000.css").status_code == 404
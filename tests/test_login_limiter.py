@@ -0,0 +1,141 @@
+import pytest
+from flask import Flask
+from flask_limiter import Limiter
+
+from services import limiter_store, password_service, user_service
+from services.base import ServiceError
+from services.limiter_server import LimiterServer
+from services.limiter_store import LimiterStore, MemoryStore, RedisStore, SQLiteStore, per_process_warning
+
+PASSWORD = "Secret@123"
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def server():
+    server = LimiterServer(port=0)
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path, server):
+    """Tạo store (mỗi lần gọi = 1 "worker"); các store sqlite / redis cùng trỏ 1 chỗ."""
+    def make(clock, max_keys=100):
+        if request.param == "memory":
+            return MemoryStore(max_keys=max_keys, clock=clock)
+        if request.param == "sqlite":
+            return SQLiteStore(str(tmp_path / "limiter.db"), max_keys=max_keys, clock=clock)
+        return RedisStore("127.0.0.1", server.port, clock=clock)
+    return make
+
+
+def test_sliding_window_count(make_store):
+    clock = Clock(1_000_000.0)  # đầu 1 khung 100 giây
+    store = make_store(clock)
+    for _ in range(4):
+        store.hit("login:a", 100)
+    assert store.count("login:a", 100) == 4
+    assert store.count("login:b", 100) == 0
+
+    # giữa khung sau: còn 1/2 khung trước trong cửa sổ
+    clock.now += 150
+    assert store.count("login:a", 100) == 2
+    assert store.hit("login:a", 100) == 3
+    assert store.acquire("login:a", 3, 100) is False
+    assert store.count("login:a", 100) == 3   # lần bị từ chối không được tính
+
+    clock.now += 200
+    assert store.count("login:a", 100) == 0
+    store.hit("login:a", 100)
+    store.clear("login:a", 100)
+    assert store.count("login:a", 100) == 0
+
+
+def test_workers_share_counters(make_store, request):
+    if "memory" in request.node.callspec.id:
+        pytest.skip("memory:// chỉ dùng trong 1 process")
+    clock = Clock()
+    worker_a, worker_b = make_store(clock), make_store(clock)
+    worker_a.hit("login:x", 300)
+    worker_b.hit("login:x", 300)
+    assert worker_a.count("login:x", 300) == worker_b.count("login:x", 300) == 2
+
+
+def test_memory_ceiling(tmp_path):
+    clock = Clock()
+    memory = MemoryStore(max_keys=50, clock=clock)
+    for i in range(1000):
+        memory.incr(f"k{i}", 1, 60)
+    assert len(memory) == 50
+    assert memory.get_many(["k999", "k0"]) == [1, 0]   # bỏ key ít dùng nhất
+
+    sqlite = SQLiteStore(str(tmp_path / "limiter.db"), max_keys=50, clock=clock)
+    for i in range(SQLiteStore.PRUNE_EVERY):
+        sqlite.incr(f"k{i}", 1, 60 + i)
+    assert len(sqlite) == 50
+    assert sqlite.get_many([f"k{SQLiteStore.PRUNE_EVERY - 1}", "k0"]) == [1, 0]
+
+
+def test_login_blocked_across_workers(app, monkeypatch, server):
+    monkeypatch.setattr(password_service, "BCRYPT_ROUNDS", 4)
+    user_service.create_user("student@example.com", PASSWORD)
+
+    clock = Clock()
+    worker_a = RedisStore("127.0.0.1", server.port, clock=clock)
+    worker_b = RedisStore("127.0.0.1", server.port, clock=clock)
+    with app.app_context():
+        for i in range(user_service.MAX_ATTEMPTS):
+            monkeypatch.setattr(limiter_store, "_store", worker_a if i % 2 else worker_b)
+            with pytest.raises(ServiceError) as e:
+                user_service.authenticate("student@example.com", "Wrong@123", "10.0.0.1")
+            assert e.value.status_code == 401
+
+        with pytest.raises(ServiceError) as e:
+            user_service.authenticate("student@example.com", PASSWORD, "10.0.0.1")
+        assert e.value.status_code == 429
+        # IP khác không bị ảnh hưởng
+        assert user_service.authenticate("student@example.com", PASSWORD, "10.0.0.2")["access_token"]
+        assert worker_b.count("login:10.0.0.1:student@example.com", user_service.BLOCK_TIME) == 5
+
+        clock.now += 2 * user_service.BLOCK_TIME
+        user_service.authenticate("student@example.com", PASSWORD, "10.0.0.1")
+
+
+def test_flask_limiter_uses_shared_store():
+    flask_app = Flask(__name__)
+    limiter = Limiter(lambda: "1.2.3.4", app=flask_app, storage_uri="limiter://",
+                      strategy="sliding-window-counter")
+
+    @flask_app.route("/ping")
+    @limiter.limit("2 per minute")
+    def ping():
+        return "pong"
+
+    client = flask_app.test_client()
+    assert [client.get("/ping").status_code for _ in range(3)] == [200, 200, 429]
+    assert len(limiter_store.get_store()) > 0
+
+
+def test_incomplete_backend_and_per_process_warning():
+    class NoDelete(LimiterStore):
+        def incr(self, key, amount, ttl): return 0
+        def get_many(self, keys): return [0] * len(keys)
+        def expires_in(self, key): return 0.0
+        def clear_all(self): return 0
+
+    with pytest.raises(TypeError):
+        NoDelete()
+
+    assert per_process_warning("memory://", workers=4)
+    assert per_process_warning("memory://", workers=1) is None
+    assert per_process_warning("sqlite:///limiter.db", workers=4) is None
@@ -0,0 +1,198 @@
+import numpy as np
+from flask_jwt_extended import create_access_token
+
+from database import db_session
+from models import User, Student, Company, Job, Skill, StudentSkill, Application, UserRole
+from models.job_models import JobSkill, MatchScore, MatchDirty
+from services import matching_service
+from services.match_worker import MatchWorker
+from services.matching_service import JobSkillMatrix, StudentSkillIndex, top_k
+
+
+def test_score_weights_required_level_and_caps_fit():
+    # job 10: Python 4, SQL 2 | job 20: Python 2 | job 30: Java 3
+    matrix = JobSkillMatrix.from_rows([
+        (10, 1, 4), (10, 2, 2), (20, 1, 2), (30, 3, 3),
+    ])
+
+    ids, score, coverage, gap = matrix.score({1: 2, 2: 5})  # Python 2, SQL 5
+
+    # job 10: (4 * 0.5 + 2 * 1) / 6; job 30 không có skill chung -> bỏ
+    assert list(ids) == [10, 20]
+    np.testing.assert_allclose(score, [4 / 6, 1.0])
+    np.testing.assert_allclose(coverage, [1.0, 1.0])
+    np.testing.assert_allclose(gap, [2, 0])
+    assert list(ids[top_k(score, ids, 5)]) == [20, 10]
+
+
+def test_set_row_overrides_without_rebuild():
+    index = StudentSkillIndex.from_rows([(1, 7, 3), (2, 7, 1), (2, 8, 4)])
+
+    index.set_row(1, {})          # student 1 xóa hết kỹ năng
+    index.set_row(3, {8: 5})      # student mới
+
+    ids, fit, coverage, gap = index.fit({7: 2, 8: 4})
+    assert dict(zip(ids.tolist(), fit.tolist())) == {2: 5 / 6, 3: 4 / 6}
+
+
+def _seed():
+    su = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    cu = User(email="company@example.com", password="x", role=UserRole.COMPANY)
+    db_session.add_all([su, cu])
+    db_session.flush()
+    student = Student(userId=su.id, fullName="SV")
+    company = Company(userId=cu.id, companyName="ACME")
+    python, sql, java = Skill(name="Python"), Skill(name="SQL"), Skill(name="Java")
+    db_session.add_all([student, company, python, sql, java])
+    db_session.flush()
+
+    jobs = {
+        name: Job(companyId=company.id, title=name, description="", status="open", maxApplicants=0)
+        for name in ("backend", "data", "android", "closed")
+    }
+    jobs["closed"].status = "CLOSED"
+    db_session.add_all(jobs.values())
+    db_session.flush()
+
+    db_session.add_all([
+        JobSkill(jobId=jobs["backend"].id, skillId=python.id, requiredLevel=3),
+        JobSkill(jobId=jobs["backend"].id, skillId=sql.id, requiredLevel=3),
+        JobSkill(jobId=jobs["data"].id, skillId=sql.id, requiredLevel=2),
+        JobSkill(jobId=jobs["android"].id, skillId=java.id, requiredLevel=3),
+        JobSkill(jobId=jobs["closed"].id, skillId=sql.id, requiredLevel=1),
+        StudentSkill(studentId=student.id, skillId=python.id, level=3),
+        StudentSkill(studentId=student.id, skillId=sql.id, level=2),
+    ])
+    db_session.commit()
+    MatchWorker().drain()
+    return su.id, student.id, {name: job.id for name, job in jobs.items()}
+
+
+def test_rank_jobs_for_student(engine):
+    _, student_id, jobs = _seed()
+
+    ranked = matching_service.rank_jobs_for_student(student_id)
+
+    assert [r["jobId"] for r in ranked] == [jobs["data"], jobs["backend"]]
+    assert ranked[0]["score"] == 100.0
+    assert ranked[1]["levelGap"] == 1
+
+
+def test_matches_endpoint_skips_applied_jobs(app, client):
+    user_id, student_id, jobs = _seed()
+    db_session.add(Application(jobId=jobs["data"], studentId=student_id))
+    db_session.commit()
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={"role": "student"})
+
+    resp = client.get(f"/api/students/{student_id}/matches?limit=5",
+                      headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert [r["jobId"] for r in resp.get_json()] == [jobs["backend"]]
+
+    other = client.get(f"/api/students/{student_id + 1}/matches",
+                       headers={"Authorization": f"Bearer {token}"})
+    assert other.status_code == 403
+
+
+def test_combine_scores_ignores_missing_components():
+    components = np.array([
+        [1.0, np.nan, np.nan],   # chỉ có kỹ năng
+        [0.5, 1.0, np.nan],      # (0.5*0.5 + 0.3*1) / 0.8
+        [np.nan, np.nan, np.nan],
+    ])
+    np.testing.assert_allclose(
+        matching_service.combine_scores(components), [1.0, 0.55 / 0.8, 0.0]
+    )
+
+
+def _seed_shortlist():
+    cu = User(email="company@example.com", password="x", role=UserRole.COMPANY)
+    db_session.add(cu)
+    db_session.flush()
+    company = Company(userId=cu.id, companyName="ACME")
+    python, sql = Skill(name="Python"), Skill(name="SQL")
+    db_session.add_all([company, python, sql])
+    db_session.flush()
+    job = Job(companyId=company.id, title="backend", description="", status="open", maxApplicants=0)
+    db_session.add(job)
+    db_session.flush()
+    db_session.add_all([
+        JobSkill(jobId=job.id, skillId=python.id, requiredLevel=4),
+        JobSkill(jobId=job.id, skillId=sql.id, requiredLevel=2),
+    ])
+
+    students = {}
+    for name, skills in {
+        "strong": {python.id: 4, sql.id: 3},
+        "weak": {sql.id: 1},
+        "outsider": {python.id: 5, sql.id: 5},
+    }.items():
+        user = User(email=f"{name}@example.com", password="x", role=UserRole.STUDENT)
+        db_session.add(user)
+        db_session.flush()
+        student = Student(userId=user.id, fullName=name)
+        db_session.add(student)
+        db_session.flush()
+        db_session.add_all([
+            StudentSkill(studentId=student.id, skillId=s, level=lv) for s, lv in skills.items()
+        ])
+        students[name] = student
+    db_session.add_all([
+        Application(jobId=job.id, studentId=students["strong"].id),
+        Application(jobId=job.id, studentId=students["weak"].id),
+    ])
+    db_session.commit()
+    return company, job.id, {name: s.id for name, s in students.items()}
+
+
+def test_shortlist_ranks_applicants_and_pool(engine):
+    from services import company_service, student_service
+
+    company, job_id, students = _seed_shortlist()
+    worker = MatchWorker()
+    worker.drain()
+
+    ranked = company_service.get_job_shortlist(company, job_id)
+    assert [r["fullName"] for r in ranked] == ["strong", "weak"]
+    assert ranked[0]["skillFit"] == 1.0
+    assert ranked[1]["skillFit"] == round(1 / 6, 3)
+
+    pool = company_service.get_job_shortlist(company, job_id, scope="all")
+    # hòa điểm -> id nhỏ trước
+    assert [r["fullName"] for r in pool] == ["strong", "outsider", "weak"]
+    assert pool[1]["applied"] is False and pool[1]["applicationId"] is None
+
+    # sửa kỹ năng -> chỉ dòng của student đó bị đánh dấu và tính lại
+    index = worker.student_index
+    weak = db_session.get(Student, students["weak"])
+    student_service.update_student(weak, {"skills": [{"name": "Python", "level": 5},
+                                                     {"name": "SQL", "level": 2}]})
+    assert db_session.query(MatchDirty.kind, MatchDirty.entityId).distinct().all() == \
+        [("student", students["weak"])]
+    assert worker.drain() == (1, 0)
+    assert worker.student_index is index and students["weak"] in index.overrides
+
+    ranked = company_service.get_job_shortlist(company, job_id)
+    assert {r["fullName"]: r["skillFit"] for r in ranked} == {"strong": 1.0, "weak": 1.0}
+
+
+def test_job_change_recomputes_its_column(engine):
+    from services import company_service
+
+    company, job_id, students = _seed_shortlist()
+    worker = MatchWorker()
+    worker.drain()
+    assert db_session.query(MatchScore).filter(MatchScore.jobId == job_id).count() == 3
+
+    company_service.update_job(company, job_id, {"skills": [{"name": "Java", "requiredLevel": 3}]})
+    assert worker.drain() == (0, 1)
+
+    # không ai có Java -> cột của job rỗng
+    assert db_session.query(MatchScore).filter(MatchScore.jobId == job_id).count() == 0
+
+    # recompute-matches cho kết quả giống worker tăng dần
+    incremental = {(m.studentId, m.jobId, round(m.score, 6)) for m in db_session.query(MatchScore)}
+    worker.recompute_all()
+    assert {(m.studentId, m.jobId, round(m.score, 6)) for m in db_session.query(MatchScore)} == incremental
@@ -0,0 +1,54 @@
+from database import db_session
+from models import User, Notification, UserRole
+from services import user_service
+
+
+def make_user():
+    user = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.commit()
+    return user.id
+
+
+def test_bell_counts_unread_and_limits_latest(engine):
+    user_id = make_user()
+    db_session.add_all([Notification(userId=user_id, content=f"n{i}") for i in range(8)])
+    db_session.add(Notification(userId=user_id, content="read", isRead=True))
+    db_session.commit()
+
+    bell = user_service.get_notification_bell(user_id)
+
+    assert bell["unread"] == 8
+    assert len(bell["latest"]) == user_service.NOTIFICATION_BELL_SIZE
+
+
+def test_bell_is_cached_until_notification_changes(engine):
+    user_id = make_user()
+    db_session.add(Notification(userId=user_id, content="first"))
+    db_session.commit()
+    assert user_service.get_notification_bell(user_id)["unread"] == 1
+
+    # không qua ORM -> cache không biết, vẫn trả giá trị cũ
+    db_session.execute(Notification.__table__.insert().values(userId=user_id, content="raw", isRead=False))
+    db_session.commit()
+    assert user_service.get_notification_bell(user_id)["unread"] == 1
+
+    # thêm qua ORM -> cache bị xóa khi commit
+    db_session.add(Notification(userId=user_id, content="second"))
+    db_session.commit()
+    assert user_service.get_notification_bell(user_id)["unread"] == 3
+
+    notif_id = user_service.get_notification_bell(user_id)["latest"][0]["id"]
+    user_service.mark_as_read(user_id, notif_id)
+    assert user_service.get_notification_bell(user_id)["unread"] == 2
+
+
+def test_rolled_back_notification_does_not_invalidate(engine):
+    user_id = make_user()
+    bell = user_service.get_notification_bell(user_id)
+
+    db_session.add(Notification(userId=user_id, content="draft"))
+    db_session.flush()
+    db_session.rollback()
+
+    assert user_service.get_notification_bell(user_id) is bell
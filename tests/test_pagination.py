@@ -0,0 +1,122 @@
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+
+from database import db_session
+from models import User, Student, Company, Job, SkillTest, Application, Notification, UserRole
+from models.user_models import CompanyProfile
+from models import TestResult as Result  # tránh pytest thu thập nhầm class Test*
+from services import admin_service
+
+
+def test_notifications_pages_are_stable_with_equal_timestamps(app, client):
+    user = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.flush()
+    same_time = datetime(2024, 1, 1, 8, 0, 0)
+    db_session.add_all([
+        Notification(userId=user.id, content=f"n{i}", createdAt=same_time) for i in range(7)
+    ])
+    db_session.commit()
+    user_id = user.id
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={"role": "student"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = f"/api/notifications/{user_id}?limit=3" + (f"&cursor={cursor}" if cursor else "")
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200
+        assert len(resp.get_json()) <= 3
+        seen += [n["id"] for n in resp.get_json()]
+        pages += 1
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 7
+
+
+def test_invalid_cursor_is_rejected(app, client):
+    user = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.commit()
+    user_id = user.id
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={"role": "student"})
+
+    resp = client.get(
+        f"/api/notifications/{user_id}?cursor=not-a-cursor",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert resp.status_code == 400
+
+
+def test_limit_is_capped(engine):
+    db_session.add_all([
+        User(email=f"u{i}@example.com", password="x", role=UserRole.STUDENT) for i in range(250)
+    ])
+    db_session.commit()
+
+    page = admin_service.list_users(limit=10_000)
+    assert len(page["items"]) == 200
+    assert page["nextCursor"]
+
+    rest = admin_service.list_users(cursor=page["nextCursor"], limit=10_000)
+    assert [u["id"] for u in rest["items"]] == list(range(201, 251))
+    assert rest["nextCursor"] is None
+
+
+def test_student_applications_query_count_does_not_grow_with_rows(app, client):
+    student_user = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(student_user)
+    db_session.flush()
+    student = Student(userId=student_user.id, fullName="SV")
+    db_session.add(student)
+    db_session.flush()
+
+    for c in range(3):
+        company_user = User(email=f"company{c}@example.com", password="x", role=UserRole.COMPANY)
+        db_session.add(company_user)
+        db_session.flush()
+        company = Company(userId=company_user.id, companyName=f"Company {c}")
+        db_session.add(company)
+        db_session.flush()
+        db_session.add(CompanyProfile(companyId=company.id, logoUrl=f"http://logo/{c}"))
+        for j in range(4):
+            job = Job(companyId=company.id, title=f"Job {c}.{j}", status="open")
+            db_session.add(job)
+            db_session.flush()
+            db_session.add(Application(studentId=student.id, jobId=job.id))
+            if j < 2:
+                test = SkillTest(jobId=job.id, testName="Python", totalScore=10)
+                db_session.add(test)
+                db_session.flush()
+                if j == 0:
+                    db_session.add(Result(testId=test.id, studentId=student.id, score=5))
+    db_session.commit()
+    student_id = student.id
+
+    with app.app_context():
+        token = create_access_token(identity=str(student_user.id), additional_claims={"role": "student"})
+
+    # SQL_COUNTER_RAISE: N+1 theo số application -> QueryBudgetExceeded
+    resp = client.get(f"/api/students/{student_id}/applications?limit=20",
+                      headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    rows = resp.get_json()
+    assert len(rows) == 12
+    assert {r["testStatus"] for r in rows if r["jobTitle"].endswith(".0")} == {"done"}
+    assert {r["testStatus"] for r in rows if r["jobTitle"].endswith(".1")} == {"pending"}
+    assert {r["testStatus"] for r in rows if r["jobTitle"].endswith((".2", ".3"))} == {"not_required"}
+    assert {r["logoUrl"] for r in rows} == {"http://logo/0", "http://logo/1", "http://logo/2"}
+
+    client.set_cookie("ui_access_token", token)
+    html = client.get("/student/applications?limit=20").get_data(as_text=True)
+    assert html.count("Đã làm bài test") == 3
+    assert "Company 2" in html
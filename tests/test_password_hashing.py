@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from database import db_session
+from services import password_service, user_service
+from services.base import ServiceError
+from services.password_service import HashPool
+from models import User
+
+PASSWORD = "Secret@123"
+
+
+def slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def fast_rounds(monkeypatch):
+    # cost thấp nhất cho test nhanh; pool thật (2 process)
+    monkeypatch.setattr(password_service, "BCRYPT_ROUNDS", 4)
+    pool = HashPool(workers=2, queue=2)
+    monkeypatch.setattr(password_service, "pool", pool)
+    yield
+    pool.shutdown()
+
+
+def test_hash_and_verify_in_pool(fast_rounds):
+    hashed = password_service.hash_password(PASSWORD)
+    assert password_service.hash_rounds(hashed) == 4
+    assert password_service.verify_password(hashed, PASSWORD)
+    assert not password_service.verify_password(hashed, "Wrong@123")
+    assert not password_service.verify_password("x", PASSWORD)   # không phải hash bcrypt
+    assert not password_service.verify_password(hashed, None)
+    # chỉ 72 byte đầu có nghĩa (như bcrypt < 5)
+    assert password_service.verify_password(password_service.hash_password("a" * 80), "a" * 72)
+
+
+def test_rehash_on_login_when_cost_changes(app, fast_rounds, monkeypatch):
+    user_service.create_user("student@example.com", PASSWORD)
+    old_hash = db_session.query(User.password).scalar()
+
+    monkeypatch.setattr(password_service, "BCRYPT_ROUNDS", 5)
+    with app.app_context():
+        user_service.authenticate("student@example.com", PASSWORD, "127.0.0.1")
+        new_hash = db_session.query(User.password).scalar()
+        assert (password_service.hash_rounds(old_hash), password_service.hash_rounds(new_hash)) == (4, 5)
+
+        # cost không đổi -> không băm lại
+        user_service.authenticate("student@example.com", PASSWORD, "127.0.0.1")
+        assert db_session.query(User.password).scalar() == new_hash
+
+
+def test_saturated_pool_returns_503_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(password_service, "BCRYPT_ROUNDS", 4)
+    pool = HashPool(workers=1, queue=0)
+    monkeypatch.setattr(password_service, "pool", pool)
+    try:
+        busy = threading.Thread(target=pool.run, args=(slow, 1.0))
+        busy.start()
+        time.sleep(0.2)
+        with pytest.raises(ServiceError) as e:
+            pool.run(slow, 0)
+        assert e.value.status_code == 503
+
+        res = client.post("/api/users/", json={"email": "student@example.com", "password": PASSWORD})
+        assert res.status_code == 503
+        assert int(res.headers["Retry-After"]) >= 1
+        assert db_session.query(User).count() == 0
+
+        busy.join()
+        res = client.post("/api/users/", json={"email": "student@example.com", "password": PASSWORD})
+        assert res.status_code == 201
+    finally:
+        pool.shutdown()
+
+
+def test_timed_out_job_keeps_slot_until_done():
+    pool = HashPool(workers=1, queue=1, timeout=10)
+    try:
+        pool.run(slow, 0)  # khởi động process (spawn)
+        pool.timeout = 0.3
+        timed_out = []
+        busy = threading.Thread(target=lambda: timed_out.append(pool.try_run(slow, 1.0) is None))
+        busy.start()
+        time.sleep(0.5)
+        # request đã nhận 503 nhưng việc còn chạy -> vẫn giữ slot
+        assert timed_out == [True] and pool._pending == 1
+
+        # việc xếp sau nó cũng hết giờ chờ; ProcessPoolExecutor đã chuyển việc vào hàng đợi
+        # của process nên không hủy được -> giữ slot, pool đầy: từ chối ngay
+        with pytest.raises(ServiceError):
+            pool.run(slow, 0)
+        assert pool._pending == 2
+        start = time.monotonic()
+        with pytest.raises(ServiceError):
+            pool.run(slow, 0)
+        assert time.monotonic() - start < 0.1
+
+        busy.join()
+        time.sleep(0.8)
+        assert pool._pending == 0
+        assert pool.run(slow, 0) == 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,53 @@
+import pytest
+from flask import Flask, jsonify
+
+from database import db_session
+from models import User, UserRole
+from query_counter import QueryBudgetExceeded, QueryCounter, fingerprint
+
+
+def test_fingerprint_ignores_parameters():
+    assert fingerprint("SELECT * FROM users WHERE id = 1") == fingerprint("SELECT *  FROM users\nWHERE id = 42")
+    assert fingerprint("SELECT * FROM users WHERE email = 'a'") == "SELECT * FROM users WHERE email = ?"
+    assert fingerprint("SELECT * FROM jobs WHERE id IN (?, ?, ?)") == "SELECT * FROM jobs WHERE id IN (?)"
+
+
+@pytest.fixture
+def probe_app(engine):
+    probe = Flask(__name__)
+    probe.config.update(TESTING=True, SQL_COUNTER_RAISE=True, SQL_COUNTER_HEADERS=True)
+    QueryCounter(probe)
+
+    @probe.route("/users/<int:n>")
+    def users(n):
+        # cố ý N+1: 1 query cho mỗi user
+        found = [db_session.get(User, i) is not None for i in range(1, n + 1)]
+        db_session.remove()
+        return jsonify(found)
+
+    db_session.add(User(email="a@example.com", password="x", role=UserRole.STUDENT))
+    db_session.commit()
+    db_session.remove()
+    return probe
+
+
+def test_headers_report_query_count(probe_app):
+    resp = probe_app.test_client().get("/users/3")
+
+    assert resp.headers["X-SQL-Count"] == "3"
+    assert resp.headers["X-SQL-Max-Repeat"] == "3"
+    assert float(resp.headers["X-SQL-Time-ms"]) >= 0
+
+
+def test_n_plus_one_raises_in_tests(probe_app):
+    with pytest.raises(QueryBudgetExceeded):
+        probe_app.test_client().get("/users/12")
+
+
+def test_n_plus_one_is_logged_when_not_raising(probe_app, caplog):
+    probe_app.config["SQL_COUNTER_RAISE"] = False
+
+    resp = probe_app.test_client().get("/users/12")
+
+    assert resp.status_code == 200
+    assert "x12" in caplog.text
@@ -0,0 +1,149 @@
+from sqlalchemy import event, insert
+
+from database import db_session
+from services import skill_service, student_service
+from models import User, Student, Skill, StudentSkill, UserRole
+
+
+def seed_student():
+    user = User(email="student@example.com", password="x", role=UserRole.STUDENT)
+    db_session.add(user)
+    db_session.flush()
+    student = Student(userId=user.id, fullName="Student")
+    db_session.add(student)
+    db_session.commit()
+    return student.id
+
+
+def count_statements(engine, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return len(statements)
+
+
+def save_skills(student_id, names):
+    student = db_session.get(Student, student_id)
+    student_service.update_student(student, {"skills": [{"name": n, "level": 2} for n in names]})
+    db_session.remove()
+
+
+def test_update_student_statement_count_does_not_grow_with_skills(engine):
+    student_id = seed_student()
+    save_skills(student_id, ["Warmup"])  # nạp cache, tạo profile
+
+    few = count_statements(engine, lambda: save_skills(student_id, [f"A{i}" for i in range(3)]))
+    many = count_statements(engine, lambda: save_skills(student_id, [f"B{i}" for i in range(35)]))
+    cached = count_statements(engine, lambda: save_skills(student_id, [f"B{i}" for i in range(35)]))
+
+    assert many == few
+    assert cached < many  # tên đã có trong cache -> không upsert / SELECT skill
+    assert db_session.query(StudentSkill).filter(StudentSkill.studentId == student_id).count() == 35
+
+
+def test_duplicate_names_keep_first_level(engine):
+    student_id = seed_student()
+    student = db_session.get(Student, student_id)
+    student_service.update_student(student, {"skills": [
+        {"name": "Python", "level": 4}, {"name": "Python", "level": 1}
+    ]})
+    rows = db_session.query(StudentSkill.level).filter(StudentSkill.studentId == student_id).all()
+    assert [r.level for r in rows] == [4]
+
+
+def test_rollback_does_not_cache_new_ids(engine):
+    ids = skill_service.resolve_skill_ids(["Go"])
+    db_session.rollback()
+    assert "go" not in skill_service._skill_ids
+
+    ids = skill_service.resolve_skill_ids(["Go"])
+    db_session.commit()
+    assert skill_service._skill_ids["go"] == ids["Go"]
+    assert db_session.query(Skill).filter(Skill.name == "Go").count() == 1
+
+
+def test_orm_skill_change_invalidates_cache(engine):
+    skill_service.resolve_skill_ids(["Rust"])
+    db_session.commit()
+
+    db_session.query(Skill).filter(Skill.name == "Rust").one().name = "Rust lang"
+    db_session.commit()
+    assert not skill_service._loaded
+
+    ids = skill_service.resolve_skill_ids(["Rust lang"])
+    assert ids == {"Rust lang": db_session.query(Skill.id).filter(Skill.name == "Rust lang").scalar()}
+
+
+def test_aliases_and_case_resolve_to_canonical_skill(engine):
+    skill_service.seed_skill_taxonomy()
+    student_id = seed_student()
+    student = db_session.get(Student, student_id)
+    student_service.update_student(student, {"skills": [
+        {"name": " PYTHON ", "level": 4}, {"name": "py", "level": 1}, {"name": "python3", "level": 2},
+        {"name": "k8s", "level": 3}
+    ]})
+
+    rows = db_session.query(Skill.name, Skill.category, StudentSkill.level)\
+        .join(StudentSkill, StudentSkill.skillId == Skill.id)\
+        .filter(StudentSkill.studentId == student_id).order_by(Skill.name).all()
+    assert [tuple(r) for r in rows] == [("Kubernetes", "devops", 3), ("Python", "programming", 4)]
+    assert db_session.query(Skill).filter(Skill.normalizedName == "python").count() == 1
+
+
+def test_backfill_keeps_oldest_of_case_duplicates(engine):
+    # dữ liệu cũ: chưa có normalizedName
+    db_session.execute(insert(Skill.__table__), [{"name": "python"}, {"name": "Python"}, {"name": " Rust "}])
+    db_session.commit()
+
+    assert skill_service.backfill_normalized_names() == 2
+    keys = dict(db_session.query(Skill.name, Skill.normalizedName))
+    assert keys == {"python": "python", "Python": None, " Rust ": "rust"}
+    oldest = db_session.query(Skill.id).filter(Skill.name == "python").scalar()
+    assert skill_service.resolve_skill_ids(["PYTHON"]) == {"PYTHON": oldest}
+
+
+def test_trie_prefers_short_terms_and_lists_each_skill_once():
+    trie = skill_service.SkillTrie(size=3)
+    for term, skill_id in [("javascript", 1), ("js", 1), ("java", 2), ("jquery", 3), ("julia", 4)]:
+        trie.insert(term, skill_id)
+
+    assert trie.lookup("j") == [1, 2, 4]      # "js" (2 ký tự) thay cho "javascript"
+    assert trie.lookup("jav") == [2, 1]
+    assert trie.lookup("jq") == [3]
+    assert trie.lookup("x") == []
+    assert trie.lookup("j", limit=1) == [1]
+
+
+def test_new_skills_are_added_to_trie_without_reload(engine):
+    skill_service.seed_skill_taxonomy()
+    assert [s["name"] for s in skill_service.autocomplete_skills("Py")] == ["Python"]
+
+    skill_service.resolve_skill_ids(["PyTorch"])
+    assert [s["name"] for s in skill_service.autocomplete_skills("pyt")] == ["Python"]  # chưa commit
+    db_session.commit()
+
+    statements = count_statements(engine, lambda: skill_service.autocomplete_skills("pyt"))
+    assert statements == 0
+    assert [s["name"] for s in skill_service.autocomplete_skills("pyt")] == ["Python", "PyTorch"]
+
+
+def test_autocomplete_endpoint(client, app):
+    from flask_jwt_extended import create_access_token
+
+    skill_service.seed_skill_taxonomy()
+    with app.app_context():
+        token = create_access_token(identity="1", additional_claims={"role": "student"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = client.get("/api/skills/autocomplete?q=Node&limit=5", headers=headers)
+    assert res.status_code == 200
+    assert res.get_json() == [{"id": res.get_json()[0]["id"], "name": "Node.js", "category": "web"}]
+    assert client.get("/api/skills/autocomplete?q=", headers=headers).get_json() == []
+    assert client.get("/api/skills/autocomplete?q=py").status_code == 401
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, redirect, make_response
-import requests
 import secrets
-from utils import wrap_layout, API_URL, get_current_user_from_jwt, auth_headers
+from utils import wrap_layout, get_current_user_from_jwt, next_page_link
+from services import ServiceError, admin_service
 from markupsafe import escape
 
 admin_view_bp = Blueprint("admin_view", __name__)
@@ -28,26 +28,17 @@ def admin_home():
     if not user:
         return redirect("/login")
 
+    data = admin_service.get_dashboard_stats()
     stats = {
-        "users": 0, "students": 0, "companies": 0,
-        "jobs": 0, "open_jobs": 0, "closed_jobs": 0, "applications": 0
+        "users": data["users"]["total"],
+        "students": data["users"]["students"],
+        "companies": data["users"]["companies"],
+        "jobs": data["jobs"]["total"],
+        "open_jobs": data["jobs"]["open"],
+        "closed_jobs": data["jobs"]["closed"],
+        "applications": data["applications"]
     }
 
-    res = requests.get(
-        f"{API_URL}/admin/home",
-        headers=auth_headers(),
-        timeout=5
-    )
-    if res.status_code == 200:
-        data = res.json()
-        stats["users"] = data["users"]["total"]
-        stats["students"] = data["users"]["students"]
-        stats["companies"] = data["users"]["companies"]
-        stats["jobs"] = data["jobs"]["total"]
-        stats["open_jobs"] = data["jobs"]["open"]
-        stats["closed_jobs"] = data["jobs"]["closed"]
-        stats["applications"] = data["applications"]
-
     content = f"""
     <h2>📊 Admin Dashboard</h2>
 
@@ -78,12 +69,11 @@ def admin_users():
 
     csrf_token = generate_csrf_token()
 
-    res = requests.get(
-        f"{API_URL}/admin/users",
-        headers=auth_headers(),
-        timeout=5
-    )
-    users = res.json() if res.status_code == 200 else []
+    try:
+        page = admin_service.list_users(request.args.get("cursor"), request.args.get("limit"))
+    except ServiceError:
+        page = admin_service.list_users()
+    users = page["items"]
 
     rows = ""
     for u in users:
@@ -112,6 +102,7 @@ def admin_users():
         </tr>
         {rows}
     </table>
+    {next_page_link(page["nextCursor"])}
     """))
 
     resp.set_cookie("csrf_token", csrf_token, httponly=True, samesite="Lax")
@@ -123,13 +114,14 @@ def admin_lock_user(user_id):
     if not validate_csrf(request.form.get("csrf_token")):
         return "CSRF invalid", 400
 
-    if not require_admin_view():
+    admin = require_admin_view()
+    if not admin:
         return redirect("/login")
 
-    requests.put(
-        f"{API_URL}/admin/users/{user_id}/lock",
-        headers=auth_headers()
-    )
+    try:
+        admin_service.set_user_status(user_id, "locked", admin["id"])
+    except ServiceError as e:
+        print(f"Lock user error: {e.detail}")
     return redirect("/admin/users")
 
 
@@ -141,10 +133,10 @@ def admin_unlock_user(user_id):
     if not require_admin_view():
         return redirect("/login")
 
-    requests.put(
-        f"{API_URL}/admin/users/{user_id}/unlock",
-        headers=auth_headers()
-    )
+    try:
+        admin_service.set_user_status(user_id, "active")
+    except ServiceError as e:
+        print(f"Unlock user error: {e.detail}")
     return redirect("/admin/users")
 
 
@@ -156,12 +148,11 @@ def admin_jobs():
 
     csrf_token = generate_csrf_token()
 
-    res = requests.get(
-        f"{API_URL}/admin/jobs",
-        headers=auth_headers(),
-        timeout=5
-    )
-    jobs = res.json() if res.status_code == 200 else []
+    try:
+        page = admin_service.list_jobs(request.args.get("cursor"), request.args.get("limit"))
+    except ServiceError:
+        page = admin_service.list_jobs()
+    jobs = page["items"]
 
     rows = ""
     for j in jobs:
@@ -192,6 +183,7 @@ def admin_jobs():
         </tr>
         {rows}
     </table>
+    {next_page_link(page["nextCursor"])}
     """))
 
     resp.set_cookie("csrf_token", csrf_token, httponly=True, samesite="Lax")
@@ -206,10 +198,10 @@ def admin_close_job(job_id):
     if not require_admin_view():
         return redirect("/login")
 
-    requests.put(
-        f"{API_URL}/admin/jobs/{job_id}/close",
-        headers=auth_headers()
-    )
+    try:
+        admin_service.close_job(job_id)
+    except ServiceError as e:
+        print(f"Close job error: {e.detail}")
     return redirect("/admin/jobs")
 
 
@@ -221,12 +213,7 @@ def admin_tests():
 
     csrf_token = generate_csrf_token()
 
-    res = requests.get(
-        f"{API_URL}/admin/tests",
-        headers=auth_headers(),
-        timeout=5
-    )
-    tests = res.json() if res.status_code == 200 else []
+    tests = admin_service.list_tests()
 
     rows = ""
     for t in tests:
@@ -266,8 +253,8 @@ def admin_delete_test(test_id):
     if not require_admin_view():
         return redirect("/login")
 
-    requests.delete(
-        f"{API_URL}/admin/tests/{test_id}",
-        headers=auth_headers()
-    )
+    try:
+        admin_service.delete_test(test_id)
+    except ServiceError as e:
+        print(f"Delete test error: {e.detail}")
     return redirect("/admin/tests")
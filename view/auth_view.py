@@ -1,9 +1,10 @@
 from flask import Blueprint, request, redirect, make_response
 from flask_wtf.csrf import generate_csrf
 from markupsafe import escape
-import requests
 import re
-from utils import wrap_layout, API_URL, get_current_user_from_jwt
+from extensions import limiter, LOGIN_RATE_LIMIT
+from utils import wrap_layout, get_current_user_from_jwt
+from services import ServiceError, user_service
 
 auth_bp = Blueprint('auth_view', __name__)
 
@@ -77,23 +78,10 @@ def register():
             )
         else:
             try:
-                res = requests.post(
-                    f"{API_URL}/users/",
-                    json={
-                        "email": email,
-                        "password": password,
-                        "role": role
-                    },
-                    timeout=5
-                )
-
-                if res.status_code in (200, 201):
-                    message = "✅ Đăng ký thành công"
-                else:
-                    message = res.json().get("detail", "Lỗi đăng ký")
-
-            except requests.exceptions.RequestException:
-                message = "Không kết nối được backend"
+                user_service.create_user(email, password, role)
+                message = "✅ Đăng ký thành công"
+            except ServiceError as e:
+                message = e.detail or "Lỗi đăng ký"
 
     return wrap_layout(f"""
     <h2>📝 Đăng ký</h2>
@@ -112,6 +100,7 @@ def register():
 
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@limiter.limit(LOGIN_RATE_LIMIT, methods=['POST'])
 def login():
 
     csrf_token = generate_csrf()
@@ -126,51 +115,34 @@ def login():
             message = "Vui lòng nhập đầy đủ thông tin"
         else:
             try:
-                res = requests.post(
-                    f"{API_URL}/login/",
-                    json={"email": email, "password": password},
-                    timeout=5
-                )
-
-                if res.status_code == 200:
-                    try:
-                        data = res.json()
-                        token = data.get("access_token")
-                        user = data.get("user", {})
-                        role = user.get("role")
-                        
-                        if role not in ("student", "company", "admin"):
-                            return redirect("/auth")
-
-                        if not token or not role:
-                            message = "Lỗi dữ liệu đăng nhập"
-                        else:
-                            resp = make_response(
-                                redirect(f"/{role}/home")
-                            )
-                            resp.set_cookie(
-                                "ui_access_token",
-                                token,
-                                httponly=True,
-                                samesite="Lax",
-                                secure=request.is_secure,
-                                max_age=3600
-                            )
-                            return resp
-
-                    except Exception as e:
-                        message = f"Lỗi xử lý login: {e}"
+                data = user_service.authenticate(email, password, request.remote_addr)
+                token = data.get("access_token")
+                user = data.get("user", {})
+                role = user.get("role")
+
+                if role not in ("student", "company", "admin"):
+                    return redirect("/auth")
 
+                if not token or not role:
+                    message = "Lỗi dữ liệu đăng nhập"
                 else:
-                    try:
-                        message = res.json().get(
-                            "detail", "Sai tài khoản hoặc mật khẩu"
-                        )
-                    except Exception:
-                        message = "Sai tài khoản hoặc mật khẩu"
-
-            except requests.exceptions.RequestException as e:
-                message = f"Lỗi backend: {e}"
+                    resp = make_response(
+                        redirect(f"/{role}/home")
+                    )
+                    resp.set_cookie(
+                        "ui_access_token",
+                        token,
+                        httponly=True,
+                        samesite="Lax",
+                        secure=request.is_secure,
+                        max_age=3600
+                    )
+                    return resp
+
+            except ServiceError as e:
+                message = e.detail or "Sai tài khoản hoặc mật khẩu"
+            except Exception as e:
+                message = f"Lỗi xử lý login: {e}"
 
     return wrap_layout(f"""
     <h2>🔑 Đăng nhập</h2>
@@ -1,17 +1,17 @@
 from flask import Blueprint, request, redirect, make_response
 from markupsafe import escape
-from typing import cast, Any
-import requests
 import json
 import secrets
-import jwt
 from datetime import datetime
-from utils import wrap_layout, API_URL, get_current_user_from_jwt, auth_headers
+from utils import wrap_layout, get_current_user_from_jwt, next_page_link
+from services import ServiceError, company_service, grading_service
+from services.pagination import paginate
+from services.recruitment_service import first_tests_subquery
 from database import db_session
 from models.user_models import Company, CompanyProfile, Student
 from models.job_models import Job, SkillTest, Question
 from models.app_models import Application, TestResult, Evaluation, Interview, InterviewFeedback, Notification, ApplicationStatus
-from sqlalchemy import func, cast, String
+from sqlalchemy import cast, String
 company_view_bp = Blueprint('company_view', __name__)
 
 def require_company_view():
@@ -65,25 +65,6 @@ def get_company_profile_missing_fields_by_user(user_id: int):
     return missing
 
 
-def check_application_owner(app_id):
-    user = require_company_view()
-    if not user:
-        return False
-
-    user_id = user["id"]
-
-    comp_res = requests.get(f"{API_URL}/companies/user/{user_id}",headers=auth_headers())
-    if comp_res.status_code != 200:
-        return False
-
-    company_id = comp_res.json()["id"]
-    check = requests.get(
-        f"{API_URL}/companies/{company_id}/applications/{app_id}",
-        headers=auth_headers()
-    )
-    return check.status_code == 200
-
-
 @company_view_bp.route('/company/home')
 def company_home():
     user = require_company_view()
@@ -324,7 +305,7 @@ def company_jobs():
 
         # 4) Render danh sách job
         for j in my_jobs:
-            applied_count = db_session.query(func.count(Application.id)).filter(Application.jobId == j.id).scalar()
+            applied_count = j.appliedCount
             content += f"""
             <div class="job-card">
                 <div style="display:flex; justify-content:space-between;">
@@ -405,6 +386,11 @@ def company_create_job():
             db_session.add(new_job)
             db_session.flush()  # Lấy ID của Job vừa tạo
 
+            # Kỹ năng yêu cầu: "Python:3, SQL:2"
+            company_service.set_job_skills(
+                new_job, company_service.parse_skill_spec(request.form.get("skills", ""))
+            )
+
             # Xử lý Bài Test (Nếu có tích chọn)
             if request.form.get('has_test') == 'on':
                 new_test = SkillTest(
@@ -418,13 +404,15 @@ def company_create_job():
 
                 # Lưu danh sách câu hỏi
                 q_contents = request.form.getlist('q_content[]')
-                for c in q_contents:
+                q_options = request.form.getlist('q_options[]')
+                q_answers = request.form.getlist('q_answer[]')
+                for i, c in enumerate(q_contents):
                     if c and c.strip():
                         db_session.add(Question(
                             testId=new_test.id,
                             content=c.strip(),
-                            options="",
-                            correctAnswer=""
+                            options=q_options[i].strip() if i < len(q_options) else "",
+                            correctAnswer=q_answers[i].strip() if i < len(q_answers) else ""
                         ))
 
             db_session.commit()
@@ -451,11 +439,13 @@ def company_create_job():
             <input name="location">
             <label>Số ứng viên tối đa</label>
             <input name="maxApplicants" type="number" min="1">
+            <label>Kỹ năng yêu cầu (tên:level 1-5, cách nhau bởi dấu phẩy)</label>
+            <input name="skills" placeholder="Python:3, SQL:2">
         </div>
         <div class="job-card" style="border-left: 6px solid #2563eb; background:#f8fafc;">
             <label style="display:flex; align-items:center; cursor:pointer; color:#2563eb;">
                 <input type="checkbox" name="has_test" id="chkTest" onclick="toggleTestForm()" style="width:auto; margin-right:10px;">
-                <b>Kèm bài kiểm tra năng lực (Tự luận)?</b>
+                <b>Kèm bài kiểm tra năng lực?</b>
             </label>
             <div id="test-form" style="display:none; margin-top:15px; border-top:1px solid #ddd; padding-top:10px;">
                 <label>Tên bài kiểm tra</label>
@@ -481,8 +471,10 @@ def company_create_job():
         function addQuestion() {{
             var div = document.createElement("div");
             div.style.marginBottom = "10px"; div.style.padding = "10px"; div.style.background = "white"; div.style.border = "1px solid #ddd";
-            div.innerHTML = `<div style="font-weight:bold; font-size:13px; margin-bottom:5px;">Câu hỏi mới (Tự luận)</div>
+            div.innerHTML = `<div style="font-weight:bold; font-size:13px; margin-bottom:5px;">Câu hỏi mới</div>
             <textarea name="q_content[]" placeholder="Nhập nội dung câu hỏi..." required style="margin-bottom:5px; width:100%;" rows="3"></textarea>
+            <textarea name="q_options[]" placeholder="Lựa chọn trắc nghiệm, mỗi dòng 1 lựa chọn (bỏ trống nếu tự luận)" style="margin-bottom:5px; width:100%;" rows="2"></textarea>
+            <input name="q_answer[]" placeholder="Đáp án để chấm tự động (VD: B hoặc nội dung) — bỏ trống nếu chấm tay">
             <button type="button" onclick="this.parentElement.remove()" style="background:#ef4444; width:auto; padding:4px 10px; font-size:12px; margin-top:5px;">Xóa</button>`;
             document.getElementById("questions-container").appendChild(div);
         }}
@@ -529,19 +521,22 @@ def company_edit_job(job_id):
                 "description": request.form['description'],
                 "location": request.form['location'],
                 "maxApplicants": int(request.form.get("maxApplicants") or 0),
-                "status": "open" 
+                "status": "open",
+                "skills": company_service.parse_skill_spec(request.form.get("skills", ""))
             }
 
             # Xử lý bài Test (nếu có)
             if request.form.get('has_test') == 'on':
                 q_contents = request.form.getlist('q_content[]')
+                q_options = request.form.getlist('q_options[]')
+                q_answers = request.form.getlist('q_answer[]')
                 questions_list = []
-                for c in q_contents:
+                for i, c in enumerate(q_contents):
                     if c.strip():
                         questions_list.append({
                             "content": c.strip(), 
-                            "options": "", 
-                            "correctAnswer": ""
+                            "options": q_options[i].strip() if i < len(q_options) else "", 
+                            "correctAnswer": q_answers[i].strip() if i < len(q_answers) else ""
                         })
                 
                 payload["test"] = {
@@ -551,17 +546,16 @@ def company_edit_job(job_id):
                     "questions": questions_list
                 }
             
-            # Gọi API cập nhật (PUT)
-            # Lưu ý: requests.put sẽ tự động dùng 'Content-Type: application/json' khi dùng tham số json=...
-            res = requests.put(f"{API_URL}/jobs/{job_id}", json=payload, headers=auth_headers())
-            
-            if res.status_code == 200:
-                # Xóa cache session cũ để trang danh sách cập nhật ngay
-                db_session.remove() 
-                return redirect('/company/jobs')
-            else:
-                message = f"<span style='color:red'>❌ Lưu thất bại: {res.text}</span>"
-        
+            # Gọi service cập nhật (cùng logic với API PUT /jobs/<id>)
+            company = company_service.get_company_by_user(user_id)
+            company_service.update_job(company, job_id, payload)
+
+            # Xóa cache session cũ để trang danh sách cập nhật ngay
+            db_session.remove()
+            return redirect('/company/jobs')
+
+        except ServiceError as e:
+            message = f"<span style='color:red'>❌ Lưu thất bại: {escape(e.detail)}</span>"
         except Exception as e:
             print(f"Error saving job: {e}")
             message = f"<span style='color:red'>❌ Lỗi hệ thống: {str(e)}</span>"
@@ -574,29 +568,24 @@ def company_edit_job(job_id):
     
     try:
         # A. Lấy thông tin Company để check quyền
-        comp_res = requests.get(f"{API_URL}/companies/user/{user_id}", headers=auth_headers())
-        if comp_res.status_code != 200:
-             return wrap_layout(f"<h2>❌ Lỗi: Không lấy được thông tin công ty (Code {comp_res.status_code})</h2>")
-        
-        comp = comp_res.json()
-        company_id = comp.get('id')
-        
-        # B. Lấy thông tin Job
-        job_res = requests.get(f"{API_URL}/jobs/{job_id}", headers=auth_headers())
-        if job_res.status_code != 200: 
+        try:
+            company = company_service.get_company_by_user(user_id)
+        except ServiceError as e:
+            return wrap_layout(f"<h2>❌ Lỗi: Không lấy được thông tin công ty ({e.detail})</h2>")
+
+        # B. Lấy thông tin Job (kiểm tra quyền sở hữu)
+        try:
+            job = company_service.get_job_detail(company, job_id)
+        except ServiceError as e:
+            if e.status_code == 403:
+                return wrap_layout("<h2>⛔ Bạn không có quyền chỉnh sửa Job này</h2>")
             return wrap_layout("<h2>❌ Không tìm thấy Job</h2>")
-        
-        job = job_res.json()
-        if job.get('companyId') != company_id: 
-            return wrap_layout("<h2>⛔ Bạn không có quyền chỉnh sửa Job này</h2>")        
-        
-        # C. Lấy thông tin bài Test (Dùng API /test-info mới)
-        test_res = requests.get(f"{API_URL}/jobs/{job_id}/test-info", headers=auth_headers())
-        if test_res.status_code == 200 and test_res.content:
-            data = test_res.json()
-            if data:
-                current_test = data
-                test_questions = data.get('questions', [])
+
+        # C. Lấy thông tin bài Test
+        data = company_service.get_job_test_info(company, job_id)
+        if data:
+            current_test = data
+            test_questions = data.get('questions', [])
 
     except Exception as e:
         print(f"Edit Job View Error: {e}")
@@ -604,6 +593,7 @@ def company_edit_job(job_id):
 
     # --- PHẦN 3: RENDER GIAO DIỆN ---
     questions_json = json.dumps(test_questions) if current_test else "[]"
+    skills_spec = ", ".join(f"{s['name']}:{s['requiredLevel']}" for s in job.get("skills", []))
     has_test_checked = "checked" if current_test else ""
     display_test_form = "block" if current_test else "none"
 
@@ -628,12 +618,15 @@ def company_edit_job(job_id):
             
             <label>Số ứng viên tối đa</label>
             <input name="maxApplicants" type="number" min="1" value="{job.get('maxApplicants', 0)}">
+
+            <label>Kỹ năng yêu cầu (tên:level 1-5, cách nhau bởi dấu phẩy)</label>
+            <input name="skills" placeholder="Python:3, SQL:2" value="{escape(skills_spec)}">
         </div>
 
         <div class="job-card" style="border-left: 6px solid #2563eb; background:#f0f9ff;">
             <label style="display:flex; align-items:center; cursor:pointer; color:#2563eb; margin-bottom:15px;">
                 <input type="checkbox" name="has_test" id="chkTest" onclick="toggleTestForm()" {has_test_checked} style="width:auto; margin-right:10px;">
-                <b>Kèm bài kiểm tra năng lực (Tự luận)?</b>
+                <b>Kèm bài kiểm tra năng lực?</b>
             </label>
             
             <div id="test-form" style="display:{display_test_form};">
@@ -668,26 +661,28 @@ def company_edit_job(job_id):
             document.getElementById("test-form").style.display = chk.checked ? "block" : "none";
         }}
         
-        function addQuestionInput(content='') {{
+        function addQuestionInput(content='', options='', answer='') {{
             var container = document.getElementById("questions-container");
             var div = document.createElement("div");
             div.style.marginBottom = "15px"; div.style.padding = "15px"; div.style.background = "white"; div.style.border = "1px solid #cbd5e1";
             div.innerHTML = `<div style="font-weight:bold; font-size:13px; margin-bottom:8px;">Câu hỏi</div>
             <textarea name="q_content[]" placeholder="Nội dung câu hỏi..." required style="margin-bottom:8px; width:100%;" rows="3">${{content}}</textarea>
+            <textarea name="q_options[]" placeholder="Lựa chọn trắc nghiệm, mỗi dòng 1 lựa chọn (bỏ trống nếu tự luận)" style="margin-bottom:8px; width:100%;" rows="2">${{options}}</textarea>
+            <input name="q_answer[]" placeholder="Đáp án để chấm tự động (VD: B hoặc nội dung) — bỏ trống nếu chấm tay" value="${{answer}}">
             <button type="button" onclick="this.parentElement.remove()" style="background:#ef4444; width:auto; padding:4px 10px; font-size:11px; margin-top:5px;">Xóa</button>`;
             container.appendChild(div);
         }}
         
         window.onload = function() {{
             if (existingQuestions.length > 0) {{ 
+                // Escape ký tự đặc biệt để tránh lỗi JS
+                var esc = s => (s || "").replace(/&/g, "&amp;")
+                                        .replace(/</g, "&lt;")
+                                        .replace(/>/g, "&gt;")
+                                        .replace(/"/g, "&quot;")
+                                        .replace(/'/g, "&#039;");
                 existingQuestions.forEach(q => {{ 
-                    // Escape ký tự đặc biệt để tránh lỗi JS
-                    var safeContent = q.content.replace(/&/g, "&amp;")
-                                               .replace(/</g, "&lt;")
-                                               .replace(/>/g, "&gt;")
-                                               .replace(/"/g, "&quot;")
-                                               .replace(/'/g, "&#039;");
-                    addQuestionInput(safeContent); 
+                    addQuestionInput(esc(q.content), esc(q.options), esc(q.correctAnswer)); 
                 }}); 
             }}
             else if (document.getElementById("chkTest").checked) {{ 
@@ -719,20 +714,34 @@ def company_applications():
         # 2. TRUY VẤN AN TOÀN (Safe Query)
         # Thay vì query cả object Application (gây lỗi Enum), ta chỉ lấy các cột cần thiết
         # và ép kiểu status sang String để tránh crash.
-        apps_data = db_session.query(
-            Application.id.label("app_id"),
+        # Bài test đầu tiên của job + điểm test lấy luôn trong cùng query (không query theo từng dòng).
+        first_tests = first_tests_subquery()
+        query = db_session.query(
+            Application.id,
             Application.appliedAt,
             cast(Application.status, String).label("status_safe"), # <--- FIX QUAN TRỌNG
             Student.fullName.label("student_name"),
             Job.title.label("job_title"),
             Application.jobId,
-            Application.studentId
+            Application.studentId,
+            SkillTest.totalScore.label("test_total"),
+            company_service.test_score_column(first_tests.c.test_id, Application.studentId).label("test_score")
         )\
         .join(Job, Application.jobId == Job.id)\
         .join(Student, Application.studentId == Student.id)\
-        .filter(Job.companyId == company.id)\
-        .order_by(Application.appliedAt.desc())\
-        .all()
+        .outerjoin(first_tests, first_tests.c.jobId == Application.jobId)\
+        .outerjoin(SkillTest, SkillTest.id == first_tests.c.test_id)\
+        .filter(Job.companyId == company.id)
+
+        # 3. Phân trang bằng cursor (mới nhất trước)
+        order_columns = [Application.appliedAt, Application.id]
+        try:
+            apps_data, next_cursor = paginate(
+                query, order_columns,
+                request.args.get("cursor"), request.args.get("limit"), descending=True
+            )
+        except ServiceError:
+            apps_data, next_cursor = paginate(query, order_columns, descending=True)
 
         if not apps_data:
             content += "<p style='color:#666;'>Chưa có hồ sơ nào.</p>"
@@ -754,14 +763,8 @@ def company_applications():
             for row in apps_data:
                 # Logic hiển thị điểm
                 score_display = "--"
-                test = db_session.query(SkillTest).filter(SkillTest.jobId == row.jobId).first()
-                if test:
-                    result = db_session.query(TestResult).filter(
-                        TestResult.testId == test.id, 
-                        TestResult.studentId == row.studentId
-                    ).first()
-                    if result:
-                        score_display = f"<b>{result.score}/{test.totalScore}</b>"
+                if row.test_score is not None:
+                    score_display = f"<b>{row.test_score}/{row.test_total}</b>"
 
                 # Logic hiển thị trạng thái (Xử lý cả chữ hoa và thường)
                 status_raw = str(row.status_safe).lower() # Chuyển hết về thường để so sánh
@@ -790,11 +793,11 @@ def company_applications():
                         </span>
                     </td>
                     <td style="padding:15px; text-align:right;">
-                        <a href="/company/applications/{row.app_id}/cv"
+                        <a href="/company/applications/{row.id}/cv"
                            style="margin-right:5px; background:#2563eb; color:white; padding:6px 12px; border-radius:4px; text-decoration:none; font-size:13px;">
                             <i class="fa-solid fa-eye"></i> Xem CV
                         </a>
-                        <a href="/company/applications/{row.app_id}/evaluate"
+                        <a href="/company/applications/{row.id}/evaluate"
                            style="background:#0f172a; color:white; padding:6px 12px; border-radius:4px; text-decoration:none; font-size:13px;">
                             <i class="fa-solid fa-pen-to-square"></i> Đánh giá
                         </a>
@@ -802,6 +805,7 @@ def company_applications():
                 </tr>
                 """
             content += "</tbody></table>"
+            content += next_page_link(next_cursor)
 
     except Exception as e:
         print(f"Error loading applications: {e}")
@@ -934,21 +938,15 @@ def company_evaluate_application(app_id):
             test = app_item.job.skill_tests[0]
             result = db_session.query(TestResult).filter(TestResult.testId == test.id, TestResult.studentId == app_item.studentId).first()
             if result:
-                questions = db_session.query(Question).filter(Question.testId == test.id).all()
-                student_answers = {}
-                try:
-                    if result.answers: student_answers = json.loads(result.answers)
-                except: pass
-
                 qa_html = ""
-                for i, q in enumerate(questions, 1):
-                    ans_key = f"answer_{q.id}"
-                    user_ans = student_answers.get(ans_key, "<span style='color:#999'>Chưa trả lời</span>")
+                for i, a in enumerate(grading_service.list_result_answers(test.id, result.id), 1):
+                    user_ans = escape(a["answer"]) if a["answer"] is not None else "<span style='color:#999'>Chưa trả lời</span>"
+                    mark = "" if a["correct"] is None else (" ✅" if a["correct"] else " ❌")
                     qa_html += f"""
                     <div style="margin-bottom:15px; border-bottom:1px dashed #e2e8f0; padding-bottom:10px;">
-                        <p style="margin:0; font-weight:bold; color:#1e293b;">Câu {i}: {escape(q.content)}</p>
+                        <p style="margin:0; font-weight:bold; color:#1e293b;">Câu {i}: {escape(a["question"])}</p>
                         <div style="margin-top:5px; background:#f8fafc; padding:8px; border-radius:4px; border-left:3px solid #3b82f6;">
-                            <span style="font-weight:bold; color:#3b82f6;">Trả lời:</span> {escape(user_ans)}
+                            <span style="font-weight:bold; color:#3b82f6;">Trả lời:</span> {user_ans}{mark}
                         </div>
                     </div>"""
                 
@@ -1048,11 +1046,29 @@ def company_view_applicants(job_id):
     if not user:
         return redirect('/login')
 
-    try: apps = requests.get(f"{API_URL}/jobs/{job_id}/applications", headers=auth_headers()).json()
-    except: apps = []
-    content = f"<h2>📥 Ứng viên cho Job #{job_id}</h2>"
-    for a in apps:
-        content += f"""<div class="job-card"><b>{a['studentName']}</b><br>Trạng thái: {a['status']}<br><a href="/company/applications/{a['applicationId']}/cv">📄 Xem CV</a></div>"""
+    # Xếp hạng theo độ phù hợp; ?scope=all -> gợi ý thêm sinh viên chưa ứng tuyển
+    scope = "all" if request.args.get("scope") == "all" else "applicants"
+    try:
+        company = company_service.get_company_by_user(user["id"])
+        ranked = company_service.get_job_shortlist(company, job_id, scope=scope)
+    except ServiceError:
+        ranked = []
+
+    def percent(value):
+        return f"{value * 100:.0f}%" if value is not None else "--"
+
+    toggle = (f'<a href="/company/jobs/{job_id}/applications">Chỉ ứng viên đã nộp</a>' if scope == "all"
+              else f'<a href="/company/jobs/{job_id}/applications?scope=all">🔎 Gợi ý thêm sinh viên phù hợp</a>')
+    content = f"<h2>📥 Ứng viên cho Job #{job_id}</h2><p>{toggle}</p>"
+    if not ranked:
+        content += "<p style='color:#666;'>Chưa có ứng viên nào.</p>"
+    for r in ranked:
+        if r["applicationId"]:
+            detail = f"""Trạng thái: {escape(r['status'])}<br><a href="/company/applications/{r['applicationId']}/cv">📄 Xem CV</a>"""
+        else:
+            detail = "<i>Chưa ứng tuyển</i>"
+        content += f"""<div class="job-card"><b>{escape(r['fullName'] or '')}</b> — <b>{r['score']}</b> điểm phù hợp<br>
+        Kỹ năng: {percent(r['skillFit'])} · Test: {percent(r['testScore'])} · Đánh giá: {percent(r['evaluation'])}<br>{detail}</div>"""
     resp = make_response(wrap_layout(content))
     return resp
 
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, redirect, make_response
-import requests
 import secrets
-from utils import wrap_layout, API_URL, get_current_user_from_jwt, auth_headers
+import string
+from utils import wrap_layout, get_current_user_from_jwt, next_page_link, STYLESHEET_FINGERPRINT
+from services import ServiceError, grading_service, recruitment_service, student_service, user_service
+from conditional import conditional
 from markupsafe import escape
 from urllib.parse import quote_plus
 student_view_bp = Blueprint('student_view', __name__)
@@ -36,48 +38,78 @@ def safe_msg(s: str) -> str:
     return quote_plus(s)
 def validate_csrf(form_token):
     cookie_token = request.cookies.get("csrf_token")
-    return cookie_token and form_token and cookie_token == form_token
+    return cookie_token and form_token and secrets.compare_digest(cookie_token, form_token)
+
+
+# Token của form ứng tuyển trên /student/home. Trang này có 304 (ETag không chứa token),
+# nên bí mật trong cookie không đổi theo mỗi lần render: chỉ cấp khi trình duyệt chưa có
+# (cookie phiên), trang trong cache luôn khớp cookie. Mỗi lần render in ra token đã "che"
+# bằng mask ngẫu nhiên (mask + mask XOR bí mật) -> body nén không lặp lại 1 chuỗi bí mật
+# cố định (tránh kiểu tấn công BREACH).
+APPLY_CSRF_COOKIE = "apply_csrf"
+
+
+def mask_csrf(secret):
+    raw = bytes.fromhex(secret)
+    mask = secrets.token_bytes(len(raw))
+    return (mask + bytes(a ^ b for a, b in zip(mask, raw))).hex()
+
+
+def validate_apply_csrf(form_token):
+    secret = request.cookies.get(APPLY_CSRF_COOKIE)
+    try:
+        raw = bytes.fromhex(form_token or "")
+    except ValueError:
+        return False
+    half = len(raw) // 2
+    if not secret or not half or len(raw) != 2 * half:
+        return False
+    unmasked = bytes(a ^ b for a, b in zip(raw[:half], raw[half:])).hex()
+    return secrets.compare_digest(unmasked, secret)
+
+
+def student_home_version():
+    """Trang chủ đổi khi job, application của student hoặc chuông thông báo đổi."""
+    user = require_student_view()
+    if not user or not request.cookies.get(APPLY_CSRF_COOKIE):
+        # chưa có bí mật CSRF -> render đầy đủ để cấp (không trả 304 với token cũ)
+        return None
+    try:
+        student = student_service.get_student_by_user(user["id"])
+    except ServiceError:
+        return None
+    return (
+        user["id"],
+        recruitment_service.jobs_version(),
+        student_service.applications_version(student.id),
+        user_service.get_notification_bell(user["id"]),
+        STYLESHEET_FINGERPRINT,
+    )
 
 
 @student_view_bp.route("/student/home")
+@conditional(student_home_version)
 def student_home():
     user = require_student_view()
     if not user:
         return redirect("/login")
 
-    csrf_token = generate_csrf_token()
+    csrf_secret = request.cookies.get(APPLY_CSRF_COOKIE)
+    new_secret = not csrf_secret
+    if new_secret:
+        csrf_secret = generate_csrf_token()
+    csrf_token = mask_csrf(csrf_secret)
     message = request.args.get("msg", "")
     jobs = []
-    applied_job_ids = []
-    done_test_ids = []
 
     try:
-        user_id = user["id"]
-        stu_res = requests.get(
-            f"{API_URL}/students/user/{user_id}",
-            headers=auth_headers(),
-            timeout=5
-        )
-        if stu_res.status_code != 200:
-            return wrap_layout("<p>⚠️ Không tìm thấy hồ sơ sinh viên</p>")
-        stu = stu_res.json()
-        student_id = stu["id"]
-
-        try:
-            res = requests.get(f"{API_URL}/jobs/", headers=auth_headers(), timeout=5)
-            jobs = res.json() if res.status_code == 200 else []
-        except Exception:
-            res = requests.get(f"{API_URL}/jobs/", timeout=5)
-            jobs = res.json() if res.status_code == 200 else []
-
-        applied_res = requests.get(f"{API_URL}/students/{student_id}/applications", headers=auth_headers(), timeout=5)
-        if applied_res.status_code == 200:
-            applied_job_ids = [a["jobId"] for a in applied_res.json()]
-
-        test_done_res = requests.get(f"{API_URL}/students/{student_id}/tests", headers=auth_headers(), timeout=5)
-        if test_done_res.status_code == 200:
-            done_test_ids = [t["testId"] for t in test_done_res.json()]
+        student = student_service.get_student_by_user(user["id"])
+    except ServiceError:
+        return wrap_layout("<p>⚠️ Không tìm thấy hồ sơ sinh viên</p>")
 
+    try:
+        # Danh sách đã loại các job student đã ứng tuyển
+        jobs = recruitment_service.list_jobs_for_student(student.id)
     except Exception as e:
         print("Error loading student/home data:", e)
         jobs = []
@@ -89,12 +121,10 @@ def student_home():
         has_test = j.get("hasTest", False)
         test_id = j.get("testId", None)
 
-        if job_id in applied_job_ids:
-            continue
         if str(j.get("status", "")).upper() == "CLOSED":
             continue
 
-        if has_test and test_id not in done_test_ids:
+        if has_test and test_id:
             content += f"""
             <div class="job-card">
                 <h3>{escape(j.get('title','(No title)'))}</h3>
@@ -118,56 +148,36 @@ def student_home():
             </div>
             """
     resp = make_response(wrap_layout(content))
-    resp.set_cookie(
-        "csrf_token",
-        csrf_token,
-        httponly=True,
-        samesite="Lax",
-        secure=request.is_secure
-    )
+    if new_secret:
+        resp.set_cookie(
+            APPLY_CSRF_COOKIE,
+            csrf_secret,
+            httponly=True,
+            samesite="Lax",
+            secure=request.is_secure
+        )
     return resp
 
 
 @student_view_bp.route("/apply/<int:job_id>", methods=["POST"])
 def apply(job_id):
-    if not validate_csrf(request.form.get("csrf_token")):
+    if not validate_apply_csrf(request.form.get("csrf_token")):
         return "CSRF token không hợp lệ", 400
 
     user = require_student_view()
     if not user:
         return redirect('/login')
 
-    user_id = user["id"]
-    
-    # 1. Lấy thông tin sinh viên từ API
-    stu_res = requests.get(f"{API_URL}/students/user/{user_id}", headers=auth_headers())
-    
-    if stu_res.status_code != 200:
+    # 1. Lấy thông tin sinh viên
+    try:
+        stu = student_service.get_student_data(user["id"])
+    except ServiceError:
         return redirect("/student/home?msg=❌+Lỗi+kết+nối+dữ+liệu+sinh+viên")
 
-    stu = stu_res.json()
-
     # ==================================================================
     # 2. KIỂM TRA HỒ SƠ ĐẦY ĐỦ (LOGIC MỚI)
     # ==================================================================
-    # Các trường bắt buộc phải có giá trị
-    required_fields = {
-        "fullName": "Họ tên",
-        "cccd": "CCCD",
-        "major": "Ngành học"
-    }
-    
-    missing = []
-    
-    # Kiểm tra các trường cơ bản (Level 1)
-    for field, label in required_fields.items():
-        if not stu.get(field):
-            missing.append(label)
-
-    # Kiểm tra Profile và CV (Level 2 - nằm trong object 'profile')
-    profile = stu.get("profile")
-    if not profile or not profile.get("cvUrl"):
-        missing.append("Link CV")
+    missing = student_service.get_missing_profile_fields(stu)
 
     # Nếu thiếu thông tin -> Chặn và đẩy về trang Profile
     if missing:
@@ -178,23 +188,18 @@ def apply(job_id):
     # ==================================================================
 
     # 3. Nếu hồ sơ OK -> Tiếp tục quy trình ứng tuyển cũ
-    student_id = stu["id"]
-    res = requests.post(
-        f"{API_URL}/apply/",
-        json={"studentId": student_id, "jobId": job_id},
-        headers=auth_headers()
-    )
-    if res.status_code == 201:
-        data = res.json()
-        if data.get("status") == "NEED_TEST":
-            return redirect(f"/student/test/{data['testId']}")
+    try:
+        data = recruitment_service.apply_job(stu["id"], job_id)
+    except ServiceError:
+        return redirect("/student/home")
 
-        if data.get("status") == "APPLIED":
-            return redirect("/student/home?msg=✅+Ứng+tuyển+thành+công")
+    if data.get("status") == "NEED_TEST":
+        return redirect(f"/student/test/{data['testId']}")
 
-        return redirect("/student/home?msg=❌+Không+thể+ứng+tuyển")
+    if data.get("status") == "APPLIED":
+        return redirect("/student/home?msg=✅+Ứng+tuyển+thành+công")
 
-    return redirect("/student/home")
+    return redirect("/student/home?msg=❌+Không+thể+ứng+tuyển")
 
 
 # Trong file student_view.py
@@ -214,20 +219,13 @@ def student_profile():
     if not user:
         return redirect('/login')
 
-    user_id = user["id"]
-    
     # 2. Lấy thông tin sinh viên hiện tại
-    stu_res = requests.get(
-        f"{API_URL}/students/user/{user_id}",
-        headers=auth_headers(),
-        timeout=5
-    )
-    
-    if stu_res.status_code != 200:
+    try:
+        student_obj = student_service.get_student_by_user(user["id"])
+    except ServiceError:
         return wrap_layout("<p>Không tìm thấy hồ sơ sinh viên</p>")
-    
-    student = stu_res.json()
-    student_id = student["id"]
+
+    student = student_service.serialize_student(student_obj)
     profile = student.get("profile") or {}
     
     # 3. XỬ LÝ LƯU (POST)
@@ -245,7 +243,7 @@ def student_profile():
                     "level": int(level.strip())
                 })
         
-        # Payload gửi lên API
+        # Payload gửi cho service
         payload = {
             "fullName": request.form.get("fullName"),
             "major": request.form.get("major"),
@@ -259,17 +257,14 @@ def student_profile():
             "skills": skills_list
         }
         
-        res = requests.put(
-            f"{API_URL}/students/{student_id}",
-            json=payload,
-            headers=auth_headers()
-        )
-        if res.status_code == 200:
+        try:
+            student_service.update_student(student_obj, payload)
             message = "<p style='color:green; font-weight:bold;'>✅ Hồ sơ đã được lưu thành công</p>"
             # Load lại data mới nhất để hiển thị
-            student = requests.get(f"{API_URL}/students/user/{user_id}").json()
+            student = student_service.serialize_student(student_obj)
             profile = student.get("profile") or {}
-        else:
+        except Exception as e:
+            print(f"Error saving student profile: {e}")
             message = "<p style='color:red;'>❌ Lưu hồ sơ thất bại</p>"
 
     # 4. CHUẨN BỊ DỮ LIỆU HIỂN THỊ
@@ -339,43 +334,21 @@ def student_applications():
     if not user:
         return redirect('/login')
 
-    user_id = user["id"]
     try:
         # 1. Lấy thông tin sinh viên
-        stu_res = requests.get(
-            f"{API_URL}/students/user/{user_id}",
-            headers=auth_headers(),
-            timeout=5
-        )
-        if stu_res.status_code != 200: 
-            return wrap_layout(f"<h2>⚠️ Lỗi: Không tìm thấy sinh viên (API Code {stu_res.status_code})</h2>")
-        
-        student_data = stu_res.json()
-        student_id = student_data['id']
-
-        # 2. Lấy danh sách ứng tuyển (CODE DEBUG)
-        app_url = f"{API_URL}/students/{student_id}/applications"
-        app_res = requests.get(
-            app_url,
-            headers=auth_headers(),
-            timeout=5
-        )
-        
-        # === NẾU API LỖI, IN RA MÀN HÌNH ĐỂ BẠN THẤY ===
-        if app_res.status_code != 200:
-            error_html = f"""
-            <div style="background:#fee2e2; border:1px solid #ef4444; padding:20px; border-radius:8px; color:#b91c1c;">
-                <h3>❌ Lỗi kết nối API lấy danh sách ứng tuyển</h3>
-                <p><b>URL:</b> {app_url}</p>
-                <p><b>Status Code:</b> {app_res.status_code}</p>
-                <p><b>Response Text:</b> {app_res.text}</p>
-                <hr>
-                <p><i>Hãy chụp màn hình lỗi này để kiểm tra lại file routers/student_router.py</i></p>
-            </div>
-            """
-            return wrap_layout(error_html)
-            
-        apps = app_res.json()
+        try:
+            student = student_service.get_student_by_user(user["id"])
+        except ServiceError as e:
+            return wrap_layout(f"<h2>⚠️ Lỗi: Không tìm thấy sinh viên ({e.detail})</h2>")
+
+        # 2. Lấy danh sách ứng tuyển (phân trang bằng cursor)
+        try:
+            page = student_service.get_student_applications(
+                student.id, request.args.get("cursor"), request.args.get("limit")
+            )
+        except ServiceError:
+            page = student_service.get_student_applications(student.id)
+        apps = page["items"]
 
     except Exception as e:
         return wrap_layout(f"<h2>❌ Lỗi kết nối hệ thống (Python): {e}</h2>")
@@ -464,7 +437,7 @@ def student_applications():
         </div>
         """
 
-    return wrap_layout(f"<h2>📌 Việc làm đã ứng tuyển</h2>{message_html}{html}")
+    return wrap_layout(f"<h2>📌 Việc làm đã ứng tuyển</h2>{message_html}{html}{next_page_link(page['nextCursor'])}")
 
 @student_view_bp.route("/student/tests/<int:job_id>")
 def student_tests(job_id):
@@ -473,35 +446,18 @@ def student_tests(job_id):
     if not user:
         return redirect('/login')
     
-    user_id = user["id"]
-    
     # 1. Lấy thông tin sinh viên
-    stu_res = requests.get(f"{API_URL}/students/user/{user_id}", headers=auth_headers())
-    if stu_res.status_code != 200:
+    try:
+        student = student_service.get_student_by_user(user["id"])
+    except ServiceError:
         return redirect("/student/home?msg=❌+Lỗi+kết+nối+dữ+liệu+sinh+viên")
-        
-    stu = stu_res.json()
 
     # ==================================================================
     # 2. KIỂM TRA HỒ SƠ ĐẦY ĐỦ (BẮT BUỘC TRƯỚC KHI TEST)
     # ==================================================================
-    required_fields = {
-        "fullName": "Họ tên",
-        "cccd": "CCCD",
-        "major": "Ngành học"
-    }
-    
-    missing = []
-    
-    # Kiểm tra thông tin cơ bản
-    for field, label in required_fields.items():
-        if not stu.get(field):
-            missing.append(label)
-
-    # Kiểm tra CV trong profile
-    profile = stu.get("profile")
-    if not profile or not profile.get("cvUrl"):
-        missing.append("Link CV")
+    missing = student_service.get_missing_profile_fields(
+        student_service.serialize_student(student)
+    )
 
     # Nếu thiếu -> Chặn và đẩy về trang Profile
     if missing:
@@ -511,17 +467,12 @@ def student_tests(job_id):
     # ==================================================================
 
     # 3. Hồ sơ OK -> Tiếp tục vào làm bài test
-    student_id = stu["id"]
-    start_res = requests.post(
-        f"{API_URL}/tests/start",
-        json={"jobId": job_id},
-        headers=auth_headers()
-    )
-    if start_res.status_code in [200, 201]:
-        test_id = start_res.json()["testId"]
-        return redirect(f"/student/test/{test_id}")
-        
-    return redirect("/student/home")
+    try:
+        test_id = student_service.start_test_session(student, job_id)["testId"]
+    except ServiceError:
+        return redirect("/student/home")
+
+    return redirect(f"/student/test/{test_id}")
 
 @student_view_bp.route("/student/test/<int:test_id>")
 def student_do_test(test_id):
@@ -532,20 +483,12 @@ def student_do_test(test_id):
     if not user:
         return redirect('/login')
 
-    user_id = user["id"]
-
     # 1. Lấy thông tin sinh viên
-    stu_res = requests.get(
-        f"{API_URL}/students/user/{user_id}",
-        headers=auth_headers(),
-        timeout=5
-    )
-    if stu_res.status_code != 200:
+    try:
+        student = student_service.get_student_data(user["id"])
+    except ServiceError:
         return wrap_layout("<p>❌ Không tìm thấy thông tin sinh viên</p>")
 
-    student = stu_res.json()
-    student_id = student["id"]
-
     # ==================================================================
     # 2. KIỂM TRA HỒ SƠ (BẮT BUỘC TRƯỚC KHI VÀO TRANG LÀM BÀI)
     # ==================================================================
@@ -583,17 +526,27 @@ def student_do_test(test_id):
     # ==================================================================
 
     # 3. Nếu hồ sơ đủ -> Lấy đề thi hiển thị bình thường
-    res = requests.get(f"{API_URL}/tests/{test_id}", headers=auth_headers())
-    if res.status_code != 200:
+    try:
+        test = student_service.get_test_details(test_id)
+    except ServiceError:
         return wrap_layout("<p>❌ Không tìm thấy bài test hoặc bạn không có quyền truy cập</p>")
 
-    test = res.json()
     questions_html = ""
     for idx, q in enumerate(test.get("questions", []), start=1):
+        choices = grading_service.parse_options(q.get("options"))
+        if choices:
+            # trắc nghiệm: gửi nhãn A, B, C... để chấm tự động
+            answer_html = "".join(f"""
+            <label style="display:block; margin-top:6px; cursor:pointer;">
+                <input type="radio" name="answer_{q['id']}" value="{label}" required style="width:auto; margin-right:8px;">
+                {label}. {escape(text)}
+            </label>""" for label, text in zip(string.ascii_uppercase, choices))
+        else:
+            answer_html = f"""<textarea name="answer_{q['id']}" placeholder="Nhập câu trả lời của bạn..." required rows="5" style="width:100%; margin-top:10px;"></textarea>"""
         questions_html += f"""
         <div class="job-card">
             <b>Câu {idx}:</b> {q['content']}<br>
-            <textarea name="answer_{q['id']}" placeholder="Nhập câu trả lời tự luận của bạn..." required rows="5" style="width:100%; margin-top:10px;"></textarea>
+            {answer_html}
         </div>
         """
         
@@ -624,69 +577,43 @@ def student_test_submit(test_id):
     if not user:
         return redirect('/login')
 
-    user_id = user["id"]
-
-    # 3. Lấy studentId
-    stu_res = requests.get(
-        f"{API_URL}/students/user/{user_id}",
-        headers=auth_headers(),
-        timeout=5
-    )
-    if stu_res.status_code != 200:
+    # 3. Lấy student
+    try:
+        student = student_service.get_student_by_user(user["id"])
+    except ServiceError:
         return redirect("/student/home?msg=❌+Không+tìm+thấy+sinh+viên")
 
-    student_id = stu_res.json()["id"]
-
     # 4. Submit bài test
     answers = {
         k: v for k, v in request.form.items()
         if k not in ("csrf_token", "jobId")
     }
 
-    
+    # điểm do grading_service chấm theo đáp án, không gửi từ form
     submit_payload = {
-        "studentId": student_id,
-        "score": 0,
         "answers": answers
     }
 
-    submit_res = requests.post(
-        f"{API_URL}/tests/{test_id}/submit",
-        json=submit_payload,
-        headers=auth_headers()
-    )
-    if submit_res.status_code not in (200, 201):
-        try:
-            msg = submit_res.json().get("detail") or submit_res.text
-        except:
-            msg = submit_res.text
-        return redirect(f"/student/home?msg={safe_msg('❌ Lỗi nộp bài: ' + str(msg))}")
+    try:
+        student_service.submit_test(student, test_id, submit_payload)
+    except ServiceError as e:
+        return redirect(f"/student/home?msg={safe_msg('❌ Lỗi nộp bài: ' + str(e.detail))}")
 
     # 5. Apply job (jobId lấy từ form, KHÔNG session)
     job_id = request.form.get("jobId")
     if job_id:
         try:
-            apply_res = requests.post(
-                f"{API_URL}/apply/",
-                json={"studentId": student_id, "jobId": int(job_id)},
-                headers=auth_headers()
-            )
+            data = recruitment_service.apply_job(student.id, int(job_id))
 
-            if apply_res.status_code in (200, 201):
-                try:
-                    data = apply_res.json()
-                except:
-                    data = {}
-
-                if data.get("status") in ("ALREADY_APPLIED", "APPLIED"):
-                    return redirect("/student/applications?msg=✅+Hoàn+thành+bài+test+và+đã+ứng+tuyển")
-                elif data.get("status") == "NEED_TEST":
-                    return redirect("/student/applications?msg=✅+Hoàn+thành+bài+test,+đang+chờ+xét+duyệt")
-                else:
-                    return redirect("/student/applications?msg=✅+Hoàn+thành+bài+test")
+            if data.get("status") in ("ALREADY_APPLIED", "APPLIED"):
+                return redirect("/student/applications?msg=✅+Hoàn+thành+bài+test+và+đã+ứng+tuyển")
+            elif data.get("status") == "NEED_TEST":
+                return redirect("/student/applications?msg=✅+Hoàn+thành+bài+test,+đang+chờ+xét+duyệt")
             else:
-                return redirect("/student/applications?msg=⚠️+Hoàn+thành+bài+test+nhưng+apply+lỗi")
+                return redirect("/student/applications?msg=✅+Hoàn+thành+bài+test")
 
+        except ServiceError:
+            return redirect("/student/applications?msg=⚠️+Hoàn+thành+bài+test+nhưng+apply+lỗi")
         except Exception:
             return redirect("/student/applications?msg=⚠️+Hoàn+thành+bài+test+nhưng+apply+thất+bại")
 
@@ -744,20 +671,18 @@ def student_report_company():
     company_id_raw = request.form.get("companyId")
     company_id = int(company_id_raw) if company_id_raw and company_id_raw != "None" else None
 
-    res = requests.post(
-        f"{API_URL}/student/reports",
-        json={
+    try:
+        student = student_service.get_student_by_user(user["id"])
+        student_service.report_company(student, {
             "companyId": company_id,
             "reportType": request.form.get("reportType"),
             "content": request.form.get("content")
-        },
-        headers=auth_headers()
-    )
-
-    if res.status_code in (200, 201):
-        return redirect("/student/applications?msg=report_success")
+        })
+    except Exception as e:
+        print(f"Error reporting company: {e}")
+        return redirect("/student/applications?msg=report_fail")
 
-    return redirect("/student/applications?msg=report_fail")
+    return redirect("/student/applications?msg=report_success")
 
 
 